@@ -0,0 +1,192 @@
+# backend/accounts/neighbours.py
+# ------------------------------------------------------
+# 유저 재무 프로필 최근접 이웃 인덱스 (메모리, NumPy)
+# - (나이, 자산, 연봉, 투자 성향)을 정규화한 벡터로 유저 간 거리 계산
+# - (나이, 자산, 연봉) 공간을 격자(bucket)로 나눠서 가까운 칸부터 탐색
+#   -> 전체 유저를 훑지 않고 주변 칸의 후보만 거리 계산
+# - 설문 결과 저장 / 프로필 수정 시 해당 유저 한 명만 갱신
+# ------------------------------------------------------
+from itertools import product
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+import numpy as np
+
+# 정규화 단위: 이 만큼 차이 나면 거리 1
+AGE_SCALE = 5
+MONEY_SCALE = 10000000
+SALARY_SCALE = 10000000
+# 투자 성향(동물)이 다르면 더해지는 거리
+PERSONA_PENALTY = 1.0
+# 격자 한 칸의 크기 (정규화 단위)
+CELL_SIZE = 0.5
+
+# 이 링(칸 거리)까지 찾아도 부족하면 전체 탐색으로 전환
+MAX_RING = 6
+
+REBUILD_SECONDS = getattr(settings, 'USER_INDEX_REBUILD_SECONDS', 600)
+
+
+def profile_vector(age, money, salary):
+    return np.array([(age or 0) / AGE_SCALE, (money or 0) / MONEY_SCALE, (salary or 0) / SALARY_SCALE])
+
+
+def cell_of(vector):
+    return tuple(int(v) for v in np.floor(vector / CELL_SIZE))
+
+
+def shell_offsets(r):
+    """중심 칸에서 체비쇼프 거리가 정확히 r 인 칸들의 상대 좌표"""
+    span = range(-r, r + 1)
+    return [d for d in product(span, span, span) if max(map(abs, d)) == r]
+
+
+SHELLS = [shell_offsets(r) for r in range(MAX_RING + 1)]
+
+
+class UserIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built_at = None
+
+    # ------------------------------------------------------
+    # 구축 / 갱신
+    # ------------------------------------------------------
+    def build(self):
+        User = get_user_model()
+        users = list(User.objects.values_list('id', 'age', 'money', 'salary', 'investment_persona'))
+
+        with self._lock:
+            self.user_ids = np.array([u[0] for u in users], dtype=np.int64)
+            self.rows = {user_id: row for row, user_id in enumerate(self.user_ids.tolist())}
+            self.vectors = np.array([profile_vector(*u[1:4]) for u in users]).reshape(-1, 3)
+            self.personas = {}
+            self.persona_codes = np.array([self._persona_code(u[4]) for u in users], dtype=np.int64)
+            self.alive = np.ones(len(users), dtype=bool)
+
+            # 칸 번호로 정렬한 뒤 잘라서 칸별 행 번호 배열을 만듦
+            keys = np.floor(self.vectors / CELL_SIZE).astype(np.int64)
+            order = np.lexsort(keys.T[::-1])
+            cuts = np.flatnonzero(np.any(np.diff(keys[order], axis=0), axis=1)) + 1
+            self.cells = {
+                tuple(keys[rows[0]].tolist()): rows
+                for rows in np.split(order, cuts) if len(rows)
+            }
+            self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        with self._lock:
+            if self.built_at is None or time.monotonic() - self.built_at > REBUILD_SECONDS:
+                self.build()
+
+    def _persona_code(self, persona):
+        # 성향 없음은 0, 나머지는 등장 순서대로 1, 2, ...
+        if not persona:
+            return 0
+        return self.personas.setdefault(persona, len(self.personas) + 1)
+
+    def update_user(self, user):
+        """설문/프로필 수정으로 바뀐 유저 한 명만 반영"""
+        with self._lock:
+            if self.built_at is None:
+                return
+            vector = profile_vector(user.age, user.money, user.salary)
+            code = self._persona_code(user.investment_persona)
+
+            row = self.rows.get(user.pk)
+            if row is None:
+                row = len(self.user_ids)
+                self.rows[user.pk] = row
+                self.user_ids = np.append(self.user_ids, user.pk)
+                self.vectors = np.vstack([self.vectors, vector])
+                self.persona_codes = np.append(self.persona_codes, code)
+                self.alive = np.append(self.alive, True)
+            else:
+                if self.alive[row]:
+                    self._discard(row)
+                self.vectors[row] = vector
+                self.persona_codes[row] = code
+                self.alive[row] = True
+            cell = cell_of(vector)
+            self.cells[cell] = np.append(self.cells.get(cell, np.empty(0, dtype=np.int64)), row)
+
+    def _discard(self, row):
+        cell = cell_of(self.vectors[row])
+        self.cells[cell] = self.cells[cell][self.cells[cell] != row]
+
+    def remove_user(self, user_id):
+        with self._lock:
+            if self.built_at is None:
+                return
+            row = self.rows.get(user_id)
+            if row is not None and self.alive[row]:
+                self._discard(row)
+                self.alive[row] = False
+
+    # ------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------
+    def _distances(self, rows, vector, code):
+        diff = self.vectors[rows] - vector
+        dist = (diff * diff).sum(axis=1)
+        dist += np.where(self.persona_codes[rows] == code, 0.0, PERSONA_PENALTY ** 2)
+        return np.sqrt(dist)
+
+    def _ring(self, center, r):
+        """center 칸에서 r 칸 떨어진 껍질(shell)에 있는 유저들의 행 번호"""
+        cx, cy, cz = center
+        found = []
+        for dx, dy, dz in SHELLS[r]:
+            rows = self.cells.get((cx + dx, cy + dy, cz + dz))
+            if rows is not None:
+                found.append(rows)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def nearest(self, user, k=50):
+        """user 와 프로필이 가장 가까운 유저 id 목록 (가까운 순, 본인 제외)"""
+        self.ensure_built()
+        with self._lock:
+            vector = profile_vector(user.age, user.money, user.salary)
+            code = self.personas.get(user.investment_persona, -1) if user.investment_persona else 0
+            me = self.rows.get(user.pk, -1)
+            center = cell_of(vector)
+
+            rows = np.empty(0, dtype=np.int64)
+            dist = np.empty(0)
+            for r in range(MAX_RING + 1):
+                # 링마다 새로 들어온 후보만 거리 계산
+                ring = self._ring(center, r)
+                ring = ring[ring != me]
+                rows = np.concatenate([rows, ring])
+                dist = np.concatenate([dist, self._distances(ring, vector, code)])
+                if len(rows) < k:
+                    continue
+                # 아직 안 본 칸의 유저는 적어도 r 칸 떨어져 있으므로
+                # k 번째 거리가 그보다 가까우면 결과 확정 (같으면 id 가 더 작은 유저가 남아 있을 수 있음)
+                if np.partition(dist, k - 1)[k - 1] < r * CELL_SIZE:
+                    break
+            else:
+                # 주변이 너무 비어 있으면 전체 탐색 (인덱싱 복사 없이 한 번에 계산)
+                rows = np.arange(len(self.user_ids))
+                dist = self._distances(slice(None), vector, code)
+                dist[~self.alive] = np.inf
+                if me >= 0:
+                    dist[me] = np.inf
+                k = min(k, int(np.isfinite(dist).sum()))
+
+            if len(rows) == 0 or k == 0:
+                return []
+            # k 번째와 거리가 같은 유저까지 후보로 남긴 뒤 (거리, id) 순으로 k 명
+            kth = np.partition(dist, min(k, len(rows)) - 1)[min(k, len(rows)) - 1]
+            top = np.flatnonzero(dist <= kth)
+            top = top[np.lexsort((self.user_ids[rows[top]], dist[top]))][:k]
+            return self.user_ids[rows[top]].tolist()
+
+
+_index = UserIndex()
+
+
+def get_user_index():
+    return _index
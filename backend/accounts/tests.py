@@ -1,3 +1,56 @@
+import numpy as np
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from .neighbours import PERSONA_PENALTY, get_user_index, profile_vector
+
+
+class UserIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = np.random.default_rng(12)
+        personas = [None, '호랑이', '거북이', '토끼']
+        User = get_user_model()
+        User.objects.bulk_create([
+            User(
+                username=f"user{i}",
+                age=int(rng.integers(20, 60)),
+                money=int(rng.integers(0, 20)) * 5000000,
+                salary=int(rng.integers(2, 12)) * 5000000,
+                investment_persona=personas[i % len(personas)],
+            )
+            for i in range(300)
+        ])
+        # 주변 칸이 텅 빈 유저 (전체 탐색으로 넘어가는 경우)
+        User.objects.create(username='outlier', age=90, money=2000000000, salary=1000000000, investment_persona='토끼')
+
+    def setUp(self):
+        self.users = list(get_user_model().objects.all())
+        get_user_index().build()
+
+    def brute_force(self, user, k):
+        """모든 유저와의 거리를 직접 계산한 (거리, id) 순 정답"""
+        vector = profile_vector(user.age, user.money, user.salary)
+        ranked = []
+        for other in self.users:
+            if other.pk == user.pk:
+                continue
+            diff = profile_vector(other.age, other.money, other.salary) - vector
+            penalty = 0.0 if (other.investment_persona or '') == (user.investment_persona or '') else PERSONA_PENALTY ** 2
+            ranked.append((np.sqrt((diff * diff).sum() + penalty), other.pk))
+        return [user_id for _, user_id in sorted(ranked)[:k]]
+
+    def test_nearest_matches_brute_force(self):
+        for user in self.users[::25] + [self.users[-1]]:
+            for k in (1, 10, 50):
+                with self.subTest(user=user.username, k=k):
+                    self.assertEqual(get_user_index().nearest(user, k=k), self.brute_force(user, k))
+
+    def test_updated_user_moves_cells(self):
+        user = self.users[0]
+        user.age, user.money, user.salary = 85, 1900000000, 950000000
+        user.save()
+        get_user_index().update_user(user)
+
+        self.assertEqual(get_user_index().nearest(user, k=5), self.brute_force(user, 5))
+        self.assertEqual(get_user_index().nearest(user, k=1), [self.users[-1].pk])
@@ -7,6 +7,8 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from .serializers import UserSerializer
 from .utils import make_nick
+from .neighbours import get_user_index
+from products.rec_cache import get_rec_cache
 
 User = get_user_model()
 
@@ -46,11 +48,15 @@ def profile(request, username):
         
         if serializer.is_valid(raise_exception=True):
             serializer.save()
+            get_user_index().update_user(user)
+            get_rec_cache().invalidate_user(user.pk)
             return Response(serializer.data)
 
     # 3. 회원 탈퇴 (DELETE)
     elif request.method == 'DELETE':
         if request.user.username != username:
             return Response({'error': '본인만 탈퇴할 수 있어!'}, status=status.HTTP_403_FORBIDDEN)
+        get_user_index().remove_user(user.pk)
+        get_rec_cache().invalidate_user(user.pk)
         user.delete()
         return Response({'message': '탈퇴 완료'}, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
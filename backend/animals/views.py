@@ -5,6 +5,8 @@ from .data import QUESTIONS, ANIMALS
 
 # [추가] 분석 기록 저장을 위해 다른 앱(products)의 모델을 가져옵니다.
 from products.models import UserPortfolio 
+from accounts.neighbours import get_user_index
+from products.rec_cache import get_rec_cache
 
 # 1. 질문지 전송 API
 @api_view(['GET'])
@@ -63,6 +65,8 @@ def submit_survey_result(request):
         user.salary = int(user_info.get('salary', user.salary) or 0)
     
     user.save() # 여기서 1차 저장 (User 테이블)
+    get_user_index().update_user(user) # 추천용 이웃 인덱스도 이 유저만 갱신
+    get_rec_cache().invalidate_user(user.pk) # 성향/자산이 바뀌었으니 추천 캐시도 삭제
 
     # 3. [추가] 포트폴리오 기록 저장 (UserPortfolio 테이블)
     # 여기에 goal, tendency 등 User 모델에 없는 정보까지 모두 JSON으로 저장됨
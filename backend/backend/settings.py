@@ -143,12 +143,17 @@ CORS_ALLOWED_ORIGINS = [
 # 12. API Key 관리 (환경변수에서 로드)
 # 금융감독원 API (예적금)
 FINLIFE_API_KEY = env('FINLIFE_API_KEY')
+# 로컬 스텁 서버로 테스트할 때는 .env 에서 주소만 바꿔주면 된다
+FINLIFE_BASE_URL = env('FINLIFE_BASE_URL', default='http://finlife.fss.or.kr/finlifeapi')
 
 # 카카오 맵 API (은행 검색, 경로 안내)
 KAKAO_MAP_API_KEY = env('KAKAO_MAP_API_KEY')
+KAKAO_LOCAL_URL = env('KAKAO_LOCAL_URL', default='https://dapi.kakao.com')
+KAKAO_NAVI_URL = env('KAKAO_NAVI_URL', default='https://apis-navi.kakaomobility.com')
 
 # 유튜브 API (관심 종목)
 YOUTUBE_API_KEY = env('YOUTUBE_API_KEY')
+YOUTUBE_API_URL = env('YOUTUBE_API_URL', default='https://www.googleapis.com/youtube/v3')
 
 # AI 모델 설정 (GMS 활용)
 # OpenAI 라이브러리가 자동으로 인식하는 변수명은 아닐 수 있으니,
@@ -156,5 +161,44 @@ YOUTUBE_API_KEY = env('YOUTUBE_API_KEY')
 GMS_API_KEY = env('GMS_API_KEY')
 GMS_BASE_URL = env('GMS_BASE_URL') # GMS 엔드포인트
 
+# 백그라운드 수집 주기 (초) - python manage.py run_ingest_worker
+FINLIFE_REFRESH_SECONDS = env.int('FINLIFE_REFRESH_SECONDS', default=60 * 60 * 6)
+ETF_REFRESH_SECONDS = env.int('ETF_REFRESH_SECONDS', default=60 * 60)
+MARKET_REFRESH_SECONDS = env.int('MARKET_REFRESH_SECONDS', default=60 * 5)
+# 전 종목 지표 + 상관계수 재계산 (평소에는 일봉이 바뀐 종목의 지표만 바로 계산)
+ANALYTICS_REFRESH_SECONDS = env.int('ANALYTICS_REFRESH_SECONDS', default=60 * 60)
+
+# 시장 지수 메모리 캐시 TTL (초) - 지나면 응답은 기존 값으로 하고 백그라운드에서 갱신
+MARKET_CRYPTO_TTL = env.int('MARKET_CRYPTO_TTL', default=60)
+MARKET_FOREX_TTL = env.int('MARKET_FOREX_TTL', default=60 * 5)
+MARKET_METAL_TTL = env.int('MARKET_METAL_TTL', default=60 * 60)
+
+# 일봉 저장소에 처음 보는 종목을 받을 기간 (yfinance period) - 이후로는 마지막 저장 날짜 이후만 받음
+PRICE_HISTORY_PERIOD = env('PRICE_HISTORY_PERIOD', default='5y')
+
+# 추천 엔진(가입 행렬, 유저 이웃 인덱스)을 DB 에서 다시 읽는 주기 (초) - 다른 프로세스의 변경 반영용
+RECOMMENDER_REBUILD_SECONDS = env.int('RECOMMENDER_REBUILD_SECONDS', default=60 * 10)
+USER_INDEX_REBUILD_SECONDS = env.int('USER_INDEX_REBUILD_SECONDS', default=60 * 10)
+
+# 추천 결과 캐시 (항목 수, 유효 시간 초)
+RECOMMEND_CACHE_SIZE = env.int('RECOMMEND_CACHE_SIZE', default=1024)
+RECOMMEND_CACHE_TTL = env.int('RECOMMEND_CACHE_TTL', default=60 * 10)
+
+# AI 상담 답변 캐시 (항목 수, 유효 시간 초)
+LLM_CACHE_SIZE = env.int('LLM_CACHE_SIZE', default=512)
+LLM_CACHE_TTL = env.int('LLM_CACHE_TTL', default=60 * 60)
+
+# AI 호출 동시 실행 수 / 대기열 길이 / 대기 제한(초) / 응답 제한(초)
+AI_MAX_CONCURRENCY = env.int('AI_MAX_CONCURRENCY', default=4)
+AI_MAX_WAITING = env.int('AI_MAX_WAITING', default=16)
+AI_QUEUE_TIMEOUT = env.int('AI_QUEUE_TIMEOUT', default=10)
+AI_REQUEST_TIMEOUT = env.int('AI_REQUEST_TIMEOUT', default=60)
+# AI 추천 프롬프트의 후보 표 토큰 예산 (대략치)
+AI_CANDIDATE_TOKEN_BUDGET = env.int('AI_CANDIDATE_TOKEN_BUDGET', default=1500)
+
+# 외부 API 중계(카카오/유튜브) 비동기 클라이언트 - 응답 제한(초), 최대 동시 연결 수
+UPSTREAM_TIMEOUT = env.int('UPSTREAM_TIMEOUT', default=10)
+UPSTREAM_MAX_CONNECTIONS = env.int('UPSTREAM_MAX_CONNECTIONS', default=200)
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
@@ -0,0 +1,171 @@
+# backend/products/catalogue.py
+# ------------------------------------------------------
+# 상품 목록 조회 쿼리 모음
+# view 와 쿼리 플랜 점검 명령(check_query_plans)이 같은 쿼리를 쓰도록 한 곳에 모아둠
+# ------------------------------------------------------
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, Exists, F, OuterRef, Prefetch, Q, Value
+
+from .models import Product, ProductOption
+
+
+# ------------------------------------------------------
+# 공통: ProductSerializer 로 내보낼 쿼리셋 준비
+# options / 가입·찜 유저를 prefetch 하고, 로그인 유저의 is_liked / is_joined 를 annotate
+# -> 결과가 몇 개든 쿼리 수가 일정 (상품 1 + options 1 + join_users 1 + like_users 1)
+# ------------------------------------------------------
+def with_related(products, user=None, fields=None):
+    """fields 가 주어지면 그 안에 있는 관계만 prefetch"""
+    def wanted(name):
+        return fields is None or name in fields
+
+    User = get_user_model()
+    if wanted('options'):
+        products = products.prefetch_related('options')
+    if wanted('join_users'):
+        products = products.prefetch_related(Prefetch('join_users', queryset=User.objects.only('id')))
+    if wanted('like_users'):
+        products = products.prefetch_related(Prefetch('like_users', queryset=User.objects.only('id')))
+
+    if user is not None and user.is_authenticated:
+        return products.annotate(
+            is_liked=Exists(Product.like_users.through.objects.filter(product=OuterRef('pk'), user=user.pk)),
+            is_joined=Exists(Product.join_users.through.objects.filter(product=OuterRef('pk'), user=user.pk)),
+        )
+    return products.annotate(
+        is_liked=Value(False, output_field=BooleanField()),
+        is_joined=Value(False, output_field=BooleanField()),
+    )
+
+
+def liked_ids(user, product_ids=None):
+    """user 가 찜한 상품 pk 집합 (한 번의 쿼리)"""
+    if user is None or not user.is_authenticated:
+        return set()
+    likes = Product.like_users.through.objects.filter(user=user.pk)
+    if product_ids is not None:
+        likes = likes.filter(product__in=product_ids)
+    return set(likes.values_list('product_id', flat=True))
+
+
+# [F03-2] 상품 목록 (유형/은행/기간 필터 + 정렬)
+def list_products(product_type=None, bank=None, term=None, sort=None):
+    # 판매 종료 상품 제외
+    products = Product.objects.filter(is_active=True)
+
+    if product_type:
+        if product_type == 'loan':
+            products = products.filter(product_type__in=['mortgage', 'rent', 'credit'])
+        else:
+            products = products.filter(product_type=product_type)
+
+    if bank and bank != 'null':
+        products = products.filter(kor_co_nm=bank)
+
+    if term and term != 'null':
+        try:
+            # 옵션 join + distinct 대신 EXISTS 서브쿼리 (GROUP BY / 중복 제거 불필요)
+            products = products.filter(
+                Exists(ProductOption.objects.filter(product=OuterRef('pk'), save_trm=int(term)))
+            )
+        except ValueError:
+            pass
+
+    field, descending = sort_key(product_type, sort)
+    ordering = F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+
+    # sort_value: 커서(다음 페이지 시작점)를 만들 때 쓰는 정렬 기준 값
+    products = products.annotate(sort_value=F(field)).order_by(ordering, 'pk')
+    return products
+
+
+def sort_key(product_type=None, sort=None):
+    """
+    정렬 기준 (ProductSummary 필드, 내림차순 여부)
+    금리/수령액/인기 값은 미리 계산된 ProductSummary 에서 바로 정렬
+    best_rate = Max(intr_rate2), worst_rate = Min(intr_rate), best_amt = Max(intr_rate)
+    """
+    is_loan_type = product_type in ['mortgage', 'rent', 'credit', 'loan']
+    is_annuity = product_type == 'annuity'
+    is_investment = product_type in ['etf']
+
+    if sort == 'dividend':
+        # [신규] 배당률(intr_rate2) 높은순
+        return 'summary__best_rate', True
+    if sort == 'popular':
+        return 'summary__join_count', True
+    if is_loan_type:
+        # 대출은 낮은 금리순
+        return 'summary__worst_rate', False
+    if is_annuity or is_investment:
+        # 연금은 수령액, ETF/주식은 수익률(intr_rate) 기준
+        return 'summary__best_amt', True
+    return 'summary__best_rate', True
+
+
+# ------------------------------------------------------
+# 커서(keyset) 페이지네이션
+# 커서 = 마지막 항목의 (정렬 값, pk) -> OFFSET 없이 "그 다음" 행부터 바로 읽는다
+# ------------------------------------------------------
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(sort_field, value, pk):
+    raw = json.dumps([sort_field, value, pk])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """잘못된 커서면 ValueError"""
+    try:
+        sort_field, value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return sort_field, value, int(pk)
+    except Exception:
+        raise ValueError('잘못된 cursor 입니다.')
+
+
+def paginate(products, sort, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    list_products() 결과를 한 페이지만 잘라서 (items, next_cursor) 로 반환
+    sort: sort_key() 결과 (정렬 필드, 내림차순 여부) - 커서가 같은 정렬에서 만들어졌는지 확인용
+    """
+    field, descending = sort
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    if cursor:
+        cursor_field, value, pk = decode_cursor(cursor)
+        if cursor_field != field:
+            raise ValueError('정렬 조건이 바뀌어서 cursor 를 쓸 수 없습니다.')
+
+        # 정렬 순서: 값(NULL 은 항상 맨 뒤) -> pk 오름차순
+        if value is None:
+            after = Q(sort_value__isnull=True, pk__gt=pk)
+        else:
+            beyond = Q(sort_value__lt=value) if descending else Q(sort_value__gt=value)
+            after = beyond | Q(sort_value=value, pk__gt=pk) | Q(sort_value__isnull=True)
+        products = products.filter(after)
+
+    # 한 개 더 읽어서 다음 페이지 존재 여부 판단
+    items = list(products[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(field, last.sort_value, last.pk)
+    return items, next_cursor
+
+
+# AI 추천 후보 (최고 우대금리 높은 순)
+def ai_candidates(limit=100, product_types=None):
+    # ProductSummary.best_rate(= Max(intr_rate2)) 인덱스로 정렬 -> GROUP BY 없음
+    # 요약 행이 있는 상품만(INNER JOIN) 가져와야 best_rate 인덱스를 역순으로 훑으며 LIMIT 에서 멈춘다
+    products = Product.objects.filter(is_active=True, summary__best_rate__isnull=False)
+    if product_types:
+        products = products.filter(product_type__in=product_types)
+    return products.annotate(
+        max_rate=F('summary__best_rate')
+    ).order_by('-summary__best_rate')[:limit]
@@ -0,0 +1,196 @@
+# backend/products/etf.py
+# ------------------------------------------------------
+# ETF/주식 데이터 수집 및 저장
+# - 시세/배당은 일봉 저장소(services.price_store)에 쌓고, yf.download 한 번으로 새 날짜만 받음
+# - 수익률/배당률/변동성/최대 낙폭은 services.analytics 가 미리 계산한 값을 그대로 사용
+# - 느린 .info(섹터/통화)는 DB에 없는 종목만, 제한된 스레드 풀로 병렬 조회
+# - Product / ProductOption 은 한 트랜잭션에서 bulk 로 저장
+# ------------------------------------------------------
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import transaction
+import yfinance as yf
+
+from services.analytics import refresh_analytics, symbol_metrics
+from services.price_store import backfill
+
+from .ingest import BULK_BATCH_SIZE
+from .models import Product, ProductOption
+from .summary import refresh_summaries
+from .rec_cache import bump_catalogue_version
+
+# 추천할 종목 리스트 (직접 큐레이션)
+ETF_SYMBOLS = [
+    {'symbol': 'SPY', 'name': 'SPDR S&P 500', 'desc': '미국 S&P500 지수 추종 ETF (안정적 우상향)'},
+    {'symbol': 'QQQ', 'name': 'Invesco QQQ', 'desc': '나스닥 100 추종 (기술주 중심 성장)'},
+    {'symbol': 'SCHD', 'name': 'Schwab US Dividend', 'desc': '미국 배당 성장 ETF (현금 흐름 중시)'},
+    {'symbol': 'TQQQ', 'name': 'ProShares UltraPro QQQ', 'desc': '나스닥 3배 레버리지 (고위험 고수익)'},
+    {'symbol': 'GLD', 'name': 'SPDR Gold Shares', 'desc': '금 현물 투자 ETF (안전자산)'},
+    {'symbol': 'AAPL', 'name': 'Apple Inc', 'desc': '아이폰, 맥북 등을 만드는 세계 1위 기술 기업'},
+    {'symbol': 'MSFT', 'name': 'Microsoft', 'desc': '윈도우, 오피스, 클라우드(Azure) 및 AI 선두 기업'},
+    {'symbol': 'GOOGL', 'name': 'Alphabet (Google)', 'desc': '검색 엔진, 유튜브, 안드로이드 운영체제 보유'},
+    {'symbol': 'AMZN', 'name': 'Amazon', 'desc': '세계 최대 이커머스 및 클라우드(AWS) 기업'},
+    {'symbol': 'TSLA', 'name': 'Tesla', 'desc': '전기차 시장의 선두주자 및 자율주행 기술 보유'},
+    {'symbol': 'NVDA', 'name': 'NVIDIA', 'desc': 'AI 컴퓨팅의 핵심인 GPU 반도체 시장 지배자'},
+    {'symbol': 'META', 'name': 'Meta Platforms', 'desc': '페이스북, 인스타그램, 왓츠앱 등 소셜 미디어 제국'},
+    {'symbol': 'NFLX', 'name': 'Netflix', 'desc': '글로벌 1위 OTT 스트리밍 서비스'},
+    {'symbol': 'SBUX', 'name': 'Starbucks', 'desc': '세계 최대의 커피 프랜차이즈'},
+    {'symbol': 'KO', 'name': 'Coca-Cola', 'desc': '워렌 버핏이 사랑하는 필수 소비재 배당주'},
+    {'symbol': 'O', 'name': 'Realty Income', 'desc': '매달 배당을 주는 미국의 대표적인 리츠(부동산) 주식'},
+]
+
+# .info 병렬 조회 상한 (yahoo 쪽 rate limit 고려)
+INFO_MAX_WORKERS = 8
+
+
+def unique_symbols(items):
+    # 같은 티커가 여러 번 있으면 마지막 항목 기준 (기존 update_or_create 동작과 동일)
+    return list({item['symbol']: item for item in items}.values())
+
+
+def fetch_quotes(symbols):
+    """
+    일봉 저장소를 마지막 저장 날짜 이후만 채우고(처음이면 긴 기간 한 번),
+    미리 계산된 지표(services.analytics)로
+    {symbol: {'current_price', 'return_1y', 'dividend_yield', 'return_1m', 'volatility', 'max_drawdown'}} 반환
+    """
+    backfill(symbols)
+    # 새로 저장된 일봉이 없어서 지표가 아직 계산된 적 없는 종목만 계산
+    missing = [symbol for symbol in symbols if symbol_metrics(symbol) is None]
+    if missing:
+        refresh_analytics(missing)
+
+    quotes = {}
+    for symbol in symbols:
+        metrics = symbol_metrics(symbol)
+        if not metrics:
+            continue
+
+        quotes[symbol] = {
+            'current_price': metrics['last_close'],
+            # 1년 수익률 (%) - 상장 1년이 안 된 종목은 0
+            'return_1y': metrics['return_1y'] or 0,
+            # 최근 1년 배당 합계 / 현재가 = 배당률 (%)
+            'dividend_yield': metrics['dividend_yield'] or 0,
+            'return_1m': metrics['return_1m'],
+            'volatility': metrics['volatility'],
+            'max_drawdown': metrics['max_drawdown'],
+        }
+    return quotes
+
+
+def fetch_info(symbol):
+    try:
+        info = yf.Ticker(symbol).info
+        return {'sector': info.get('sector', 'ETF'), 'currency': info.get('currency', 'USD')}
+    except Exception as e:
+        print(f"ETF 메타데이터 조회 실패 ({symbol}): {e}")
+        return {'sector': 'ETF', 'currency': 'USD'}
+
+
+def fetch_infos(symbols):
+    if not symbols:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(INFO_MAX_WORKERS, len(symbols))) as executor:
+        return dict(zip(symbols, executor.map(fetch_info, symbols)))
+
+
+def fetch_and_save_etfs():
+    items = unique_symbols(ETF_SYMBOLS)
+    symbols = [item['symbol'] for item in items]
+
+    try:
+        quotes = fetch_quotes(symbols)
+    except Exception as e:
+        print(f"ETF 시세 다운로드 실패: {e}")
+        return 0
+
+    products = Product.objects.in_bulk(symbols, field_name='fin_prdt_cd')
+    options = {
+        o.product_id: o
+        for o in ProductOption.objects.filter(product__fin_prdt_cd__in=symbols)
+    }
+
+    # 섹터/통화는 거의 안 바뀌므로 이미 저장된 값이 있으면 재사용
+    known_info = {}
+    for symbol, product in products.items():
+        option = options.get(product.pk)
+        if option and option.etc_info.get('sector'):
+            known_info[symbol] = {
+                'sector': option.etc_info['sector'],
+                'currency': option.etc_info.get('currency', 'USD'),
+            }
+    infos = fetch_infos([s for s in quotes if s not in known_info])
+    infos.update(known_info)
+
+    with transaction.atomic():
+        # 1. Product 저장
+        new_products = []
+        changed_products = []
+        for item in items:
+            if item['symbol'] not in quotes:
+                print(f"ETF 저장 실패 ({item['symbol']}): 시세 없음")
+                continue
+
+            product = products.get(item['symbol'])
+            if product is None:
+                product = Product(fin_prdt_cd=item['symbol'])  # 티커를 고유 코드로 사용
+                new_products.append(product)
+                products[item['symbol']] = product
+            else:
+                changed_products.append(product)
+
+            product.kor_co_nm = '미국 주식/ETF'
+            product.fin_prdt_nm = item['name']
+            product.etc_note = item['desc']
+            product.product_type = 'etf'  # 타입 지정
+            product.join_deny = 1
+
+        Product.objects.bulk_create(new_products, batch_size=BULK_BATCH_SIZE)
+        Product.objects.bulk_update(
+            changed_products,
+            ['kor_co_nm', 'fin_prdt_nm', 'etc_note', 'product_type', 'join_deny'],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        if new_products:
+            # pk 를 돌려주지 않는 DB 대비
+            products.update(Product.objects.in_bulk([p.fin_prdt_cd for p in new_products], field_name='fin_prdt_cd'))
+
+        # 2. ProductOption 저장 (상품당 옵션 하나)
+        new_options = []
+        changed_options = []
+        for symbol, quote in quotes.items():
+            product = products[symbol]
+            option = options.get(product.pk)
+            if option is None:
+                option = ProductOption(product=product)
+                new_options.append(option)
+            else:
+                changed_options.append(option)
+
+            option.fin_prdt_cd = symbol
+            option.intr_rate_type_nm = '투자 수익률'
+            option.intr_rate = round(quote['return_1y'], 2)        # 1년 수익률
+            option.intr_rate2 = round(quote['dividend_yield'], 2)  # 배당률
+            option.save_trm = 12  # 기준 12개월
+            option.etc_info = {
+                'current_price': quote['current_price'],
+                # 미리 계산된 위험 지표 (%)
+                'return_1m': quote['return_1m'],
+                'volatility': quote['volatility'],
+                'max_drawdown': quote['max_drawdown'],
+                'sector': infos.get(symbol, {}).get('sector', 'ETF'),
+                'currency': infos.get(symbol, {}).get('currency', 'USD'),
+            }
+
+        ProductOption.objects.bulk_create(new_options, batch_size=BULK_BATCH_SIZE)
+        ProductOption.objects.bulk_update(
+            changed_options,
+            ['fin_prdt_cd', 'intr_rate_type_nm', 'intr_rate', 'intr_rate2', 'save_trm', 'etc_info'],
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+        refresh_summaries(products[symbol].pk for symbol in quotes)
+        bump_catalogue_version()
+
+    return len(quotes)
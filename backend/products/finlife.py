@@ -0,0 +1,184 @@
+# backend/products/finlife.py
+# ------------------------------------------------------
+# 금융감독원(finlife) API 호출 단계
+# - 6개 카테고리를 스레드 풀로 동시에 요청
+# - keep-alive 커넥션 풀을 공유하는 Session 하나를 재사용
+# - 엔드포인트별 타임아웃 + 재시도(backoff)
+# - max_page_no 까지 모든 페이지를 받아 스트림(PageStream)으로 흘려줌
+# settings.FINLIFE_BASE_URL 을 바꾸면 로컬 스텁 서버로도 돌릴 수 있다.
+# ------------------------------------------------------
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+import time
+
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 카테고리별 (엔드포인트, (connect, read) 타임아웃 초)
+# 대출 상품은 옵션 행이 많아서 응답이 더 느리다.
+ENDPOINTS = {
+    'deposit': ('depositProductsSearch.json', (3, 10)),
+    'saving': ('savingProductsSearch.json', (3, 10)),
+    'annuity': ('annuitySavingProductsSearch.json', (3, 15)),
+    'mortgage': ('mortgageLoanProductsSearch.json', (3, 20)),
+    'rent': ('rentHouseLoanProductsSearch.json', (3, 20)),
+    'credit': ('creditLoanProductsSearch.json', (3, 20)),
+}
+
+NUM_OF_ROWS = 100
+MAX_RETRIES = 3
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """프로세스 전체에서 공유하는 keep-alive Session (최초 호출 시 생성)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET'],
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=len(ENDPOINTS),
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+
+def endpoint_url(product_type):
+    base_url = settings.FINLIFE_BASE_URL.rstrip('/')
+    return f"{base_url}/{ENDPOINTS[product_type][0]}"
+
+
+def fetch_page(product_type, page_no=1, session=None):
+    """카테고리 한 페이지를 요청해서 응답의 result dict 를 반환 (err_cd 가 000 이 아니면 ValueError)"""
+    session = session or get_session()
+    # 연금저축은 보험 권역(050000), 나머지는 은행(020000)
+    fin_grp_no = '050000' if product_type == 'annuity' else '020000'
+    params = {
+        'auth': settings.FINLIFE_API_KEY,
+        'topFinGrpNo': fin_grp_no,
+        'pageNo': page_no,
+        'numOfRows': NUM_OF_ROWS,
+    }
+
+    response = session.get(endpoint_url(product_type), params=params, timeout=ENDPOINTS[product_type][1])
+    response.raise_for_status()
+    response_json = response.json()
+
+    if 'result' not in response_json:
+        raise ValueError("result 키 없음")
+    result = response_json['result']
+    # 인증키 오류(010), 일일 호출 한도 초과 등도 result 는 오지만 baseList 가 없음
+    # -> 빈 페이지로 받으면 그 카테고리 상품이 전부 판매 종료 처리되므로 에러로 처리
+    err_cd = result.get('err_cd')
+    if err_cd != '000':
+        raise ValueError(f"finlife 오류 {err_cd}: {result.get('err_msg')}")
+    return result
+
+
+class Page:
+    """스트림으로 흘려보내는 한 페이지 분량의 응답"""
+    __slots__ = ('product_type', 'page_no', 'max_page_no', 'result')
+
+    def __init__(self, product_type, page_no, max_page_no, result):
+        self.product_type = product_type
+        self.page_no = page_no
+        self.max_page_no = max_page_no
+        self.result = result
+
+
+class PageStream:
+    """
+    모든 카테고리의 모든 페이지를 순서대로 흘려주는 스트림.
+    카테고리마다 워커 스레드가 1 -> max_page_no 까지 페이지를 받아 큐에 넣고,
+    소비자(DB 저장)는 큐에서 꺼내 바로 처리한다.
+    큐 크기(max_buffered)가 상한이라 페이지가 아무리 많아도 메모리에 쌓이는 양은 일정하다.
+
+    for page in stream: ...
+    stream.errors -> {product_type: 에러 메시지}
+    stream.stats  -> {product_type: {'pages', 'max_page_no', 'fetch_seconds'}}
+    """
+
+    def __init__(self, product_types=None, max_buffered=None):
+        self.product_types = list(product_types or ENDPOINTS)
+        self.max_buffered = max_buffered or len(self.product_types)
+        self.errors = {}
+        self.stats = {
+            product_type: {'pages': 0, 'max_page_no': 0, 'fetch_seconds': 0.0}
+            for product_type in self.product_types
+        }
+        self._queue = queue.Queue(maxsize=self.max_buffered)
+        self._stop = threading.Event()
+
+    def _put(self, item):
+        # 소비자가 중간에 멈추면(_stop) 큐가 비지 않아도 워커가 빠져나올 수 있게 timeout 반복
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _worker(self, product_type, session):
+        stats = self.stats[product_type]
+        page_no = 1
+        max_page_no = 1
+        try:
+            while page_no <= max_page_no and not self._stop.is_set():
+                started = time.monotonic()
+                result = fetch_page(product_type, page_no, session)
+                stats['fetch_seconds'] += time.monotonic() - started
+
+                max_page_no = safe_page_no(result.get('max_page_no'))
+                stats['max_page_no'] = max_page_no
+                stats['pages'] += 1
+
+                if not self._put(Page(product_type, page_no, max_page_no, result)):
+                    return
+                page_no += 1
+        except Exception as e:
+            print(f"Error fetching {product_type} (page {page_no}): {e}")
+            self.errors[product_type] = f"Error: {str(e)}"
+        finally:
+            self._put(_DONE)
+
+    def __iter__(self):
+        session = get_session()
+        executor = ThreadPoolExecutor(max_workers=len(self.product_types))
+        try:
+            for product_type in self.product_types:
+                executor.submit(self._worker, product_type, session)
+
+            remaining = len(self.product_types)
+            while remaining:
+                item = self._queue.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            self._stop.set()
+            executor.shutdown(wait=True)
+
+
+_DONE = object()
+
+
+def safe_page_no(value):
+    try: return max(int(value), 1)
+    except (TypeError, ValueError): return 1
@@ -0,0 +1,377 @@
+# backend/products/ingest.py
+# ------------------------------------------------------
+# 금융감독원(finlife) 상품 데이터 일괄 저장 엔진
+# - 응답 JSON을 메모리에서 먼저 파싱하고
+# - fin_prdt_cd 기준 dict 하나로 기존 상품을 찾은 뒤
+# - bulk_create / bulk_update 로 저장
+# - 페이지가 도착할 때마다 그 페이지만 짧은 트랜잭션 하나로 저장 (페이지를 쌓아두지 않음)
+#   (업스트림 응답을 기다리는 동안에는 DB 쓰기 락을 잡지 않음 -> 유저 쓰기가 막히지 않음)
+# - 카테고리의 마지막 페이지까지 저장되면 그 카테고리의 사라진 상품만 정리
+# - 레코드별 content_hash 로 바뀐 행만 갱신, 사라진 상품은 soft retire
+# ------------------------------------------------------
+import hashlib
+import json
+import time
+
+from django.db import transaction
+from .models import Product, ProductOption
+
+# 비교/갱신 대상 필드 (fin_prdt_cd 는 키라서 제외)
+PRODUCT_FIELDS = (
+    'kor_co_nm', 'fin_prdt_nm', 'etc_note', 'join_deny', 'join_member',
+    'join_way', 'spcl_cnd', 'product_type', 'mtrt_int',
+)
+OPTION_FIELDS = (
+    'fin_prdt_cd', 'intr_rate_type_nm', 'intr_rate', 'intr_rate2', 'save_trm', 'etc_info',
+)
+
+BULK_BATCH_SIZE = 500
+
+# 한 번의 동기화에서 카테고리 판매 중 상품의 이 비율보다 많이 사라지면
+# 업스트림 응답이 잘린 것으로 보고 판매 종료 처리를 하지 않음
+MAX_RETIRE_RATIO = 0.5
+
+
+def safe_int(value, default=0):
+    if value is None or value == "": return default
+    try: return int(value)
+    except (TypeError, ValueError): return default
+
+
+def safe_float(value, default=-1.0):
+    if value is None or value == "": return default
+    try: return float(value)
+    except (TypeError, ValueError): return default
+
+
+# (1) 상품 기본 정보 파싱 -> Product 필드 dict (필수값이 없으면 None)
+def parse_base(item, product_type):
+    fin_prdt_cd = item.get('fin_prdt_cd')
+    if not fin_prdt_cd or not item.get('kor_co_nm') or not item.get('fin_prdt_nm'):
+        return None
+
+    return {
+        'fin_prdt_cd': fin_prdt_cd,
+        'kor_co_nm': item.get('kor_co_nm'),
+        'fin_prdt_nm': item.get('fin_prdt_nm'),
+        'etc_note': item.get('etc_note', ''),
+        'join_deny': safe_int(item.get('join_deny')),
+        'join_member': item.get('join_member', ''),
+        'join_way': item.get('join_way', ''),
+        'spcl_cnd': item.get('spcl_cnd', ''),
+        'product_type': product_type,
+        # 만기 후 이자율은 예금/적금에만 존재
+        'mtrt_int': item.get('mtrt_int', '') if product_type in ['deposit', 'saving'] else None,
+    }
+
+
+# (2) 상품 옵션 파싱 -> ProductOption 필드 dict
+def parse_option(item, product_type):
+    rate_1 = -1.0
+    rate_2 = -1.0
+    rate_type_nm = ''
+    save_trm = None
+    etc_info = {}
+
+    # A. 예금 / 적금
+    if product_type in ['deposit', 'saving']:
+        rate_1 = safe_float(item.get('intr_rate'))
+        rate_2 = safe_float(item.get('intr_rate2'))
+        rate_type_nm = item.get('intr_rate_type_nm', '')
+        save_trm = safe_int(item.get('save_trm'))
+
+    # B. 대출 (주택/전세)
+    elif product_type in ['mortgage', 'rent']:
+        rate_1 = safe_float(item.get('lend_rate_min'))
+        rate_2 = safe_float(item.get('lend_rate_max'))
+        rate_type_nm = item.get('lend_rate_type_nm', '')
+        etc_info = {
+            'rpay_type_nm': item.get('rpay_type_nm'),
+            'mrtg_type_nm': item.get('mrtg_type_nm'),
+        }
+
+    # C. 신용대출
+    elif product_type == 'credit':
+        grades = [
+            item.get('crdt_grad_1'), item.get('crdt_grad_4'), item.get('crdt_grad_5'),
+            item.get('crdt_grad_6'), item.get('crdt_grad_10'), item.get('crdt_grad_11'),
+            item.get('crdt_grad_12'), item.get('crdt_grad_13')
+        ]
+        valid_rates = [safe_float(g) for g in grades if g is not None and g != '']
+        if valid_rates:
+            rate_1 = min(valid_rates)
+            rate_2 = max(valid_rates)
+
+        rate_type_nm = item.get('crdt_prdt_type_nm', '신용대출')
+        etc_info = {'crdt_prdt_type_nm': item.get('crdt_prdt_type_nm')}
+
+    # D. 연금저축
+    elif product_type == 'annuity':
+        rate_1 = safe_float(item.get('pnsn_recp_amt'))  # 수령액
+        rate_2 = 0
+
+        rate_type_nm = item.get('pnsn_recp_trm_nm', '연금')
+        paym_prd = safe_int(item.get('paym_prd'))
+        save_trm = paym_prd * 12 if paym_prd else None
+
+        etc_info = {
+            'pnsn_entr_age_nm': item.get('pnsn_entr_age_nm'),
+            'pnsn_strt_age_nm': item.get('pnsn_strt_age_nm'),
+            'mon_paym_atm_nm': item.get('mon_paym_atm_nm'),
+            'paym_prd_nm': item.get('paym_prd_nm'),
+        }
+
+    return {
+        'fin_prdt_cd': item.get('fin_prdt_cd'),
+        'intr_rate_type_nm': rate_type_nm or '',
+        'intr_rate': rate_1,
+        'intr_rate2': rate_2,
+        'save_trm': save_trm,
+        'etc_info': etc_info,
+    }
+
+
+def option_key(product_id, save_trm, intr_rate_type_nm):
+    # 기존 로직과 동일하게 (상품, 기간, 금리유형) 조합을 옵션의 고유키로 사용
+    return (product_id, save_trm, intr_rate_type_nm)
+
+
+def content_hash(data):
+    # 업스트림 레코드 내용이 같으면 같은 해시 -> 필드 비교 없이 변경 여부 판별
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ProductIngestor:
+    """
+    카테고리별 finlife 응답(result)을 받아 DB에 반영하는 엔진 (증분 동기화).
+    - 기존 상품/옵션은 키와 content_hash 만 쿼리 2번으로 메모리에 올려두고
+    - 레코드 해시가 같으면 건드리지 않고, 다를 때만 bulk_update
+    - 이번 동기화에서 안 보인 상품은 삭제 대신 is_active=False 로 숨김(soft retire)
+      -> join_users / like_users 관계가 그대로 유지된다.
+    force=True 면 해시가 같아도 전부 다시 쓴다.
+    """
+
+    def __init__(self, force=False):
+        self.force = force
+        self.products = Product.objects.only(
+            'id', 'fin_prdt_cd', 'product_type', 'content_hash', 'is_active'
+        ).in_bulk(field_name='fin_prdt_cd')
+        self.options = {
+            option_key(o.product_id, o.save_trm, o.intr_rate_type_nm): o
+            for o in ProductOption.objects.only(
+                'id', 'product_id', 'save_trm', 'intr_rate_type_nm', 'content_hash'
+            )
+        }
+        self.seen_products = set()
+        self.seen_options = set()
+        # 카테고리별로 이번에 받은 상품 수 (retire 안전장치용)
+        self.received = {}
+        # 새로 생기거나 바뀐 상품 pk (요약 테이블 갱신 대상)
+        self.touched = set()
+        self.report = {}
+
+    def _counter(self, product_type):
+        return self.report.setdefault(product_type, {
+            'products': {'inserted': 0, 'updated': 0, 'unchanged': 0, 'retired': 0},
+            'options': {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0},
+            'pages': 0,
+            'write_seconds': 0.0,
+        })
+
+    def ingest(self, product_type, result):
+        counter = self._counter(product_type)
+        started = time.monotonic()
+        self._save_bases(product_type, result.get('baseList', []), counter['products'])
+        self._save_options(product_type, result.get('optionList', []), counter['options'])
+        counter['pages'] += 1
+        counter['write_seconds'] += time.monotonic() - started
+        return counter
+
+    def write_page(self, product_type, result):
+        """페이지 하나를 짧은 트랜잭션으로 저장하고 그 페이지에서 바뀐 상품의 요약도 같이 갱신"""
+        from .summary import refresh_summaries
+
+        before = set(self.touched)
+        try:
+            with transaction.atomic():
+                self.ingest(product_type, result)
+                refresh_summaries(self.touched - before)
+        except Exception:
+            # 롤백된 변경은 빼둠 (메모리의 상품/옵션 목록은 DB 와 달라졌으므로 이 ingestor 는 더 쓰지 않음)
+            self.touched = before
+            raise
+
+    def finish_category(self, product_type):
+        """카테고리의 마지막 페이지까지 저장한 뒤 한 번: 사라진 상품/옵션 정리 (역시 짧은 트랜잭션)"""
+        from .summary import refresh_summaries
+
+        before = set(self.touched)
+        with transaction.atomic():
+            self.retire_missing([product_type])
+            # 옵션이 지워진 상품만 요약 다시 계산
+            refresh_summaries(self.touched - before)
+
+    def _save_bases(self, product_type, base_list, counter):
+        to_create = {}
+        to_update = {}
+
+        for item in base_list:
+            data = parse_base(item, product_type)
+            if data is None:
+                continue
+            code = data['fin_prdt_cd']
+            if code in self.seen_products:
+                continue
+            self.seen_products.add(code)
+            self.received[product_type] = self.received.get(product_type, 0) + 1
+
+            data['content_hash'] = content_hash(data)
+            product = self.products.get(code)
+            if product is None:
+                to_create[code] = Product(**data)
+                continue
+
+            if self.force or not product.is_active or product.content_hash != data['content_hash']:
+                for f, value in data.items():
+                    setattr(product, f, value)
+                product.is_active = True
+                to_update[code] = product
+            else:
+                counter['unchanged'] += 1
+
+        if to_create:
+            Product.objects.bulk_create(to_create.values(), batch_size=BULK_BATCH_SIZE)
+            # pk 를 돌려주지 않는 DB도 있으므로 새 상품만 한 번에 다시 읽어온다
+            self.products.update(
+                Product.objects.only('id', 'fin_prdt_cd', 'product_type', 'content_hash', 'is_active')
+                .in_bulk(list(to_create), field_name='fin_prdt_cd')
+            )
+            self.touched.update(self.products[code].pk for code in to_create)
+            counter['inserted'] += len(to_create)
+
+        if to_update:
+            self.touched.update(p.pk for p in to_update.values())
+            Product.objects.bulk_update(
+                to_update.values(), PRODUCT_FIELDS + ('content_hash', 'is_active'), batch_size=BULK_BATCH_SIZE
+            )
+            counter['updated'] += len(to_update)
+
+    def _save_options(self, product_type, option_list, counter):
+        to_create = []
+        to_update = []
+
+        for item in option_list:
+            product = self.products.get(item.get('fin_prdt_cd'))
+            if product is None:
+                continue
+
+            data = parse_option(item, product_type)
+            key = option_key(product.pk, data['save_trm'], data['intr_rate_type_nm'])
+            if key in self.seen_options:
+                continue
+            self.seen_options.add(key)
+
+            data['content_hash'] = content_hash(data)
+            option = self.options.get(key)
+            if option is None:
+                option = ProductOption(product=product, **data)
+                to_create.append(option)
+                self.options[key] = option
+                continue
+
+            if self.force or option.content_hash != data['content_hash']:
+                for f, value in data.items():
+                    setattr(option, f, value)
+                to_update.append(option)
+            else:
+                counter['unchanged'] += 1
+
+        self.touched.update(o.product_id for o in to_create)
+        self.touched.update(o.product_id for o in to_update)
+
+        if to_create:
+            ProductOption.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+            counter['inserted'] += len(to_create)
+
+        if to_update:
+            ProductOption.objects.bulk_update(
+                to_update, OPTION_FIELDS + ('content_hash',), batch_size=BULK_BATCH_SIZE
+            )
+            counter['updated'] += len(to_update)
+
+    def retire_missing(self, product_types):
+        """
+        끝까지 정상 수신한 카테고리(product_types)에 대해서만 호출할 것.
+        - 업스트림에서 사라진 상품 -> is_active=False
+        - 이번에 본 상품의 옵션 중 사라진 옵션 -> 삭제 (옵션에는 유저 관계가 없음)
+        받은 상품이 하나도 없거나 판매 중 상품의 MAX_RETIRE_RATIO 넘게 사라지는 카테고리는
+        응답이 비정상인 것으로 보고 건너뜀 (report 의 retire_skipped 에 이유를 남김)
+        """
+        by_id = {p.pk: p for p in self.products.values()}
+
+        retired = {}
+        active = {}
+        for product in self.products.values():
+            if product.product_type not in product_types or not product.is_active:
+                continue
+            active[product.product_type] = active.get(product.product_type, 0) + 1
+            if product.fin_prdt_cd not in self.seen_products:
+                retired.setdefault(product.product_type, []).append(product.pk)
+
+        product_types = set(product_types)
+        for product_type in list(product_types):
+            ids = retired.get(product_type, [])
+            if not self.received.get(product_type):
+                reason = '받은 상품 없음'
+            elif len(ids) > active.get(product_type, 0) * MAX_RETIRE_RATIO:
+                reason = f"판매 중 {active[product_type]}개 중 {len(ids)}개가 사라짐"
+            else:
+                continue
+            print(f"[ingest] {product_type} 판매 종료 처리 건너뜀: {reason}")
+            self._counter(product_type)['retire_skipped'] = reason
+            product_types.discard(product_type)
+            retired.pop(product_type, None)
+
+        for product_type, ids in retired.items():
+            Product.objects.filter(pk__in=ids).update(is_active=False)
+            self._counter(product_type)['products']['retired'] += len(ids)
+
+        stale = {}
+        for key, option in self.options.items():
+            product = by_id.get(key[0])
+            if (
+                product is not None
+                and product.product_type in product_types
+                and product.fin_prdt_cd in self.seen_products
+                and key not in self.seen_options
+            ):
+                stale.setdefault(product.product_type, []).append(option.pk)
+                self.touched.add(product.pk)
+
+        for product_type, ids in stale.items():
+            ProductOption.objects.filter(pk__in=ids).delete()
+            self._counter(product_type)['options']['deleted'] += len(ids)
+
+
+def save_products(pages, force=False):
+    """
+    pages: product_type / page_no / max_page_no / result 속성을 가진 페이지들의 iterable (finlife.PageStream 등)
+    페이지가 올 때마다 바로 저장하고 (메모리에는 지금 페이지 하나와 본 상품 코드만 남음),
+    카테고리의 마지막 페이지(page_no == max_page_no)가 오면 그 카테고리만 retire 한다.
+    중간에 실패한 카테고리는 마지막 페이지가 오지 않으므로 retire 하지 않는다.
+    카테고리별 집계를 반환한다.
+    """
+    from .rec_cache import bump_catalogue_version
+
+    ingestor = ProductIngestor(force=force)
+    try:
+        for page in pages:
+            ingestor.write_page(page.product_type, page.result)
+            if page.page_no >= page.max_page_no:
+                ingestor.finish_category(page.product_type)
+    finally:
+        # 중간에 실패해도 이미 저장된 카테고리가 있으면 추천 캐시 무효화
+        if ingestor.touched:
+            bump_catalogue_version()
+    return ingestor.report
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from products import catalogue
+from products.models import Product, ProductOption
+
+
+def hot_queries():
+    # (이름, 쿼리셋) - product_list / 수집 / ai 추천에서 실제로 쓰는 필터·정렬 패턴
+    product = Product.objects.order_by('pk').first()
+    product_id = product.pk if product else 0
+    return [
+        ('product_list: type', catalogue.list_products(product_type='deposit')),
+        ('product_list: type + bank', catalogue.list_products(product_type='deposit', bank='우리은행')),
+        ('product_list: loan types', catalogue.list_products(product_type='loan')),
+        ('product_list: bank only', catalogue.list_products(bank='우리은행')),
+        ('product_list: type + term', catalogue.list_products(product_type='saving', term='12')),
+        ('ingest: option key', ProductOption.objects.filter(
+            product_id=product_id, save_trm=12, intr_rate_type_nm='단리')),
+        ('options by term', ProductOption.objects.filter(save_trm=12)),
+        ('ai_recommend: candidates', catalogue.ai_candidates(limit=100)),
+        ('ai_recommend: candidates by type', catalogue.ai_candidates(limit=15, product_types=['deposit'])),
+    ]
+
+
+def full_scans(plan):
+    # SQLite: "SCAN <table>" 인데 인덱스를 안 타는 줄만 풀스캔으로 본다
+    scans = []
+    for line in plan.splitlines():
+        text = line.strip()
+        if ' SCAN ' in f" {text} " and 'INDEX' not in text:
+            scans.append(text)
+    return scans
+
+
+class Command(BaseCommand):
+    help = '상품 카탈로그 핫 쿼리들의 실행 계획을 확인해서 테이블 풀스캔이 없는지 점검'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plan', action='store_true', help='전체 실행 계획 출력')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('현재는 SQLite 실행 계획만 해석할 수 있습니다.')
+
+        failed = []
+        for name, queryset in hot_queries():
+            plan = queryset.explain()
+            scans = full_scans(plan)
+            if scans:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f"[SCAN] {name}: {' / '.join(scans)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[OK]   {name}"))
+            if options['verbose_plan']:
+                self.stdout.write(plan)
+
+        if failed:
+            raise CommandError(f"풀스캔 쿼리 {len(failed)}개: {', '.join(failed)}")
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from animals.data import ANIMALS
+from products import catalogue
+from products.prompts import candidate_types, estimate_tokens, recommend_messages, render_candidates, risk_level
+from products.rec_cache import catalogue_version
+from products.views import RECOMMEND_MODEL
+from services import ai_client
+
+
+def legacy_candidate_tokens():
+    # 예전 방식: 후보 100개를 설명(etc_note[:50])까지 붙인 글머리표로 나열
+    lines = [
+        f"- 상품명: {p.fin_prdt_nm}, 금융사: {p.kor_co_nm}, 최고금리: {p.max_rate}%, 유형: {p.product_type}, 특징: {p.etc_note[:50]}"
+        for p in catalogue.ai_candidates(limit=100)
+    ]
+    return estimate_tokens('\n'.join(lines))
+
+
+def sample_results():
+    samples = [(key, {'animal': key, 'name': info['name'], 'stats': info['stats']}) for key, info in ANIMALS.items()]
+    samples.append(('ai-analyze', {'type': '안정형', 'score': 40, 'advice': '분산 투자'}))
+    return samples
+
+
+class Command(BaseCommand):
+    help = 'AI 추천 프롬프트 크기(토큰 추정)와 생성 시간, --call 이면 실제 응답 지연까지 측정'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--call', action='store_true', help='GMS_BASE_URL 로 실제 추천 요청을 보내 end-to-end 지연 측정')
+
+    def handle(self, *args, **options):
+        legacy = legacy_candidate_tokens()
+        for name, analysis_result in sample_results():
+            render_candidates.cache_clear()
+            started = time.perf_counter()
+            messages = recommend_messages(analysis_result)
+            cold = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            recommend_messages(analysis_result)
+            warm = (time.perf_counter() - started) * 1000
+
+            table, rows = render_candidates(catalogue_version(), candidate_types(analysis_result))
+            tokens = sum(estimate_tokens(m['content']) for m in messages)
+            line = (
+                f"{name:10} 위험={risk_level(analysis_result):4} 후보={rows:3}개 "
+                f"후보표 토큰≈{estimate_tokens(table):5} (기존 목록≈{legacy:5}) 전체 토큰≈{tokens:5} "
+                f"생성 {cold:.1f}ms / 캐시 {warm:.2f}ms"
+            )
+
+            if options['call']:
+                started = time.perf_counter()
+                ai_client.chat(RECOMMEND_MODEL, messages, response_format={"type": "json_object"})
+                line += f" / 응답 {time.perf_counter() - started:.2f}s"
+            self.stdout.write(line)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from products.worker import get_jobs, run_due_jobs, run_forever, worker_id
+
+
+class Command(BaseCommand):
+    help = '금융상품 / ETF / 시장 데이터를 주기적으로 수집하는 백그라운드 워커'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='주기가 된 작업만 한 번 실행하고 종료')
+        parser.add_argument('--force', action='store_true', help='--once 와 함께: 주기와 상관없이 전부 실행')
+        parser.add_argument('--only', nargs='+', choices=list(get_jobs()), help='실행할 작업만 지정')
+        parser.add_argument('--tick', type=int, default=30, help='스케줄 확인 간격 (초)')
+
+    def handle(self, *args, **options):
+        if not options['once']:
+            run_forever(tick=options['tick'], only=options['only'])
+            return
+
+        ran = run_due_jobs(worker_id(), only=options['only'], force=options['force'])
+        if ran is None:
+            self.stdout.write(self.style.WARNING('다른 워커가 수집 중이라 건너뜀'))
+        elif not ran:
+            self.stdout.write('실행할 작업 없음')
+        else:
+            for name, status in ran.items():
+                self.stdout.write(f"{name}: {status}")
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def backfill_summaries(apps, schema_editor):
+    # 기존 상품들의 요약 행을 한 번에 채워둔다 (이후로는 수집/토글 때 갱신)
+    Product = apps.get_model('products', 'Product')
+    ProductOption = apps.get_model('products', 'ProductOption')
+    ProductSummary = apps.get_model('products', 'ProductSummary')
+
+    terms = {}
+    for product_id, save_trm in ProductOption.objects.exclude(save_trm=None).values_list('product_id', 'save_trm').distinct():
+        terms.setdefault(product_id, []).append(save_trm)
+
+    rows = Product.objects.annotate(
+        best_rate=Max('options__intr_rate2'),
+        worst_rate=Min('options__intr_rate'),
+        best_amt=Max('options__intr_rate'),
+        join_count=Count('join_users', distinct=True),
+        like_count=Count('like_users', distinct=True),
+    ).values('pk', 'best_rate', 'worst_rate', 'best_amt', 'join_count', 'like_count')
+
+    ProductSummary.objects.bulk_create([
+        ProductSummary(
+            product_id=row['pk'],
+            best_rate=row['best_rate'],
+            worst_rate=row['worst_rate'],
+            best_amt=row['best_amt'],
+            terms=sorted(terms.get(row['pk'], [])),
+            join_count=row['join_count'],
+            like_count=row['like_count'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_syncjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='products.product')),
+                ('best_rate', models.FloatField(blank=True, db_index=True, null=True)),
+                ('worst_rate', models.FloatField(blank=True, db_index=True, null=True)),
+                ('best_amt', models.FloatField(blank=True, db_index=True, null=True)),
+                ('terms', models.JSONField(blank=True, default=list)),
+                ('join_count', models.IntegerField(db_index=True, default=0)),
+                ('like_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
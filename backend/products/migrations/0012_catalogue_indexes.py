@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_productsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['product_type', 'kor_co_nm'], name='product_type_bank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['kor_co_nm'], name='product_bank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoption',
+            index=models.Index(fields=['product', 'save_trm', 'intr_rate_type_nm'], name='option_product_term_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoption',
+            index=models.Index(fields=['save_trm'], name='option_save_trm_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_description_user_profile_img'),
+        ('products', '0012_catalogue_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCacheVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
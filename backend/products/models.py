@@ -29,6 +29,10 @@ class Product(models.Model):
 
     mtrt_int = models.TextField(null=True, blank=True)    
     max_limit = models.BigIntegerField(null=True, blank=True) 
+
+    # 증분 동기화용: 업스트림 레코드 해시 / 업스트림에서 사라지면 False (삭제 대신 숨김)
+    content_hash = models.CharField(max_length=40, default='', blank=True)
+    is_active = models.BooleanField(default=True)
     
     # 가입한 유저
     join_users = models.ManyToManyField(
@@ -44,6 +48,14 @@ class Product(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [
+            # product_list: type (+ bank) 필터, ai 추천 후보 유형 필터
+            models.Index(fields=['product_type', 'kor_co_nm'], name='product_type_bank_idx'),
+            # product_list: 유형 없이 은행만 필터
+            models.Index(fields=['kor_co_nm'], name='product_bank_idx'),
+        ]
+
     def __str__(self):
         return f"[{self.get_product_type_display()}] {self.fin_prdt_nm}"
 
@@ -64,6 +76,17 @@ class ProductOption(models.Model):
 
     etc_info = models.JSONField(default=dict, blank=True)
 
+    # 증분 동기화용 업스트림 레코드 해시
+    content_hash = models.CharField(max_length=40, default='', blank=True)
+
+    class Meta:
+        indexes = [
+            # 옵션 고유키 조회 (수집 시 상품+기간+금리유형) / 상품별 기간 필터(EXISTS)
+            models.Index(fields=['product', 'save_trm', 'intr_rate_type_nm'], name='option_product_term_type_idx'),
+            # 기간만으로 필터 (term 파라미터)
+            models.Index(fields=['save_trm'], name='option_save_trm_idx'),
+        ]
+
     def __str__(self):
         return f"{self.product.fin_prdt_nm} - {self.intr_rate_type_nm}"
 
@@ -76,4 +99,49 @@ class UserPortfolio(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.user.username}의 분석 기록"
\ No newline at end of file
+        return f"{self.user.username}의 분석 기록"
+
+# 4. [신규] 백그라운드 수집 작업 상태 + 워커 락
+class SyncJob(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    # 락: locked_until 이 지나면 (워커가 죽었어도) 다른 워커가 가져갈 수 있음
+    locked_by = models.CharField(max_length=100, default='', blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    last_started_at = models.DateTimeField(null=True, blank=True)
+    last_finished_at = models.DateTimeField(null=True, blank=True)
+    last_status = models.CharField(max_length=20, default='', blank=True)
+    last_result = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.last_status})"
+
+
+# 5. [신규] 상품별 금리 요약 (목록 정렬용 비정규화 테이블)
+# 수집(ingest)과 가입/찜 토글 때 갱신 -> 목록 조회 시 GROUP BY 없이 정렬 가능
+class ProductSummary(models.Model):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+
+    best_rate = models.FloatField(null=True, blank=True, db_index=True)   # Max(intr_rate2): 예적금 최고 우대금리 / ETF 배당률
+    worst_rate = models.FloatField(null=True, blank=True, db_index=True)  # Min(intr_rate): 대출 최저금리
+    best_amt = models.FloatField(null=True, blank=True, db_index=True)    # Max(intr_rate): 연금 수령액 / ETF 수익률
+    terms = models.JSONField(default=list, blank=True)                    # 가입 기간(개월) 목록
+
+    join_count = models.IntegerField(default=0, db_index=True)  # 인기순 정렬용
+    like_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product.fin_prdt_nm} 요약"
+
+
+# 6. [신규] 유저별 추천 캐시 버전
+# 가입/찜/프로필 수정 때 +1 -> 추천 캐시 키가 바뀌어서 모든 프로세스의 캐시가 같이 무효화됨
+class UserCacheVersion(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    version = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
@@ -0,0 +1,107 @@
+# backend/products/name_index.py
+# ------------------------------------------------------
+# AI 추천 결과의 상품명 -> 상품 연결용 메모리 인덱스
+# - 정확히 같은 이름 -> 정규화(공백/기호/대소문자 무시)한 이름 -> 트라이그램 유사도 순서로 찾음
+#   (fin_prdt_nm__contains 처럼 LIKE 풀스캔을 하지 않고, "예금" 같은 짧은 이름이
+#    엉뚱한 상품에 걸리거나 띄어쓰기가 달라서 못 찾는 문제도 줄임)
+# - 상품 수집으로 카탈로그 버전이 바뀌면 다음 조회 때 다시 만듦
+# ------------------------------------------------------
+from collections import Counter
+import re
+import threading
+import unicodedata
+
+from .models import Product
+from .rec_cache import catalogue_version
+
+# 트라이그램 유사도(Dice 계수)가 이 값 이상이어야 같은 상품으로 봄
+FUZZY_THRESHOLD = 0.6
+
+_NOISE = re.compile(r'[\s\-_·.,()\[\]/\'"]+')
+
+
+def normalize_name(name):
+    return _NOISE.sub('', unicodedata.normalize('NFKC', name or '').lower())
+
+
+def trigrams(text):
+    padded = f"^{text}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+
+    def build(self, version):
+        rows = Product.objects.filter(is_active=True).order_by('pk').values_list(
+            'pk', 'fin_prdt_cd', 'fin_prdt_nm', 'kor_co_nm'
+        )
+        products, exact, normal, grams, sizes = {}, {}, {}, {}, {}
+        for pk, code, name, bank in rows:
+            products[pk] = (code, name, bank)
+            exact.setdefault(name, []).append(pk)
+            key = normalize_name(name)
+            normal.setdefault(key, []).append(pk)
+            product_grams = trigrams(key)
+            sizes[pk] = len(product_grams)
+            for gram in product_grams:
+                grams.setdefault(gram, []).append(pk)
+
+        with self._lock:
+            self.products, self.exact, self.normal, self.grams, self.sizes = products, exact, normal, grams, sizes
+            self.version = version
+
+    def ensure_current(self):
+        version = catalogue_version()
+        if version != self.version:
+            self.build(version)
+
+    def _pick(self, pks, bank):
+        # 같은 이름의 상품이 여러 금융사에 있으면 bank 힌트로 고름
+        if bank and len(pks) > 1:
+            bank_key = normalize_name(bank)
+            for pk in pks:
+                product_bank = normalize_name(self.products[pk][2])
+                if bank_key in product_bank or product_bank in bank_key:
+                    return pk
+        return pks[0]
+
+    def resolve(self, name, bank=None):
+        """상품명으로 pk 찾기 (못 찾으면 None)"""
+        if not name:
+            return None
+        if name in self.exact:
+            return self._pick(self.exact[name], bank)
+
+        key = normalize_name(name)
+        if key in self.normal:
+            return self._pick(self.normal[key], bank)
+
+        query = trigrams(key)
+        common = Counter(pk for gram in query for pk in self.grams.get(gram, ()))
+        best, best_score = None, 0
+        for pk, count in common.items():
+            score = 2 * count / (len(query) + self.sizes[pk])
+            if score < FUZZY_THRESHOLD:
+                continue
+            # 점수가 같으면 pk 가 작은 상품 (정확/정규화 일치와 같은 기준)
+            if best is None or score > best_score or (score == best_score and pk < best):
+                best, best_score = pk, score
+        return best
+
+    def match(self, item):
+        """AI 응답 항목 하나 -> pk (후보 표의 id 가 있으면 그대로, 없으면 이름으로)"""
+        raw_id = str(item.get('id', ''))
+        if raw_id.isdigit() and int(raw_id) in self.products:
+            return int(raw_id)
+        return self.resolve(item.get('name'), item.get('bank'))
+
+
+_index = NameIndex()
+
+
+def get_name_index():
+    _index.ensure_current()
+    return _index
@@ -0,0 +1,152 @@
+# backend/products/prompts.py
+# ------------------------------------------------------
+# ai_recommend_product 프롬프트 만들기
+# - 분석 결과(위험 성향, 원하는 상품 유형)에 맞지 않는 후보는 미리 제외
+# - 후보는 "id|유형|금융사|상품명|최고금리" 표 형식으로 압축 (etc_note 같은 긴 설명은 뺌)
+#   ETF 는 미리 계산된 변동성/최대 낙폭 열을 추가
+# - 토큰 예산 안에서만 후보를 채움
+# - 렌더링한 후보 표는 카탈로그 버전별로 캐시 (수집 전까지 같은 표 재사용)
+# ------------------------------------------------------
+from functools import lru_cache
+import json
+
+from django.conf import settings
+
+from animals.data import ANIMALS
+from services.analytics import symbol_metrics
+
+from . import catalogue
+from .rec_cache import catalogue_version
+
+# 후보 표에 쓸 수 있는 토큰 수 (대략치)
+CANDIDATE_TOKEN_BUDGET = getattr(settings, 'AI_CANDIDATE_TOKEN_BUDGET', 1500)
+# 한 유형이 후보를 독차지하지 않도록 유형별 최대 개수
+PER_TYPE_LIMIT = 15
+
+TYPE_LABELS = {
+    'deposit': '예금',
+    'saving': '적금',
+    'annuity': '연금',
+    'etf': 'ETF',
+    'mortgage': '주담대',
+    'rent': '전세대출',
+    'credit': '신용대출',
+}
+
+# 위험 성향별 추천 대상 유형 (앞쪽일수록 우선)
+RISK_TYPES = {
+    'low': ('deposit', 'saving', 'annuity'),
+    'mid': ('deposit', 'saving', 'annuity', 'etf'),
+    'high': ('etf', 'annuity', 'saving', 'deposit'),
+}
+
+
+def estimate_tokens(text):
+    # 토크나이저 없이 대충 계산: 한글 등 비 ASCII 는 글자당 1토큰, ASCII 는 4글자당 1토큰
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii) // 4 + 1
+
+
+def risk_level(analysis_result):
+    """분석 결과에서 low / mid / high 위험 성향 추출 (설문 결과, AI 분석 결과 둘 다 지원)"""
+    if not isinstance(analysis_result, dict):
+        return 'mid'
+
+    stats = analysis_result.get('stats') or ANIMALS.get(analysis_result.get('animal'), {}).get('stats') or {}
+    score = stats.get('위험감수')
+    if score is None:
+        # ai_analyze_user 결과: {'type': '안정형', 'score': 40, ...}
+        label = str(analysis_result.get('type', ''))
+        if any(word in label for word in ('안정', '보수', '저축')):
+            return 'low'
+        if any(word in label for word in ('공격', '적극', '고위험')):
+            return 'high'
+        score = analysis_result.get('score')
+
+    try:
+        score = float(score)
+    except (TypeError, ValueError):
+        return 'mid'
+    if score < 35:
+        return 'low'
+    if score < 70:
+        return 'mid'
+    return 'high'
+
+
+def candidate_types(analysis_result):
+    # 분석 결과에 원하는 유형이 명시돼 있으면 그것만, 아니면 위험 성향 기준
+    wanted = analysis_result.get('product_type') if isinstance(analysis_result, dict) else None
+    if isinstance(wanted, str):
+        wanted = [wanted]
+    if wanted:
+        types = tuple(t for t in wanted if t in TYPE_LABELS)
+        if types:
+            return types
+    return RISK_TYPES[risk_level(analysis_result)]
+
+
+def risk_column(product):
+    # ETF 는 미리 계산된 1년 변동성/최대 낙폭을 붙임 (계산 없이 조회만)
+    if product.product_type != 'etf':
+        return ''
+    metrics = symbol_metrics(product.fin_prdt_cd)
+    if not metrics or metrics['volatility'] is None:
+        return ''
+    return f"|{metrics['volatility']:.0f}/{metrics['max_drawdown']:.0f}"
+
+
+@lru_cache(maxsize=32)
+def render_candidates(version, product_types, budget=CANDIDATE_TOKEN_BUDGET):
+    """
+    후보 표 문자열과 들어간 상품 수를 반환 (version 은 캐시 키 용도)
+    유형별로 금리 높은 순서를 번갈아 섞어서 예산이 모자라도 유형이 골고루 들어가게 함
+    """
+    # 유형별로 금리 상위 PER_TYPE_LIMIT 개씩 (유형마다 best_rate 인덱스로 LIMIT 조회)
+    by_type = {
+        t: [
+            f"{p.pk}|{TYPE_LABELS[t]}|{p.kor_co_nm}|{p.fin_prdt_nm}|{p.max_rate:g}{risk_column(p)}"
+            for p in catalogue.ai_candidates(limit=PER_TYPE_LIMIT, product_types=[t])
+        ]
+        for t in product_types
+    }
+
+    lines = ['id|유형|금융사|상품명|최고금리(%)|변동성/최대낙폭(%, ETF만)']
+    used = estimate_tokens(lines[0])
+    for rank in range(PER_TYPE_LIMIT):
+        for t in product_types:
+            if rank >= len(by_type[t]):
+                continue
+            line = by_type[t][rank]
+            cost = estimate_tokens(line)
+            if used + cost > budget:
+                return '\n'.join(lines), len(lines) - 1
+            lines.append(line)
+            used += cost
+    return '\n'.join(lines), len(lines) - 1
+
+
+SYSTEM_INSTRUCTION = """너는 대한민국 최고의 자산관리사(CFA)이자 금융 분석 전문가야.
+사용자의 분석 결과와 후보 상품 표를 대조해서 가장 수익률이 높고 적합한 상품 5개를 추천해줘.
+규칙:
+1. 추천 이유(reason)에 구체적인 수치(금리 %, 수익률 %, 자산 대비 비율 등)를 포함할 것.
+2. 타 상품이나 시장 평균 대비 장점을 비교해서 언급할 것.
+3. 사용자의 투자 성향과 상품의 위험도를 논리적으로 연결할 것.
+4. 사용자의 상황을 간단히 브리핑 할 것.
+5. 답변은 순수한 JSON 으로만 할 것."""
+
+
+def recommend_messages(analysis_result):
+    types = candidate_types(analysis_result)
+    table, _ = render_candidates(catalogue_version(), types)
+
+    user_prompt = (
+        f"[사용자 분석 결과]\n{json.dumps(analysis_result, ensure_ascii=False, separators=(',', ':'))}\n\n"
+        f"[후보 상품]\n{table}\n\n"
+        '다음 JSON 형식으로 5개 추천 (id 는 표의 id 그대로):\n'
+        '{"recommendations":[{"id":상품id,"name":"정확한 상품명","reason":"수치를 포함한 구체적인 추천 이유 (2문장 이상)"}]}'
+    )
+    return [
+        {"role": "system", "content": SYSTEM_INSTRUCTION},
+        {"role": "user", "content": user_prompt},
+    ]
@@ -0,0 +1,147 @@
+# backend/products/rec_cache.py
+# ------------------------------------------------------
+# 추천 결과 캐시 (LRU + TTL, 프로세스 메모리)
+# - 키: (추천 종류, 유저 id, 카탈로그 버전, 유저 버전, ...) -> 유저/상품이 그대로면 다시 계산하지 않음
+# - 가입/찜/프로필 수정 시 그 유저의 버전(UserCacheVersion)을 올려서 그 유저의 항목만 무효화
+# - 상품 수집(finlife/ETF)은 카탈로그 버전을 올려서 모든 항목을 자연스럽게 무효화
+#   (두 버전 모두 DB 에 있으므로 다른 웹 프로세스/워커에서 바뀌어도 반영됨)
+# - 카탈로그 버전은 요청마다 읽히므로 프로세스 메모리에 두고 VERSION_CHECK_SECONDS 마다만 DB 확인
+#   -> 다른 프로세스(워커)의 수집은 최대 그만큼 늦게 반영, 같은 프로세스에서 올리면 바로 반영
+# - 이웃 유저의 가입은 내 버전을 올리지 않음 -> 협업 필터링 추천(recommend)은
+#   이웃의 새 가입을 TTL(RECOMMEND_CACHE_TTL) 동안 반영하지 않을 수 있음
+# - hit / miss / eviction 카운터로 크기 조정
+# ------------------------------------------------------
+from collections import OrderedDict
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SyncJob, UserCacheVersion
+
+CATALOGUE_VERSION_NAME = 'catalogue-version'
+VERSION_CHECK_SECONDS = 5
+
+_catalogue_lock = threading.Lock()
+_catalogue = {'version': '', 'checked_at': None}  # 마지막으로 읽은 카탈로그 버전과 확인 시각(monotonic)
+
+
+def catalogue_version():
+    """상품 데이터가 마지막으로 바뀐 시각 (수집 전이면 빈 문자열)"""
+    now = time.monotonic()
+    with _catalogue_lock:
+        if _catalogue['checked_at'] is not None and now - _catalogue['checked_at'] < VERSION_CHECK_SECONDS:
+            return _catalogue['version']
+
+    changed_at = SyncJob.objects.filter(name=CATALOGUE_VERSION_NAME).values_list('last_finished_at', flat=True).first()
+    version = changed_at.isoformat() if changed_at else ''
+    with _catalogue_lock:
+        _catalogue.update(version=version, checked_at=now)
+    return version
+
+
+def bump_catalogue_version():
+    changed_at = timezone.now()
+    SyncJob.objects.update_or_create(
+        name=CATALOGUE_VERSION_NAME,
+        defaults={'last_finished_at': changed_at, 'last_status': 'success'},
+    )
+    # 이 프로세스는 확인 주기를 기다리지 않고 바로 새 버전을 씀
+    with _catalogue_lock:
+        _catalogue.update(version=changed_at.isoformat(), checked_at=time.monotonic())
+
+
+def user_version(user_id):
+    return UserCacheVersion.objects.filter(pk=user_id).values_list('version', flat=True).first() or 0
+
+
+def bump_user_version(user_id):
+    if UserCacheVersion.objects.filter(pk=user_id).update(version=F('version') + 1):
+        return
+    _, created = UserCacheVersion.objects.get_or_create(user_id=user_id, defaults={'version': 1})
+    if not created:
+        # 다른 요청이 먼저 행을 만들었으면 그 위에 한 번 더 올림
+        UserCacheVersion.objects.filter(pk=user_id).update(version=F('version') + 1)
+
+
+class RecommendationCache:
+    def __init__(self, maxsize=1024, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (만료 시각, 값)
+        self._by_user = {}          # user_id -> {key, ...}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._by_user.setdefault(key[1], set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        del self._data[key]
+        keys = self._by_user.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[1]]
+
+    def invalidate_user(self, user_id):
+        """DB 의 유저 버전을 올리고(다른 프로세스용) 이 프로세스의 항목은 바로 삭제"""
+        bump_user_version(user_id)
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 3) if total else None,
+            }
+
+
+_cache = RecommendationCache(
+    maxsize=getattr(settings, 'RECOMMEND_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'RECOMMEND_CACHE_TTL', 600),
+)
+
+
+def get_rec_cache():
+    return _cache
+
+
+def cache_key(kind, user, *extra):
+    return (kind, user.pk, catalogue_version(), user_version(user.pk), *extra)
@@ -0,0 +1,170 @@
+# backend/products/recommender.py
+# ------------------------------------------------------
+# [F09] 기본 추천 알고리즘 - 협업 필터링 엔진 (NumPy)
+# - 유저 x 상품 가입 행렬을 COO 희소 배열(rows, cols)로 메모리에 보관
+# - 비슷한 유저는 프로필 최근접 이웃 인덱스(accounts/neighbours.py)에서 top-k 로 가져옴
+# - 공동 가입 횟수 집계, 코사인 가중치를 전부 배열 연산으로 처리 -> 파이썬 루프가 없음
+# - join_product 토글 시 행렬을 통째로 다시 만들지 않고 해당 칸만 갱신
+# ------------------------------------------------------
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+import numpy as np
+
+from accounts.neighbours import get_user_index
+from .models import Product
+
+# 점수 계산에 쓰는 비슷한 유저 수
+NEIGHBOURS = 50
+
+# 다른 프로세스(워커)에서 생긴 변경도 결국 반영되도록 주기적으로 DB 에서 다시 읽음
+REBUILD_SECONDS = getattr(settings, 'RECOMMENDER_REBUILD_SECONDS', 600)
+
+
+class JoinMatrix:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built_at = None
+
+    # ------------------------------------------------------
+    # 구축
+    # ------------------------------------------------------
+    def build(self):
+        User = get_user_model()
+        users = list(User.objects.values_list('id', flat=True))
+        joins = list(Product.join_users.through.objects.values_list('user_id', 'product_id'))
+
+        with self._lock:
+            self.user_rows = {user_id: row for row, user_id in enumerate(users)}
+
+            product_ids = sorted({product_id for _, product_id in joins})
+            self.product_cols = {product_id: col for col, product_id in enumerate(product_ids)}
+            self.product_ids = np.array(product_ids, dtype=np.int64)
+
+            self.rows = np.array([self.user_rows[u] for u, _ in joins], dtype=np.int64)
+            self.cols = np.array([self.product_cols[p] for _, p in joins], dtype=np.int64)
+            self.alive = np.ones(len(joins), dtype=bool)
+            self._pending = []
+            self._degree = None
+            self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        with self._lock:
+            if self.built_at is None or time.monotonic() - self.built_at > REBUILD_SECONDS:
+                self.build()
+
+    # ------------------------------------------------------
+    # 증분 갱신
+    # ------------------------------------------------------
+    def _user_row(self, user_id):
+        row = self.user_rows.get(user_id)
+        if row is None:
+            row = len(self.user_rows)
+            self.user_rows[user_id] = row
+        return row
+
+    def _product_col(self, product_id):
+        col = self.product_cols.get(product_id)
+        if col is None:
+            col = len(self.product_cols)
+            self.product_cols[product_id] = col
+            self.product_ids = np.append(self.product_ids, product_id)
+        return col
+
+    def toggle_join(self, user, product_id, joined):
+        """join_product 토글 결과를 행렬의 한 칸에만 반영"""
+        with self._lock:
+            if self.built_at is None:
+                return
+            row = self._user_row(user.pk)
+            col = self._product_col(product_id)
+            self._flush()
+            hit = self.alive & (self.rows == row) & (self.cols == col)
+            self._degree = None
+            if joined:
+                if not hit.any():
+                    self._pending.append((row, col))
+            else:
+                self.alive[hit] = False
+                # 지워진 칸이 절반을 넘으면 배열 압축
+                if (~self.alive).sum() * 2 > len(self.alive):
+                    self.rows, self.cols = self.rows[self.alive], self.cols[self.alive]
+                    self.alive = np.ones(len(self.rows), dtype=bool)
+
+    def _flush(self):
+        if self._pending:
+            new = np.array(self._pending, dtype=np.int64)
+            self.rows = np.concatenate([self.rows, new[:, 0]])
+            self.cols = np.concatenate([self.cols, new[:, 1]])
+            self.alive = np.concatenate([self.alive, np.ones(len(new), dtype=bool)])
+            self._pending = []
+            self._degree = None
+
+    def _live(self):
+        # 지워진 칸이 없으면 복사 없이 그대로 사용
+        if self.alive.all():
+            return self.rows, self.cols
+        return self.rows[self.alive], self.cols[self.alive]
+
+    def _user_degree(self, rows, n_users):
+        # 유저별 가입 수 (행렬이 바뀔 때만 다시 계산)
+        if self._degree is None or len(self._degree) != n_users:
+            self._degree = np.bincount(rows, minlength=n_users)
+        return self._degree
+
+    # ------------------------------------------------------
+    # 추천
+    # ------------------------------------------------------
+    def neighbour_mask(self, neighbour_ids, n_users):
+        mask = np.zeros(n_users, dtype=bool)
+        mask[[self.user_rows[u] for u in neighbour_ids if u in self.user_rows]] = True
+        return mask
+
+    def recommend(self, user, k=5):
+        """비슷한 유저들이 많이 가입한 상품 중 내가 가입하지 않은 상품 pk 목록 (점수 높은 순)"""
+        self.ensure_built()
+        neighbour_ids = get_user_index().nearest(user, k=NEIGHBOURS)
+        with self._lock:
+            self._flush()
+            row = self._user_row(user.pk)
+            n_users = len(self.user_rows)
+            n_products = len(self.product_cols)
+            if n_products == 0:
+                return []
+
+            nb_mask = self.neighbour_mask(neighbour_ids, n_users)
+            rows, cols = self._live()
+
+            picked = nb_mask[rows]
+            nb_rows, nb_cols = rows[picked], cols[picked]
+            if nb_cols.size == 0:
+                return []
+
+            # 기본 점수: 이웃들의 공동 가입 횟수 (기존 로직과 동일)
+            # 내가 가입한 상품이 있으면 나와 취향이 겹치는 이웃(코사인 유사도)에 가중치를 더 줌
+            my_items = cols[rows == row]
+            if my_items.size:
+                overlap = np.bincount(nb_rows, weights=np.isin(nb_cols, my_items), minlength=n_users)
+                degree = self._user_degree(rows, n_users)
+                similarity = overlap / np.sqrt(np.maximum(degree, 1) * my_items.size)
+                weights = 1.0 + similarity[nb_rows]
+            else:
+                weights = None
+
+            scores = np.bincount(nb_cols, weights=weights, minlength=n_products)
+            # 이미 가입한 상품은 top-k 를 고르기 전에 제외
+            scores[my_items] = 0
+
+            # 점수 내림차순, 동점이면 상품 pk 오름차순
+            order = np.lexsort((self.product_ids, -scores))
+            order = order[scores[order] > 0][:k]
+            return [int(pk) for pk in self.product_ids[order]]
+
+
+_matrix = JoinMatrix()
+
+
+def get_recommender():
+    return _matrix
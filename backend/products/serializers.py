@@ -4,7 +4,8 @@ from .models import Product, ProductOption
 class ProductOptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductOption
-        fields = '__all__'
+        # content_hash 는 수집 때 변경 여부를 비교하는 내부용 값이라 내보내지 않음
+        exclude = ('content_hash',)
         read_only_fields = ('product',) # 상품에 종속된 거라 읽기 전용
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -12,7 +13,27 @@ class ProductSerializer(serializers.ModelSerializer):
     # source='productoption_set'은 삭제해야 합니다.
     # 필드명(options)과 related_name(options)이 같으면 source를 안 써도 됩니다.
     options = ProductOptionSerializer(many=True, read_only=True)
+
+    # catalogue.with_related() 에서 annotate 한 로그인 유저 기준 찜/가입 여부
+    is_liked = serializers.SerializerMethodField()
+    is_joined = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
-        fields = '__all__'
\ No newline at end of file
+        # content_hash(수집 변경 비교용), is_active(목록에서 이미 걸러짐)는 내부용
+        exclude = ('content_hash', 'is_active')
+
+    def __init__(self, *args, **kwargs):
+        # fields=[...] 를 넘기면 그 필드만 직렬화 (목록 화면에서 options, etc_note 등 생략용)
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_is_liked(self, obj):
+        return bool(getattr(obj, 'is_liked', False))
+
+    def get_is_joined(self, obj):
+        return bool(getattr(obj, 'is_joined', False))
\ No newline at end of file
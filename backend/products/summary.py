@@ -0,0 +1,76 @@
+# backend/products/summary.py
+# ------------------------------------------------------
+# ProductSummary 갱신
+# - 수집 직후: 바뀐 상품들만 GROUP BY 한 번으로 다시 계산해서 upsert
+# - 가입/찜 토글: through 행이 실제로 생기거나 지워졌을 때만 카운트를 F() 로 +1 / -1
+# ------------------------------------------------------
+from django.db.models import Count, F, Max, Min
+
+from .ingest import BULK_BATCH_SIZE
+from .models import Product, ProductOption, ProductSummary
+
+SUMMARY_FIELDS = ['best_rate', 'worst_rate', 'best_amt', 'terms', 'join_count', 'like_count']
+
+
+def refresh_summaries(product_ids=None):
+    """product_ids 가 None 이면 전체 상품을 다시 계산"""
+    products = Product.objects.all()
+    options = ProductOption.objects.all()
+    joins = Product.join_users.through.objects.all()
+    likes = Product.like_users.through.objects.all()
+
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        products = products.filter(pk__in=product_ids)
+        options = options.filter(product_id__in=product_ids)
+        joins = joins.filter(product_id__in=product_ids)
+        likes = likes.filter(product_id__in=product_ids)
+
+    summaries = {
+        pk: ProductSummary(product_id=pk, terms=[])
+        for pk in products.values_list('pk', flat=True)
+    }
+
+    rates = options.values('product_id').annotate(
+        best_rate=Max('intr_rate2'), worst_rate=Min('intr_rate'), best_amt=Max('intr_rate')
+    )
+    for row in rates:
+        summary = summaries.get(row['product_id'])
+        if summary:
+            summary.best_rate = row['best_rate']
+            summary.worst_rate = row['worst_rate']
+            summary.best_amt = row['best_amt']
+
+    for product_id, save_trm in options.exclude(save_trm=None).values_list('product_id', 'save_trm').distinct():
+        summary = summaries.get(product_id)
+        if summary:
+            summary.terms.append(save_trm)
+
+    for row in joins.values('product_id').annotate(count=Count('id')):
+        if row['product_id'] in summaries:
+            summaries[row['product_id']].join_count = row['count']
+
+    for row in likes.values('product_id').annotate(count=Count('id')):
+        if row['product_id'] in summaries:
+            summaries[row['product_id']].like_count = row['count']
+
+    for summary in summaries.values():
+        summary.terms.sort()
+
+    ProductSummary.objects.bulk_create(
+        summaries.values(),
+        batch_size=BULK_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=SUMMARY_FIELDS,
+    )
+    return len(summaries)
+
+
+def bump_count(product, field, delta):
+    """가입/찜 토글로 through 행이 실제로 바뀌었을 때 카운트만 조정 (요약 행이 없으면 새로 계산)"""
+    updated = ProductSummary.objects.filter(pk=product.pk).update(**{field: F(field) + delta})
+    if not updated:
+        refresh_summaries([product.pk])
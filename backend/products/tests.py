@@ -1,3 +1,691 @@
-from django.test import TestCase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+import numpy as np
+import pandas as pd
+from rest_framework.test import APIClient
+
+from accounts.neighbours import get_user_index
+
+from . import etf, finlife, rec_cache, worker
+from .catalogue import list_products, paginate, sort_key
+from .ingest import save_products
+from .models import Product, ProductOption, ProductSummary, SyncJob
+from .name_index import NameIndex
+from .prompts import CANDIDATE_TOKEN_BUDGET, estimate_tokens, recommend_messages, render_candidates
+from .rec_cache import (
+    RecommendationCache, bump_catalogue_version, bump_user_version, cache_key, catalogue_version, get_rec_cache,
+)
+from .recommender import get_recommender
+from .summary import refresh_summaries
+
+
+def make_products(count, product_type='deposit', start=0):
+    Product.objects.bulk_create([
+        Product(fin_prdt_cd=f"{product_type}-{i}", kor_co_nm=f"은행{i % 5}", fin_prdt_nm=f"테스트상품{i}", product_type=product_type)
+        for i in range(start, start + count)
+    ])
+    return list(Product.objects.filter(product_type=product_type).order_by('pk'))
+
+
+def sse_events(response):
+    """SSE 응답 -> [(event, data), ...]"""
+    body = b''.join(response.streaming_content).decode()
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class AIRecommendStreamTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='tester', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.products = make_products(3)
+        # 이름 인덱스가 이 테스트의 상품으로 다시 만들어지도록
+        bump_catalogue_version()
+
+    def stream(self, text, analysis_result):
+        chunks = [text[i:i + 5] for i in range(0, len(text), 5)]
+        # 스트리밍 응답은 읽을 때 생성되므로 patch 안에서 끝까지 읽음
+        with mock.patch('products.views.ai_client.stream_chat', return_value=iter(chunks)):
+            response = self.client.post('/api/products/ai-recommend/stream/', {'analysis_result': analysis_result}, format='json')
+            return sse_events(response)
+
+    def test_items_come_from_recommendations_array(self):
+        # 앞에 다른 배열(meta.tags)이 있어도 recommendations 원소만 꺼냄
+        text = json.dumps({
+            'meta': {'tags': ['a']},
+            'recommendations': [{'id': p.pk, 'reason': '금리 [높음]'} for p in self.products[:2]],
+        }, ensure_ascii=False)
+        events = self.stream(text, {'type': 'meta-first'})
+
+        self.assertEqual([data['id'] for event, data in events if event == 'item'], [p.pk for p in self.products[:2]])
+        self.assertEqual(events[-1], ('done', {'count': 2}))
+
+    def test_falls_back_to_full_parse(self):
+        # 키가 이스케이프로 쓰여 있으면 스트리밍 파서는 못 찾지만 마지막 전체 파싱으로 보냄
+        text = '{"recommend\\u0061tions": [{"id": %d}]}' % self.products[0].pk
+        events = self.stream(text, {'type': 'escaped-key'})
+
+        self.assertEqual([data['id'] for event, data in events if event == 'item'], [self.products[0].pk])
+        self.assertEqual(events[-1], ('done', {'count': 1}))
+
+    def test_fallback_skips_non_object_elements_already_streamed(self):
+        # 객체가 아닌 원소도 배열 위치로 세야 마지막 전체 파싱에서 같은 추천을 다시 보내지 않음
+        text = json.dumps({
+            'recommendations': ['참고', {'id': self.products[0].pk}, 3, {'id': self.products[1].pk}],
+        }, ensure_ascii=False)
+        events = self.stream(text, {'type': 'mixed-elements'})
+
+        self.assertEqual([data['id'] for event, data in events if event == 'item'], [p.pk for p in self.products[:2]])
+        self.assertEqual(events[-1], ('done', {'count': 2}))
+
+    def test_non_streaming_matches_each_item_once(self):
+        content = json.dumps({'recommendations': [
+            {'id': self.products[0].pk, 'reason': 'id'},
+            {'name': self.products[1].fin_prdt_nm, 'bank': self.products[1].kor_co_nm},
+            {'id': 0, 'name': '없는 상품'},
+        ]}, ensure_ascii=False)
+        with mock.patch('products.views.ai_client.chat', return_value=content), \
+                mock.patch.object(NameIndex, 'match', autospec=True, side_effect=NameIndex.match) as match:
+            response = self.client.post('/api/products/ai-recommend/', {'analysis_result': {'type': 'once'}}, format='json')
+
+        self.assertEqual([item['id'] for item in response.data], [p.pk for p in self.products[:2]])
+        self.assertEqual(match.call_count, 3)
+
+
+def finlife_page(product_type, codes, page_no=1, max_page_no=1):
+    result = {
+        'err_cd': '000',
+        'max_page_no': max_page_no,
+        'baseList': [{'fin_prdt_cd': code, 'kor_co_nm': '은행', 'fin_prdt_nm': f"상품 {code}"} for code in codes],
+        'optionList': [{'fin_prdt_cd': code, 'intr_rate': '3.0', 'intr_rate2': '3.5', 'save_trm': '12'} for code in codes],
+    }
+    return SimpleNamespace(product_type=product_type, result=result, page_no=page_no, max_page_no=max_page_no)
+
+
+def recorded_responses(product_type, pages, per_page=2):
+    """finlife 응답 JSON 을 페이지 수만큼 (상품 코드는 '<유형>-<페이지>-<순번>')"""
+    responses = []
+    for page_no in range(1, pages + 1):
+        codes = [f"{product_type}-{page_no}-{i}" for i in range(per_page)]
+        result = finlife_page(product_type, codes, page_no=page_no, max_page_no=pages).result
+        responses.append({'result': {**result, 'now_page_no': page_no}})
+    return responses
+
+
+class FinlifeStubHandler(BaseHTTPRequestHandler):
+    """server.recorded[엔드포인트 파일명][pageNo - 1] 를 그대로 돌려주는 finlife 스텁"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        page_no = int(parse_qs(url.query)['pageNo'][0])
+        with self.server.lock:
+            self.server.requests.append((os.path.basename(url.path), page_no))
+        data = json.dumps(self.server.recorded[os.path.basename(url.path)][page_no - 1]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class PageStreamTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FinlifeStubHandler)
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.recorded = {
+            finlife.ENDPOINTS['deposit'][0]: recorded_responses('deposit', 5),
+            finlife.ENDPOINTS['saving'][0]: recorded_responses('saving', 5),
+        }
+        override = self.settings(FINLIFE_BASE_URL=f"http://127.0.0.1:{self.server.server_port}", FINLIFE_API_KEY='test')
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_pages_arrive_in_order_per_category(self):
+        stream = finlife.PageStream(['deposit', 'saving'])
+        pages = {}
+        for page in stream:
+            pages.setdefault(page.product_type, []).append(page.page_no)
+            self.assertEqual(page.max_page_no, 5)
+            self.assertEqual(page.result['baseList'][0]['fin_prdt_cd'], f"{page.product_type}-{page.page_no}-0")
+
+        self.assertEqual(pages, {'deposit': [1, 2, 3, 4, 5], 'saving': [1, 2, 3, 4, 5]})
+        self.assertEqual(stream.errors, {})
+        self.assertEqual(stream.stats['deposit']['pages'], 5)
+
+    def test_slow_consumer_bounds_buffered_pages(self):
+        stream = finlife.PageStream(['deposit', 'saving'], max_buffered=2)
+        pages = iter(stream)
+        self.assertEqual(next(pages).page_no, 1)
+        # 소비자가 멈춰 있으면 꺼낸 1 + 큐(2) + 워커마다 넣으려고 기다리는 1 페이지까지만 받음 (전체 10)
+        time.sleep(0.3)
+        self.assertLessEqual(stream._queue.qsize(), 2)
+        self.assertLessEqual(len(self.server.requests), 1 + 2 + 2)
+
+        self.assertEqual(len(list(pages)), 9)
+        self.assertEqual(len(self.server.requests), 10)
+
+    def test_worker_error_reaches_consumer(self):
+        # 적금 3페이지에서 인증키 오류 응답
+        self.server.recorded[finlife.ENDPOINTS['saving'][0]][2] = {'result': {'err_cd': '010', 'err_msg': '미등록 인증키'}}
+        stream = finlife.PageStream(['deposit', 'saving'])
+        pages = {}
+        for page in stream:
+            pages.setdefault(page.product_type, []).append(page.page_no)
+
+        self.assertEqual(pages, {'deposit': [1, 2, 3, 4, 5], 'saving': [1, 2]})
+        self.assertIn('010', stream.errors['saving'])
+        self.assertNotIn('deposit', stream.errors)
+
+
+class IngestRetireTests(TestCase):
+    codes = ['A', 'B', 'C', 'D']
+
+    def setUp(self):
+        save_products([finlife_page('deposit', self.codes)])
+
+    def active_codes(self):
+        return set(Product.objects.filter(is_active=True).values_list('fin_prdt_cd', flat=True))
+
+    def test_missing_product_is_retired(self):
+        report = save_products([finlife_page('deposit', ['A', 'B', 'C'])])
+        self.assertEqual(self.active_codes(), {'A', 'B', 'C'})
+        self.assertEqual(report['deposit']['products']['retired'], 1)
+
+    def test_empty_base_list_retires_nothing(self):
+        report = save_products([finlife_page('deposit', [])])
+        self.assertEqual(self.active_codes(), set(self.codes))
+        self.assertIn('retire_skipped', report['deposit'])
+
+    def test_large_share_missing_retires_nothing(self):
+        report = save_products([finlife_page('deposit', ['A'])])
+        self.assertEqual(self.active_codes(), set(self.codes))
+        self.assertIn('retire_skipped', report['deposit'])
+
+    def test_error_envelope_raises(self):
+        # 인증키 오류 / 호출 한도 초과 응답: result 는 있지만 baseList 가 없음
+        response = mock.Mock()
+        response.json.return_value = {'result': {'err_cd': '010', 'err_msg': '미등록 인증키'}}
+        session = mock.Mock()
+        session.get.return_value = response
+
+        with self.assertRaises(ValueError):
+            finlife.fetch_page('deposit', session=session)
+
+
+class IngestTransactionTests(TestCase):
+    def setUp(self):
+        save_products([finlife_page('deposit', ['A', 'B', 'C', 'Z'])])
+
+    def active_codes(self):
+        return set(Product.objects.filter(is_active=True).values_list('fin_prdt_cd', flat=True))
+
+    def test_page_is_written_before_next_page_is_requested(self):
+        depth = len(connection.atomic_blocks)
+
+        def pages():
+            yield finlife_page('deposit', ['A', 'B', 'N'], page_no=1, max_page_no=2)
+            # 2페이지를 요청하는 시점: 1페이지는 이미 커밋됐고 열린 트랜잭션이 없음
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            self.assertTrue(Product.objects.filter(fin_prdt_cd='N').exists())
+            # 마지막 페이지 전이라 아직 안 보인 상품을 판매 종료하지 않음
+            self.assertEqual(self.active_codes(), {'A', 'B', 'C', 'Z', 'N'})
+            yield finlife_page('deposit', ['C'], page_no=2, max_page_no=2)
+
+        report = save_products(pages())
+        self.assertEqual(report['deposit']['pages'], 2)
+        self.assertEqual(self.active_codes(), {'A', 'B', 'C', 'N'})
+
+    def test_failed_category_keeps_written_pages_and_retires_nothing(self):
+        def pages():
+            yield finlife_page('deposit', ['A', 'N'], page_no=1, max_page_no=2)
+            raise ValueError('finlife 오류')
+
+        with self.assertRaises(ValueError):
+            save_products(pages())
+        self.assertEqual(self.active_codes(), {'A', 'B', 'C', 'Z', 'N'})
+
+
+class SaveProductsViewTests(TestCase):
+    url = '/api/products/save-deposit-products/'
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(username='member', password='pw'))
+        self.assertEqual(self.client.post(self.url).status_code, 403)
+
+    def test_conflict_while_ingest_running(self):
+        self.client.force_authenticate(get_user_model().objects.create_superuser(username='admin', password='pw'))
+        self.assertTrue(worker.acquire_lock('other-worker'))
+
+        with mock.patch('products.views.fetch_and_save_products') as fetch:
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 409)
+        fetch.assert_not_called()
+
+
+class LikeJoinCountTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='tester', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = make_products(1)[0]
+        refresh_summaries([self.product.pk])
+
+    def summary(self):
+        return ProductSummary.objects.get(pk=self.product.pk)
+
+    def test_toggle_counts_follow_through_rows(self):
+        url = f'/api/products/{self.product.pk}/like/'
+        self.assertTrue(self.client.post(url).data['is_liked'])
+        self.assertEqual(self.summary().like_count, 1)
+        self.assertFalse(self.client.post(url).data['is_liked'])
+        self.assertEqual(self.summary().like_count, 0)
+
+        url = f'/api/products/{self.product.pk}/join/'
+        for _ in range(3):
+            self.client.post(url)
+        self.assertEqual(self.summary().join_count, 1)
+        self.assertEqual(self.summary().join_count, self.product.join_users.count())
+
+    def test_concurrent_add_counts_once(self):
+        # 첫 요청이 찜을 추가한 직후, 같은 상태(찜 안 함)를 보고 들어온 두 번째 요청:
+        # 지울 행이 없었고(delete 0건) 추가하려는 행은 이미 있으므로 카운트를 올리지 않음
+        self.client.post(f'/api/products/{self.product.pk}/like/')
+        with mock.patch.object(QuerySet, 'delete', return_value=(0, {})):
+            response = self.client.post(f'/api/products/{self.product.pk}/like/')
+
+        self.assertTrue(response.data['is_liked'])
+        self.assertEqual(self.summary().like_count, 1)
+
+
+class QueryCountTests(TestCase):
+    """상품이 N 개일 때와 10N 개일 때 쿼리 수가 같은지 (N+1 쿼리 회귀 방지)"""
+    N = 5
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='me', password='pw', age=30, money=10 ** 7, salary=10 ** 7)
+        self.neighbours = [
+            User.objects.create_user(username=f'neighbour{i}', password='pw', age=30 + i, money=10 ** 7, salary=10 ** 7)
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def populate(self, count):
+        """상품을 count 개까지 늘림 (옵션 2개씩, 내가 전부 찜하고 절반 가입, 이웃들은 전부 가입)"""
+        start = Product.objects.count()
+        make_products(count - start, start=start)
+        products = list(Product.objects.order_by('pk'))[start:]
+        ProductOption.objects.bulk_create([
+            ProductOption(product=p, fin_prdt_cd=p.fin_prdt_cd, intr_rate_type_nm='단리', intr_rate=2.0, intr_rate2=3.0, save_trm=term)
+            for p in products for term in (6, 12)
+        ])
+        for i, product in enumerate(products):
+            product.like_users.add(self.user)
+            product.join_users.add(*self.neighbours)
+            if i % 2:
+                product.join_users.add(self.user)
+        refresh_summaries()
+        # 수집처럼 카탈로그 버전을 올림 (이 프로세스의 메모리 버전도 바로 바뀌어서 요청 중에는 DB 를 읽지 않음)
+        bump_catalogue_version()
+
+        # 메모리 인덱스/캐시는 이 테스트의 데이터로 다시 만들어둠 (쿼리 수는 요청 처리분만 셈)
+        get_user_index().build()
+        get_recommender().build()
+        get_rec_cache().clear()
+
+    def assert_constant_queries(self, expected, url, client=None):
+        for count in (self.N, 10 * self.N):
+            self.populate(count)
+            path = url() if callable(url) else url
+            with self.subTest(products=count), self.assertNumQueries(expected):
+                response = (client or self.client).get(path)
+            self.assertEqual(response.status_code, 200)
+
+    def test_product_list(self):
+        # 상품 1 + options 1 + join_users 1 + like_users 1
+        self.assert_constant_queries(4, '/api/products/')
+
+    def test_product_list_anonymous(self):
+        self.assert_constant_queries(4, '/api/products/', client=APIClient())
+
+    def test_product_list_fields(self):
+        # 관계 필드를 안 고르면 prefetch 없이 한 번
+        self.assert_constant_queries(1, '/api/products/?fields=id,fin_prdt_nm,kor_co_nm')
+
+    def test_product_list_cursor(self):
+        def next_page():
+            return f"/api/products/?limit=3&cursor={self.client.get('/api/products/?limit=3').data['next_cursor']}"
+        self.assert_constant_queries(4, next_page)
+
+    def test_product_detail(self):
+        self.assert_constant_queries(4, lambda: f'/api/products/{Product.objects.order_by("pk").first().pk}/')
+
+    def test_internal_fields_are_not_exposed(self):
+        self.populate(1)
+        data = self.client.get(f'/api/products/{Product.objects.get().pk}/').data
+        self.assertNotIn('content_hash', data)
+        self.assertNotIn('is_active', data)
+        self.assertNotIn('content_hash', data['options'][0])
+        self.assertIn('fin_prdt_nm', data)
+
+    def test_liked_list(self):
+        self.assert_constant_queries(4, '/api/products/liked-list/')
+
+    def test_joined_list(self):
+        self.assert_constant_queries(4, '/api/products/joined-list/')
+
+    def test_recommend_product(self):
+        # 유저 버전 1 + 추천 상품 직렬화 4 (카탈로그 버전, 유사 유저/가입 행렬은 메모리)
+        self.assert_constant_queries(5, '/api/products/recommend/')
+
+
+class RecommendProductTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='me', password='pw', age=30, money=10 ** 7, salary=10 ** 7)
+        neighbours = [
+            User.objects.create_user(username=f'neighbour{i}', password='pw', age=30 + i, money=10 ** 7, salary=10 ** 7)
+            for i in range(3)
+        ]
+        self.products = make_products(8)
+        # 이웃들이 많이 가입한 순서: products[0] > products[1] > ...
+        for i, product in enumerate(self.products):
+            product.join_users.add(*neighbours[:max(1, 3 - i)])
+        self.products[0].join_users.add(self.user)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        get_user_index().build()
+        get_recommender().build()
+        get_rec_cache().clear()
+
+    def recommended_ids(self):
+        return [item['id'] for item in self.client.get('/api/products/recommend/').data]
+
+    def test_excludes_already_joined(self):
+        ids = self.recommended_ids()
+        self.assertNotIn(self.products[0].pk, ids)
+        self.assertEqual(ids, [p.pk for p in self.products[1:6]])
+
+    def test_excludes_retired_products(self):
+        Product.objects.filter(pk=self.products[1].pk).update(is_active=False)
+        ids = self.recommended_ids()
+        # 판매 종료 상품을 빼도 5개를 채움
+        self.assertEqual(ids, [p.pk for p in self.products[2:7]])
+
+
+class RecommendationCacheTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='me', password='pw')
+        self.cache = RecommendationCache()
+
+    def test_invalidation_from_another_process(self):
+        self.cache.set(cache_key('recommend', self.user), ['stale'])
+        # 다른 프로세스의 invalidate_user: 이 프로세스 메모리는 그대로지만 DB 의 유저 버전이 오름
+        RecommendationCache().invalidate_user(self.user.pk)
+        self.assertIsNone(self.cache.get(cache_key('recommend', self.user)))
+
+    def test_other_users_keep_their_entries(self):
+        other = get_user_model().objects.create_user(username='other', password='pw')
+        self.cache.set(cache_key('recommend', other), ['kept'])
+        bump_user_version(self.user.pk)
+        self.assertEqual(self.cache.get(cache_key('recommend', other)), ['kept'])
+
+
+class CatalogueVersionTests(TestCase):
+    def test_version_is_read_once_per_check_interval(self):
+        bump_catalogue_version()
+        version = catalogue_version()
+        with self.assertNumQueries(0):
+            self.assertEqual(catalogue_version(), version)
+
+        # 다른 프로세스의 수집: DB 만 바뀌고 이 프로세스는 확인 주기가 지나야 반영
+        SyncJob.objects.filter(name=rec_cache.CATALOGUE_VERSION_NAME).update(last_finished_at=timezone.now())
+        self.assertEqual(catalogue_version(), version)
+        with mock.patch.object(rec_cache, 'VERSION_CHECK_SECONDS', 0), self.assertNumQueries(1):
+            self.assertNotEqual(catalogue_version(), version)
+
+
+class PaginateCursorTests(TestCase):
+    # 같은 값(동점)과 NULL(요약 값 없음 / 요약 행 자체가 없음)이 섞인 정렬 값
+    rates = [3.0, None, 2.5, 3.0, None, 4.0, 2.5, 3.0, None, 1.0, 4.0]
+
+    def make(self, product_type, field):
+        products = make_products(len(self.rates) + 1, product_type=product_type)
+        ProductSummary.objects.bulk_create([
+            ProductSummary(product=product, **{field: rate}) for product, rate in zip(products, self.rates)
+        ])
+        return products
+
+    def walk(self, product_type, limit):
+        """커서를 따라 끝까지 읽은 pk 목록"""
+        sort = sort_key(product_type)
+        seen, cursor = [], None
+        while True:
+            items, cursor = paginate(list_products(product_type=product_type), sort, cursor, limit)
+            seen += [item.pk for item in items]
+            if cursor is None:
+                return seen
+
+    def expected(self, products, descending):
+        # 값 순서 -> 같은 값이면 pk 순, NULL 은 항상 맨 뒤 (마지막 상품은 요약 행이 없음)
+        rates = dict(zip([p.pk for p in products], self.rates))
+        sign = -1 if descending else 1
+        return sorted(
+            (p.pk for p in products),
+            key=lambda pk: (rates.get(pk) is None, sign * (rates.get(pk) or 0), pk),
+        )
+
+    def test_descending_round_trip(self):
+        products = self.make('deposit', 'best_rate')
+        for limit in (1, 2, 3, 5, 100):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.walk('deposit', limit), self.expected(products, descending=True))
+
+    def test_ascending_round_trip(self):
+        products = self.make('credit', 'worst_rate')
+        for limit in (1, 2, 4):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.walk('credit', limit), self.expected(products, descending=False))
+
+    def test_cursor_from_other_sort_is_rejected(self):
+        self.make('deposit', 'best_rate')
+        _, cursor = paginate(list_products(product_type='deposit'), sort_key('deposit'), limit=2)
+        with self.assertRaises(ValueError):
+            paginate(list_products(product_type='deposit', sort='popular'), sort_key('deposit', 'popular'), cursor)
+
+
+class NameIndexTests(TestCase):
+    def setUp(self):
+        create = Product.objects.create
+        self.star = create(fin_prdt_cd='A', kor_co_nm='국민은행', fin_prdt_nm='KB Star 정기예금', product_type='deposit')
+        self.won = create(fin_prdt_cd='B', kor_co_nm='우리은행', fin_prdt_nm='WON 첫거래 우대 적금', product_type='saving')
+        # 같은 이름이 여러 금융사에 있는 상품
+        self.plain_kb = create(fin_prdt_cd='C', kor_co_nm='국민은행', fin_prdt_nm='정기예금', product_type='deposit')
+        self.plain_sh = create(fin_prdt_cd='D', kor_co_nm='신한은행', fin_prdt_nm='정기예금', product_type='deposit')
+        self.retired = create(fin_prdt_cd='E', kor_co_nm='하나은행', fin_prdt_nm='하나 특판 예금', product_type='deposit', is_active=False)
+        self.index = NameIndex()
+        self.index.build(version=None)
+
+    def test_exact_and_normalized_names(self):
+        self.assertEqual(self.index.resolve('KB Star 정기예금'), self.star.pk)
+        # 띄어쓰기/대소문자/기호가 달라도 같은 상품
+        self.assertEqual(self.index.resolve('kb-star정기 예금'), self.star.pk)
+
+    def test_bank_hint_picks_among_same_names(self):
+        self.assertEqual(self.index.resolve('정기예금', bank='신한'), self.plain_sh.pk)
+        self.assertEqual(self.index.resolve('정기예금', bank='KB국민은행'), self.plain_kb.pk)
+        # 힌트가 없거나 맞는 금융사가 없으면 pk 가 작은 상품
+        self.assertEqual(self.index.resolve('정기예금'), self.plain_kb.pk)
+        self.assertEqual(self.index.resolve('정기예금', bank='농협'), self.plain_kb.pk)
+
+    def test_fuzzy_match_threshold(self):
+        self.assertEqual(self.index.resolve('KB Star 정기예그'), self.star.pk)
+        # 유사도가 정확히 FUZZY_THRESHOLD (0.6) 이면 같은 상품으로 봄
+        self.assertEqual(self.index.resolve('WON 첫거래 특별 적금'), self.won.pk)
+        self.assertIsNone(self.index.resolve('첫거래 특별 적금'))
+        self.assertIsNone(self.index.resolve('자유적금'))
+        self.assertIsNone(self.index.resolve(''))
+
+    def test_retired_products_are_not_matched(self):
+        self.assertIsNone(self.index.resolve('하나 특판 예금'))
+        self.assertIsNone(self.index.match({'id': self.retired.pk, 'name': '하나 특판 예금'}))
+
+    def test_match_prefers_candidate_id(self):
+        self.assertEqual(self.index.match({'id': str(self.won.pk), 'name': 'KB Star 정기예금'}), self.won.pk)
+        self.assertEqual(self.index.match({'id': 'x', 'name': '정기예금', 'bank': '신한은행'}), self.plain_sh.pk)
+
+
+class AIPromptTests(TestCase):
+    # 시스템 지시문 + 분석 결과 + 응답 형식 설명까지 합친 프롬프트 전체의 상한
+    PROMPT_TOKEN_BUDGET = CANDIDATE_TOKEN_BUDGET + 600
+    analysis_result = {'type': '안정형', 'score': 40, 'advice': '분산 투자'}
+
+    def setUp(self):
+        render_candidates.cache_clear()
+        for product_type in ('deposit', 'saving', 'annuity', 'etf'):
+            self.add_products(product_type, 40)
+        bump_catalogue_version()
+
+    def add_products(self, product_type, count, rate=1.0, prefix='상품'):
+        # 상품명이 길어서 유형별 상위 후보를 다 넣으면 예산을 넘음
+        products = Product.objects.bulk_create([
+            Product(
+                fin_prdt_cd=f"{prefix}-{product_type}-{i}", kor_co_nm='테스트은행', product_type=product_type,
+                fin_prdt_nm=f"{prefix} 아주 긴 이름의 우대금리 특판 정기 {product_type} 상품 {i}호",
+            )
+            for i in range(count)
+        ])
+        products = Product.objects.filter(fin_prdt_cd__startswith=f"{prefix}-{product_type}-")
+        ProductSummary.objects.bulk_create([
+            ProductSummary(product=p, best_rate=rate + i / 100) for i, p in enumerate(products)
+        ])
+        return products
+
+    def candidate_table(self, messages):
+        return messages[1]['content'].split('[후보 상품]\n', 1)[1].split('\n\n', 1)[0]
+
+    def test_prompt_stays_within_token_budget(self):
+        messages = recommend_messages(self.analysis_result)
+        table = self.candidate_table(messages)
+        rows = table.split('\n')[1:]
+
+        self.assertLessEqual(estimate_tokens(table), CANDIDATE_TOKEN_BUDGET)
+        self.assertLessEqual(sum(estimate_tokens(m['content']) for m in messages), self.PROMPT_TOKEN_BUDGET)
+        # 안정형 -> 예금/적금/연금만, 예산 때문에 잘려도 유형이 번갈아 들어감
+        self.assertLess(len(rows), 3 * 15)
+        self.assertEqual({row.split('|')[1] for row in rows}, {'예금', '적금', '연금'})
+
+    def test_table_cache_follows_catalogue_version(self):
+        first = self.candidate_table(recommend_messages(self.analysis_result))
+        new = self.add_products('deposit', 1, rate=9.0, prefix='신상품').get()
+
+        # 같은 카탈로그 버전이면 렌더링한 표를 재사용 (버전도 메모리에서 읽어서 쿼리 없음)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.candidate_table(recommend_messages(self.analysis_result)), first)
+
+        bump_catalogue_version()
+        table = self.candidate_table(recommend_messages(self.analysis_result))
+        self.assertEqual(table.split('\n')[1].split('|')[0], str(new.pk))
+
+
+def yf_download(tickers, **kwargs):
+    """yf.download(group_by='ticker') 형식: (티커, 컬럼) 2단 컬럼의 일봉 DataFrame"""
+    index = pd.date_range('2025-01-01', periods=400, freq='D')
+    frames = {}
+    for n, ticker in enumerate(tickers):
+        closes = 100 * np.exp(np.random.default_rng(n).normal(0, 0.01, len(index)).cumsum())
+        dividends = np.zeros(len(index))
+        dividends[::90] = 0.5
+        frames[ticker] = pd.DataFrame(
+            {'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': 1000.0, 'Dividends': dividends},
+            index=index,
+        )
+    return pd.concat(frames, axis=1)
+
+
+class EtfIngestTests(TestCase):
+    symbols = [
+        {'symbol': 'SPY', 'name': 'SPDR S&P 500', 'desc': 'S&P500'},
+        {'symbol': 'QQQ', 'name': 'Invesco QQQ', 'desc': '나스닥 100'},
+    ]
+
+    def setUp(self):
+        for patch in (
+            mock.patch('services.price_store.yf.download', side_effect=yf_download),
+            mock.patch('products.etf.yf.Ticker', side_effect=self.ticker),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.info_calls = []
+
+    def ticker(self, symbol):
+        self.info_calls.append(symbol)
+        return SimpleNamespace(info={'sector': f'{symbol} 섹터', 'currency': 'USD'})
+
+    def ingest(self, items):
+        with mock.patch.object(etf, 'ETF_SYMBOLS', items), CaptureQueriesContext(connection) as queries:
+            saved = etf.fetch_and_save_etfs()
+        statements = [q['sql'] for q in queries.captured_queries]
+        count = lambda prefix: sum(sql.startswith(prefix) for sql in statements)
+        return saved, {
+            'product_inserts': count('INSERT INTO "products_product" '),
+            'option_inserts': count('INSERT INTO "products_productoption" '),
+            'product_updates': count('UPDATE "products_product" '),
+            'option_updates': count('UPDATE "products_productoption" '),
+        }
+
+    def test_bulk_write_and_info_only_for_new_symbols(self):
+        saved, writes = self.ingest(self.symbols)
+        self.assertEqual(saved, 2)
+        self.assertEqual(writes, {'product_inserts': 1, 'option_inserts': 1, 'product_updates': 0, 'option_updates': 0})
+        self.assertEqual(sorted(self.info_calls), ['QQQ', 'SPY'])
+
+        option = ProductOption.objects.get(fin_prdt_cd='SPY')
+        self.assertEqual(option.etc_info['sector'], 'SPY 섹터')
+        self.assertIsNotNone(option.etc_info['volatility'])
+        self.assertGreater(option.intr_rate2, 0)
+
+        # 다시 수집: 새 종목(SCHD)만 .info 조회, 기존 상품/옵션은 bulk_update 한 번씩
+        self.info_calls.clear()
+        saved, writes = self.ingest(self.symbols + [{'symbol': 'SCHD', 'name': 'Schwab US Dividend', 'desc': '배당'}])
+        self.assertEqual(saved, 3)
+        self.assertEqual(self.info_calls, ['SCHD'])
+        self.assertEqual(writes, {'product_inserts': 1, 'option_inserts': 1, 'product_updates': 1, 'option_updates': 1})
+        self.assertEqual(Product.objects.filter(product_type='etf').count(), 3)
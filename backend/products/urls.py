@@ -21,8 +21,11 @@ urlpatterns = [
 
     # 5. AI 및 포트폴리오
     path('analyze/', views.ai_analyze_user),
+    path('analyze/stream/', views.ai_analyze_user_stream),
     path('portfolio/latest/', views.get_latest_portfolio),
     path('ai-recommend/', views.ai_recommend_product),
+    path('ai-recommend/stream/', views.ai_recommend_product_stream),
     path('recommend/', views.recommend_product),
+    path('recommend/cache-stats/', views.recommend_cache_stats),
 
 ]
\ No newline at end of file
@@ -0,0 +1,136 @@
+# backend/products/worker.py
+# ------------------------------------------------------
+# 백그라운드 수집 스케줄러 (외부 브로커 없이 순수 파이썬 루프)
+# - 금융상품(finlife), ETF, 시장 데이터를 각자 주기마다 새로 수집 (+ 시장 지표/상관계수 재계산)
+# - SyncJob 테이블의 락으로 워커가 여러 개 떠 있어도 동시에 수집하지 않음
+# - 마지막 실행 시각도 DB 에 남기므로 워커를 재시작해도 주기가 유지됨
+# ------------------------------------------------------
+from datetime import timedelta
+import os
+import socket
+import time
+import traceback
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import SyncJob
+
+LOCK_NAME = 'ingest-lock'
+# 작업 하나가 이보다 오래 걸리면 락이 풀린 것으로 본다 (워커가 죽은 경우 대비)
+LOCK_TTL = timedelta(minutes=30)
+
+
+def _run_finlife():
+    from .views import fetch_and_save_products
+    result = fetch_and_save_products()
+    return {'message': result['message'], 'details': result['details']}
+
+
+def _run_etf():
+    from .etf import fetch_and_save_etfs
+    return {'saved': fetch_and_save_etfs()}
+
+
+def _run_market():
+    from services.market import refresh_market_data
+    return refresh_market_data()
+
+
+def _run_analytics():
+    from services.analytics import refresh_analytics
+    data = refresh_analytics()
+    return {'symbols': len(data['symbols']), 'elapsed_ms': data['elapsed_ms']}
+
+
+def get_jobs():
+    # 작업 이름: (실행 함수, 주기 초)
+    return {
+        'finlife': (_run_finlife, settings.FINLIFE_REFRESH_SECONDS),
+        'etf': (_run_etf, settings.ETF_REFRESH_SECONDS),
+        'market': (_run_market, settings.MARKET_REFRESH_SECONDS),
+        'analytics': (_run_analytics, settings.ANALYTICS_REFRESH_SECONDS),
+    }
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lock(owner, ttl=LOCK_TTL):
+    """조건부 UPDATE 한 번으로 락 획득 (성공하면 True)"""
+    now = timezone.now()
+    SyncJob.objects.get_or_create(name=LOCK_NAME)
+    acquired = SyncJob.objects.filter(name=LOCK_NAME).filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now) | Q(locked_by=owner)
+    ).update(locked_by=owner, locked_until=now + ttl)
+    return acquired == 1
+
+
+def release_lock(owner):
+    SyncJob.objects.filter(name=LOCK_NAME, locked_by=owner).update(locked_by='', locked_until=None)
+
+
+def is_due(job, interval, now):
+    if job.last_finished_at is None:
+        return True
+    return job.last_finished_at + timedelta(seconds=interval) <= now
+
+
+def run_job(name, func):
+    job, _ = SyncJob.objects.get_or_create(name=name)
+    job.last_started_at = timezone.now()
+    job.last_status = 'running'
+    job.save(update_fields=['last_started_at', 'last_status'])
+
+    try:
+        job.last_result = func()
+        job.last_status = 'success'
+    except Exception as e:
+        traceback.print_exc()
+        job.last_result = {'error': str(e)}
+        job.last_status = 'failed'
+
+    job.last_finished_at = timezone.now()
+    job.save(update_fields=['last_finished_at', 'last_status', 'last_result'])
+    return job
+
+
+def run_due_jobs(owner, only=None, force=False):
+    """
+    주기가 된 작업만 실행. 다른 워커가 락을 쥐고 있으면 아무것도 하지 않는다.
+    반환값: 실행한 작업들의 {이름: 상태}, 락을 못 잡으면 None
+    """
+    if not acquire_lock(owner):
+        return None
+
+    ran = {}
+    try:
+        now = timezone.now()
+        for name, (func, interval) in get_jobs().items():
+            if only and name not in only:
+                continue
+            job, _ = SyncJob.objects.get_or_create(name=name)
+            if not force and not is_due(job, interval, now):
+                continue
+
+            print(f"[ingest] {name} 수집 시작")
+            started = time.monotonic()
+            job = run_job(name, func)
+            print(f"[ingest] {name} {job.last_status} ({time.monotonic() - started:.1f}s)")
+            ran[name] = job.last_status
+    finally:
+        release_lock(owner)
+    return ran
+
+
+def run_forever(tick=30, only=None):
+    owner = worker_id()
+    print(f"[ingest] 워커 시작: {owner}")
+    while True:
+        try:
+            run_due_jobs(owner, only=only)
+        except Exception:
+            traceback.print_exc()
+        time.sleep(tick)
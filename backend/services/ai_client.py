@@ -0,0 +1,161 @@
+# backend/services/ai_client.py
+# ------------------------------------------------------
+# 프로세스 공용 AI(GMS / OpenAI) 클라이언트
+# - OpenAI 클라이언트를 한 번만 만들어 커넥션 풀 / TLS 세션 재사용
+# - 동시에 나가는 AI 호출 수를 세마포어로 제한, 대기열도 길이/시간 제한
+#   -> 요청이 몰려도 WSGI 워커가 전부 AI 응답만 기다리며 묶이지 않음 (넘치면 503)
+# - 모델별 호출 수 / 지연시간 / 토큰 사용량 집계
+# ------------------------------------------------------
+import threading
+import time
+
+from django.conf import settings
+import httpx
+from openai import OpenAI
+
+MAX_CONCURRENCY = getattr(settings, 'AI_MAX_CONCURRENCY', 4)
+MAX_WAITING = getattr(settings, 'AI_MAX_WAITING', 16)
+QUEUE_TIMEOUT = getattr(settings, 'AI_QUEUE_TIMEOUT', 10)
+REQUEST_TIMEOUT = getattr(settings, 'AI_REQUEST_TIMEOUT', 60)
+
+
+class AIBusyError(Exception):
+    """대기열이 꽉 찼거나 QUEUE_TIMEOUT 안에 차례가 오지 않음"""
+
+
+_client = None
+_client_lock = threading.Lock()
+
+_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_state_lock = threading.Lock()
+_waiting = 0
+_in_flight = 0
+_metrics = {}
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(
+                    api_key=settings.GMS_API_KEY,
+                    base_url=settings.GMS_BASE_URL,
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(max_connections=MAX_CONCURRENCY * 2, max_keepalive_connections=MAX_CONCURRENCY),
+                        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=5),
+                    ),
+                )
+    return _client
+
+
+def _model_metrics(model):
+    return _metrics.setdefault(model, {
+        'calls': 0, 'errors': 0, 'rejected': 0,
+        'total_seconds': 0.0, 'max_seconds': 0.0, 'first_token_seconds': 0.0,
+        'prompt_tokens': 0, 'completion_tokens': 0,
+    })
+
+
+def _acquire(model):
+    global _waiting, _in_flight
+    with _state_lock:
+        if _waiting >= MAX_WAITING:
+            _model_metrics(model)['rejected'] += 1
+            raise AIBusyError('AI 요청이 너무 많아요. 잠시 후 다시 시도해줘!')
+        _waiting += 1
+    try:
+        acquired = _slots.acquire(timeout=QUEUE_TIMEOUT)
+    finally:
+        with _state_lock:
+            _waiting -= 1
+    if not acquired:
+        with _state_lock:
+            _model_metrics(model)['rejected'] += 1
+        raise AIBusyError('AI 응답 대기 시간이 초과됐어요. 잠시 후 다시 시도해줘!')
+    with _state_lock:
+        _in_flight += 1
+
+
+def _release():
+    global _in_flight
+    with _state_lock:
+        _in_flight -= 1
+    _slots.release()
+
+
+def _record(model, started, error=False, usage=None, first_token=None):
+    elapsed = time.monotonic() - started
+    with _state_lock:
+        m = _model_metrics(model)
+        m['calls'] += 1
+        m['errors'] += int(error)
+        m['total_seconds'] += elapsed
+        m['max_seconds'] = max(m['max_seconds'], elapsed)
+        if first_token is not None:
+            m['first_token_seconds'] += first_token
+        if usage is not None:
+            m['prompt_tokens'] += usage.prompt_tokens or 0
+            m['completion_tokens'] += usage.completion_tokens or 0
+
+
+def chat(model, messages, **kwargs):
+    """동시 호출 제한을 지키며 chat completion 한 번 호출, 응답 본문(문자열) 반환"""
+    _acquire(model)
+    started = time.monotonic()
+    try:
+        response = get_client().chat.completions.create(model=model, messages=messages, **kwargs)
+    except Exception:
+        _record(model, started, error=True)
+        raise
+    finally:
+        _release()
+    _record(model, started, usage=response.usage)
+    return response.choices[0].message.content
+
+
+def stream_chat(model, messages, **kwargs):
+    """stream=True 로 호출해서 텍스트 조각을 하나씩 돌려주는 제너레이터 (스트림이 끝날 때까지 자리 차지)"""
+    _acquire(model)
+    started = time.monotonic()
+    first_token = None
+    usage = None
+    try:
+        completion = get_client().chat.completions.create(model=model, messages=messages, stream=True, **kwargs)
+        for chunk in completion:
+            if getattr(chunk, 'usage', None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first_token is None:
+                    first_token = time.monotonic() - started
+                yield delta
+    except Exception:
+        _record(model, started, error=True)
+        raise
+    else:
+        _record(model, started, usage=usage, first_token=first_token)
+    finally:
+        _release()
+
+
+def metrics():
+    with _state_lock:
+        models = {}
+        for model, m in _metrics.items():
+            calls = m['calls']
+            models[model] = {
+                **m,
+                'avg_seconds': round(m['total_seconds'] / calls, 3) if calls else None,
+                'total_seconds': round(m['total_seconds'], 3),
+                'max_seconds': round(m['max_seconds'], 3),
+                'first_token_seconds': round(m['first_token_seconds'], 3),
+            }
+        return {
+            'max_concurrency': MAX_CONCURRENCY,
+            'in_flight': _in_flight,
+            'waiting': _waiting,
+            'models': models,
+        }
@@ -0,0 +1,173 @@
+# backend/services/analytics.py
+# ------------------------------------------------------
+# 종목별 시장 지표 미리 계산 (일봉 저장소의 NumPy 배열 기준)
+# - 기간 수익률(1주/1달/1년), 연환산 변동성, 최대 낙폭(1년), 배당률, 종목 간 상관계수
+# - 일봉이 새로 저장되면(price_store 의 버전이 오를 때) 바뀐 종목의 지표만 다시 계산해서
+#   MarketSnapshot('analytics') 에 저장 -> 요청 처리 중에는 dict 조회만 함
+# - 전 종목 상관계수는 워커의 analytics 작업(ANALYTICS_REFRESH_SECONDS 주기)에서만 다시 계산
+# - 0 이하/NaN 종가(빠진 시세)는 빼고 계산 (JSON 에 inf/NaN 이 들어가지 않게)
+# ------------------------------------------------------
+import threading
+import time
+
+from django.db import transaction
+from django.utils import timezone
+import numpy as np
+
+from .models import MarketSnapshot, PriceBar
+from .price_store import get_price_store
+
+ANALYTICS_KEY = 'analytics'
+RETURN_WINDOWS = {'return_1w': 7, 'return_1m': 30, 'return_1y': 365}
+# 변동성/최대 낙폭/상관계수 계산 기간 (일)
+RISK_WINDOW = 365
+# 상관계수에 넣을 최소 공통 거래일 수
+MIN_OVERLAP = 20
+# 다른 프로세스에서 다시 계산했는지 DB 로 확인하는 간격 (초)
+VERSION_CHECK_SECONDS = 5
+
+
+def _pct(value):
+    return None if value is None or not np.isfinite(value) else round(float(value) * 100, 2)
+
+
+def clean_series(dates, closes, dividends):
+    """계산에 쓸 수 없는 종가(0 이하, NaN)가 있는 날은 뺌"""
+    valid = np.isfinite(closes) & (closes > 0)
+    return dates[valid], closes[valid], dividends[valid]
+
+
+def period_return(dates, closes, days):
+    """마지막 날짜 기준 days 일 전(그날 또는 그 직전 거래일) 대비 수익률, 기록이 모자라면 None"""
+    base = np.searchsorted(dates, dates[-1] - np.timedelta64(days, 'D'), side='right') - 1
+    if base < 0:
+        return None
+    return closes[-1] / closes[base] - 1
+
+
+def compute_metrics(dates, closes, dividends):
+    """한 종목의 (날짜, 종가, 배당) 배열 (clean_series 결과) -> 지표 dict (% 단위)"""
+    metrics = {key: _pct(period_return(dates, closes, days)) for key, days in RETURN_WINDOWS.items()}
+
+    start = np.searchsorted(dates, dates[-1] - np.timedelta64(RISK_WINDOW, 'D'), side='left')
+    window = closes[start:]
+    returns = np.diff(np.log(window))
+    if len(returns) > 1:
+        # 거래일 수가 자산마다 달라서(코인은 주말 포함) 실제 관측 빈도로 연환산
+        span = max(int((dates[-1] - dates[start]) / np.timedelta64(1, 'D')), 1)
+        metrics['volatility'] = _pct(returns.std(ddof=1) * np.sqrt(len(returns) * 365 / span))
+    else:
+        metrics['volatility'] = None
+    metrics['max_drawdown'] = _pct((window / np.maximum.accumulate(window) - 1).min())
+    metrics['dividend_yield'] = _pct(dividends[start:].sum() / closes[-1]) if closes[-1] else None
+    metrics['last_close'] = float(closes[-1])
+    metrics['as_of'] = str(dates[-1])
+    return metrics
+
+
+def compute_correlation(series):
+    """
+    {종목: (날짜, 종가)} -> 최근 RISK_WINDOW 일 일간 수익률의 상관계수 행렬
+    모든 종목에 공통인 날짜만 사용 (기간이 겹치지 않는 종목은 제외)
+    종가는 clean_series 를 거친 양수여야 함. 값이 한 번도 안 바뀐 종목과의 상관계수는 None
+    """
+    latest = max(dates[-1] for dates, _ in series.values())
+    since = latest - np.timedelta64(RISK_WINDOW, 'D')
+    recent = {symbol: (dates, closes) for symbol, (dates, closes) in series.items() if dates[-1] >= since}
+
+    common = None
+    for dates, _ in recent.values():
+        window = dates[dates >= since]
+        common = window if common is None else np.intersect1d(common, window, assume_unique=True)
+    if common is None or len(common) <= MIN_OVERLAP:
+        return {'symbols': [], 'matrix': []}
+
+    symbols = sorted(recent)
+    prices = np.vstack([
+        recent[symbol][1][np.searchsorted(recent[symbol][0], common)] for symbol in symbols
+    ])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        matrix = np.round(np.corrcoef(np.diff(np.log(prices), axis=1)), 3)
+    return {
+        'symbols': symbols,
+        'matrix': [[float(v) if np.isfinite(v) else None for v in row] for row in matrix],
+    }
+
+
+def refresh_analytics(symbols=None):
+    """
+    지표를 다시 계산해서 저장하고 저장한 전체 데이터를 반환.
+    symbols 가 주어지면 그 종목의 지표만 다시 계산 (일봉 저장 직후, 다른 종목과 상관계수는 저장된 값 그대로)
+    None 이면 전 종목 + 상관계수 (워커의 analytics 작업, 아직 한 번도 계산하지 않았을 때)
+    """
+    started = time.perf_counter()
+    if symbols is not None and not MarketSnapshot.objects.filter(key=ANALYTICS_KEY).exists():
+        symbols = None
+    store = get_price_store()
+    if symbols is None:
+        targets = PriceBar.objects.values_list('symbol', flat=True).distinct()
+    else:
+        targets = symbols
+
+    series, metrics = {}, {}
+    for symbol in targets:
+        dates, closes, dividends = clean_series(*store.range(symbol))
+        if len(closes) < 2:
+            continue
+        series[symbol] = (dates, closes)
+        metrics[symbol] = compute_metrics(dates, closes, dividends)
+
+    with transaction.atomic():
+        # 읽기 전에 쓰기 락부터 잡음 (여러 프로세스의 부분 갱신이 서로의 결과를 덮어쓰지 않게)
+        MarketSnapshot.objects.filter(key=ANALYTICS_KEY).update(updated_at=timezone.now())
+        snapshot, _ = MarketSnapshot.objects.get_or_create(key=ANALYTICS_KEY)
+        if symbols is None:
+            data = {
+                'symbols': metrics,
+                'correlation': compute_correlation(series) if series else {'symbols': [], 'matrix': []},
+            }
+        else:
+            data = dict(snapshot.data or {})
+            data['symbols'] = {**data.get('symbols', {}), **metrics}
+        data['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        snapshot.data = data
+        snapshot.save()
+    _cache.invalidate()
+    return data
+
+
+class AnalyticsCache:
+    """저장된 계산 결과를 프로세스 메모리에 들고 있음 (버전 확인은 VERSION_CHECK_SECONDS 마다)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.data = {}
+        self.version = None
+        self.checked_at = 0
+
+    def invalidate(self):
+        with self._lock:
+            self.checked_at = 0
+
+    def get(self):
+        now = time.monotonic()
+        if now - self.checked_at >= VERSION_CHECK_SECONDS:
+            version = MarketSnapshot.objects.filter(key=ANALYTICS_KEY).values_list('updated_at', flat=True).first()
+            if version != self.version:
+                data = MarketSnapshot.objects.filter(key=ANALYTICS_KEY).values_list('data', flat=True).first() or {}
+                with self._lock:
+                    self.data, self.version = data, version
+            self.checked_at = now
+        return self.data
+
+
+_cache = AnalyticsCache()
+
+
+def get_analytics():
+    return _cache.get()
+
+
+def symbol_metrics(symbol):
+    """종목 하나의 지표 (아직 계산 전이면 None)"""
+    return get_analytics().get('symbols', {}).get(symbol)
@@ -0,0 +1,145 @@
+# backend/services/llm_cache.py
+# ------------------------------------------------------
+# AI 상담(ai_financial_consult) 응답 캐시
+# - 질문을 정규화(공백/대소문자/끝 문장부호)한 해시로 키를 만들어
+#   "예금 vs 적금 차이?" / "예금vs적금 차이" 같은 질문은 한 번만 AI 호출
+# - single-flight: 같은 질문이 동시에 여러 개 들어오면 업스트림 호출 하나를 같이 기다림
+#   (AI 호출 제한 시간까지만 기다리고, 그래도 안 끝나면 직접 호출)
+# - 크기 제한(LRU) + TTL, 실패한 응답은 캐시하지 않음
+# ------------------------------------------------------
+from collections import OrderedDict
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+
+_TRAILING_PUNCT = re.compile(r'[\s?!.~…？！。]+$')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_query(query):
+    text = unicodedata.normalize('NFKC', query).strip().lower()
+    text = _TRAILING_PUNCT.sub('', text)
+    # 한국어는 띄어쓰기가 제각각이라 공백은 전부 무시
+    return _SPACES.sub('', text)
+
+
+def query_key(model, system_prompt, query):
+    raw = '\x00'.join([model, system_prompt, normalize_query(query)])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class _Flight:
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+# 같은 질문의 호출을 기다리는 최대 시간 = AI 호출의 대기열 제한 + 응답 제한
+WAIT_TIMEOUT = getattr(settings, 'AI_QUEUE_TIMEOUT', 10) + getattr(settings, 'AI_REQUEST_TIMEOUT', 60)
+
+
+class LLMCache:
+    def __init__(self, maxsize=512, ttl=3600, wait_timeout=WAIT_TIMEOUT):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (만료 시각, 응답)
+        self._flights = {}          # key -> 진행 중인 업스트림 호출
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0             # 다른 요청의 호출 결과를 같이 받은 횟수
+        self.wait_timeouts = 0      # 기다리다 제한 시간이 지나서 직접 호출한 횟수
+
+    def get_or_call(self, key, call):
+        """캐시에 있으면 바로, 같은 키의 호출이 진행 중이면 그 결과를, 아니면 call() 실행"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            # 앞선 호출이 멈춰 있어도 같은 질문의 요청들이 워커 스레드를 무한정 붙잡지 않게 함
+            if flight.event.wait(self.wait_timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            with self._lock:
+                self.wait_timeouts += 1
+            value = call()
+            self.put(key, value)
+            return value
+
+        try:
+            flight.value = call()
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            self.put(key, flight.value)
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+        return flight.value
+
+    def get(self, key):
+        """캐시에 있으면 응답, 없으면 None (스트리밍처럼 직접 호출하는 경우용)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared': self.shared,
+                'wait_timeouts': self.wait_timeouts,
+            }
+
+
+_cache = LLMCache(
+    maxsize=getattr(settings, 'LLM_CACHE_SIZE', 512),
+    ttl=getattr(settings, 'LLM_CACHE_TTL', 3600),
+)
+
+
+def get_llm_cache():
+    return _cache
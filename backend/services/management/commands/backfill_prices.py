@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.etf import ETF_SYMBOLS
+from services.market import METAL_SYMBOLS, SYMBOLS, fetch_metals
+from services.analytics import refresh_analytics
+from services.price_store import backfill, get_price_store, last_dates
+
+
+class Command(BaseCommand):
+    help = '일봉 저장소 채우기 (코인/환율/ETF는 마지막 저장 날짜 이후만, 금/은은 엑셀이 바뀌었을 때만) + 기간 조회 시간'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbols', nargs='+', help='이 종목들만 (기본: 시장 지수 + ETF 전체)')
+
+    def handle(self, *args, **options):
+        symbols = options['symbols'] or [item['symbol'] for item in SYMBOLS + ETF_SYMBOLS]
+
+        started = time.perf_counter()
+        saved = backfill(symbols)
+        if not options['symbols']:
+            fetch_metals()
+            symbols += list(METAL_SYMBOLS.values())
+        self.stdout.write(f"수집 {time.perf_counter() - started:.1f}s")
+        # 일봉 저장 때는 바뀐 종목의 지표만 계산하므로 상관계수까지 전부 다시 계산
+        analytics = refresh_analytics()
+        self.stdout.write(
+            f"지표 {len(analytics.get('symbols', {}))}종목, 상관계수 {len(analytics.get('correlation', {}).get('symbols', []))}종목 "
+            f"(계산 {analytics.get('elapsed_ms')}ms)"
+        )
+
+        store = get_price_store()
+        last = last_dates(symbols)
+        for symbol in symbols:
+            dates = store.range(symbol)[0]
+            repeat = 1000
+            started = time.perf_counter()
+            for _ in range(repeat):
+                store.last(symbol, days=365)
+            per_query = (time.perf_counter() - started) / repeat * 1e6
+            self.stdout.write(
+                f"{symbol:10} 이번에 저장 {saved.get(symbol, 0):5}행 / 전체 {len(dates):5}행 "
+                f"(마지막 {last.get(symbol)}) 1년 조회 {per_query:.1f}µs"
+            )
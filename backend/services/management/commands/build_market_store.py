@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+import pandas as pd
+
+from services.metal_store import SOURCES, build_store, get_metal_store, read_manifest
+
+
+def legacy_history(path):
+    # 예전 방식: 매번 엑셀을 읽고 iterrows 로 전부 변환한 뒤 최근 50개만 사용
+    df = pd.read_excel(path)
+    df.columns = df.columns.str.strip()
+    df['Date'] = pd.to_datetime(df['Date'])
+    df = df.sort_values(by='Date')
+    if not pd.api.types.is_numeric_dtype(df['Close/Last']):
+        df['Close/Last'] = df['Close/Last'].astype(str).str.replace(',', '').str.replace('$', '')
+    df['Close/Last'] = pd.to_numeric(df['Close/Last'])
+    result = []
+    for _, row in df.iterrows():
+        result.append({'Date': row['Date'].strftime('%Y-%m-%d'), 'Close/Last': float(row['Close/Last'])})
+    return result[-50:]
+
+
+def per_call_ms(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+class Command(BaseCommand):
+    help = '금/은 엑셀을 컬럼 저장소(.npy)로 변환 (바뀐 파일만), --bench 면 요청당 비용 비교'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='바뀌지 않았어도 다시 변환')
+        parser.add_argument('--bench', action='store_true', help='엑셀 파싱 vs 메모리 매핑 슬라이스 시간 측정')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = build_store(force=options['force'])
+        manifest = read_manifest()
+        for metal, status in result.items():
+            self.stdout.write(f"{metal}: {status} ({manifest.get(metal, {}).get('rows', 0)}행)")
+        self.stdout.write(f"변환 {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        if not options['bench']:
+            return
+
+        store = get_metal_store()
+        repeat = options['repeat']
+        for metal, path in SOURCES.items():
+            if store.tail(metal) is None:
+                continue
+            assert legacy_history(path) == store.history(metal), f'{metal}: 예전 결과와 다름'
+            legacy = per_call_ms(lambda: legacy_history(path), repeat)
+            mapped = per_call_ms(lambda: store.history(metal), repeat * 100)
+            self.stdout.write(
+                f"{metal:6} 엑셀 파싱 {legacy:8.2f}ms/요청 | 저장소 슬라이스 {mapped * 1000:7.1f}µs/요청 (x{legacy / mapped:,.0f})"
+            )
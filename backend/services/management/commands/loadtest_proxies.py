@@ -0,0 +1,148 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+
+# (이름, 요청 경로) - 외부 API 를 중계하는 엔드포인트들
+TARGETS = [
+    ('search_bank', '/services/bank-search/?keyword=은행'),
+    ('route_guide', '/services/route/?ep=127.0,37.5'),
+    ('youtube_search', '/youtube/search/?q=재테크'),
+    ('video_detail', '/youtube/video/?id=abc'),
+]
+
+
+class StubUpstream:
+    """
+    느린 외부 API 흉내 (asyncio 서버, keep-alive 지원)
+    - 스레드 서버는 업스트림 쪽이 먼저 병목이 돼서 비교가 안 되므로 이벤트 루프로 처리
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(asyncio.start_server(self._handle, '127.0.0.1', 0, backlog=1024))
+        self.port = server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+        server.close()
+        self.loop.run_until_complete(server.wait_closed())
+        self.loop.close()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                # 헤더는 읽고 버림 (GET 만 받으므로 본문 없음)
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                await asyncio.sleep(self.delay)
+                body = json.dumps({'documents': [], 'items': [], 'path': request_line.split()[1].decode()}).encode()
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                    + f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+                )
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def stop(self):
+        async def shutdown():
+            # 남아 있는 keep-alive 연결 처리 태스크를 정리한 뒤 루프 종료
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+        self.thread.join()
+
+
+class Command(BaseCommand):
+    help = '로컬 가짜 업스트림을 띄워서 외부 API 중계 엔드포인트의 처리량을 측정 (ASGI vs WSGI 워커)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400, help='엔드포인트별 총 요청 수')
+        parser.add_argument('--concurrency', type=int, default=200, help='ASGI: 동시에 보내는 요청 수')
+        parser.add_argument('--workers', type=int, default=8, help='WSGI 비교군: 워커(스레드) 수')
+        parser.add_argument('--delay', type=float, default=0.2, help='가짜 업스트림 응답 지연 (초)')
+
+    def handle(self, *args, **options):
+        upstream = StubUpstream(options['delay'])
+        base = upstream.url
+
+        # 중계 뷰들이 가짜 업스트림을 보도록
+        settings.KAKAO_LOCAL_URL = settings.KAKAO_NAVI_URL = settings.YOUTUBE_API_URL = base
+        settings.YOUTUBE_API_KEY = settings.YOUTUBE_API_KEY or 'loadtest'
+
+        total = options['requests']
+        self.stdout.write(
+            f"업스트림 지연 {options['delay']}s, 엔드포인트별 {total}건 "
+            f"(ASGI 동시 {options['concurrency']} / WSGI 워커 {options['workers']})"
+        )
+        try:
+            for name, path in TARGETS:
+                sync_rps, sync_errors = self.run_sync(path, total, options['workers'])
+                async_rps, errors = asyncio.run(self.run_async(path, total, options['concurrency']))
+                errors += sync_errors
+                self.stdout.write(
+                    f"{name:15} WSGI {sync_rps:7.1f} req/s | ASGI {async_rps:7.1f} req/s "
+                    f"(x{async_rps / sync_rps:.1f}){f' / 실패 {errors}건' if errors else ''}"
+                )
+        finally:
+            upstream.stop()
+
+    def run_sync(self, path, total, workers):
+        # WSGI(runserver / gunicorn sync 워커) 요청 처리 경로(Client)로 같은 뷰 호출
+        # 워커 스레드 하나가 응답이 끝날 때까지 묶이고, async 뷰는 요청마다 새 루프에서 돔
+        local = threading.local()
+
+        def call(_):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            return local.client.get(path).status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            errors = sum(code != 200 for code in executor.map(call, range(total)))
+        return total / (time.perf_counter() - started), errors
+
+    async def run_async(self, path, total, concurrency):
+        # ASGI 요청 처리 경로(AsyncClient)로 async 뷰 호출
+        client = AsyncClient()
+        slots = asyncio.Semaphore(concurrency)
+        errors = 0
+
+        async def call():
+            nonlocal errors
+            async with slots:
+                res = await client.get(path)
+                if res.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        return total / elapsed, errors
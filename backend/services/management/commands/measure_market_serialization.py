@@ -0,0 +1,67 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+import numpy as np
+import orjson
+import pandas as pd
+
+from services.timeseries import downsample, history_columns, to_records
+
+
+def legacy_records(hist, scale):
+    # 예전 방식: iterrows 로 한 줄씩 배율 적용 + strftime
+    history_data = []
+    for date, row in hist.iterrows():
+        price = row['Close']
+        if scale != 1: price *= scale
+        history_data.append({'Date': date.strftime('%Y-%m-%d'), 'Close/Last': float(price)})
+    return history_data
+
+
+def per_call_ms(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+class Command(BaseCommand):
+    help = '시세 히스토리 직렬화 시간 비교 (iterrows + json vs 컬럼 단위 변환 + orjson), LTTB 다운샘플링 크기/시간'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[50, 1000, 10000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--points', type=int, default=200, help='LTTB 로 줄일 점 개수')
+
+    def handle(self, *args, **options):
+        for rows in options['rows']:
+            # yfinance 와 같은 모양: 시간대가 붙은 일별 인덱스 + Close 컬럼, 엔화처럼 x100 배율
+            index = pd.date_range('2000-01-01', periods=rows, freq='D', tz='Asia/Seoul')
+            hist = pd.DataFrame({'Close': np.random.default_rng(0).uniform(8, 10, rows)}, index=index)
+            scale = 100
+
+            assert legacy_records(hist, scale) == to_records(history_columns(hist.index, hist['Close'].to_numpy(), scale))
+
+            repeat = options['repeat']
+            legacy = per_call_ms(lambda: json.dumps(legacy_records(hist, scale), ensure_ascii=False), repeat)
+            records = per_call_ms(
+                lambda: orjson.dumps(to_records(history_columns(hist.index, hist['Close'].to_numpy(), scale))), repeat
+            )
+            columnar = per_call_ms(lambda: orjson.dumps(history_columns(hist.index, hist['Close'].to_numpy(), scale)), repeat)
+            self.stdout.write(
+                f"{rows:6}행  iterrows+json {legacy:8.2f}ms | 컬럼 변환+orjson {records:7.2f}ms (x{legacy / records:.0f}) "
+                f"| columnar {columnar:7.2f}ms (x{legacy / columnar:.0f})"
+            )
+
+            # LTTB: 기간이 길어져도 점 개수(응답 크기)는 고정
+            points = options['points']
+            closes = hist['Close'].to_numpy()
+            sampled = per_call_ms(lambda: downsample(hist.index.tz_localize(None).values, closes, points), repeat)
+            dates, values = downsample(hist.index.tz_localize(None).values, closes, points)
+            full_bytes = len(orjson.dumps(to_records(history_columns(hist.index, closes))))
+            sampled_bytes = len(orjson.dumps(to_records(history_columns(dates, values))))
+            self.stdout.write(
+                f"        LTTB {len(values)}점 {sampled:6.2f}ms | 응답 {full_bytes / 1024:7.1f}KB -> {sampled_bytes / 1024:5.1f}KB "
+                f"| 최고/최저 유지 {values.max() == closes.max()}/{values.min() == closes.min()}"
+            )
@@ -0,0 +1,226 @@
+# backend/services/market.py
+# ------------------------------------------------------
+# 시장 지수(코인/환율/금/은) 데이터 수집
+# - 업스트림(yfinance, 엑셀) 호출은 여기서만 한다. (금/은 엑셀은 metal_store 가 바뀔 때만 변환)
+# - 일봉은 price_store 에 쌓아 두고 마지막 저장 날짜 이후만 새로 받음
+# - 수집 결과는 MarketSnapshot 에 저장하고, API 는 저장된 스냅샷만 읽는다.
+# ------------------------------------------------------
+from functools import lru_cache
+import threading
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .analytics import get_analytics
+from .metal_store import build_store, get_metal_store
+from .models import MarketSnapshot
+from .price_store import backfill, get_price_store, last_dates, save_series
+from .timeseries import downsample, history_columns, to_columns, to_records
+
+MARKET_SNAPSHOT_KEY = 'indices'
+# 일봉 저장소에서 금/은을 부르는 이름
+METAL_SYMBOLS = {'gold': 'GOLD', 'silver': 'SILVER'}
+# 같은 프로세스의 자산별 갱신 스레드끼리는 save_asset 을 순서대로
+_save_lock = threading.Lock()
+
+# Crypto & Forex (yfinance 사용 - 차트 데이터 확보용)
+SYMBOLS = [
+    {'type': 'crypto', 'symbol': 'BTC-KRW', 'name': '비트코인', 'code': 'BTC'},
+    {'type': 'crypto', 'symbol': 'ETH-KRW', 'name': '이더리움', 'code': 'ETH'},
+    {'type': 'forex', 'symbol': 'KRW=X', 'name': '미국 달러', 'code': 'USD/KRW'},
+    # 엔화는 100엔 기준으로 변환 (scale)
+    {'type': 'forex', 'symbol': 'JPYKRW=X', 'name': '일본 엔 (100)', 'code': 'JPY/KRW', 'scale': 100},
+]
+
+
+def fetch_symbol(item):
+    """코인/환율 한 종목 (최근 1달). 데이터가 없으면 None"""
+    # 마지막 저장 날짜 이후만 받아서 로컬 일봉 저장소에 쌓고, 최근 1달은 저장소에서 잘라 씀
+    backfill([item['symbol']])
+    dates, closes, _ = get_price_store().last(item['symbol'], days=30)
+
+    if not len(closes): return None
+
+    # 엔화는 100엔 기준으로 변환 (히스토리 전체에 컬럼 단위로 적용)
+    columns = history_columns(dates, closes, item.get('scale', 1))
+    closes = columns['closes']
+
+    # 현재가 및 등락률 계산
+    current_price = closes[-1]
+    prev_price = closes[-2] if len(closes) > 1 else current_price
+    change_rate = ((current_price - prev_price) / prev_price) * 100
+
+    return {
+        'code': item['code'],
+        'name': item['name'],
+        'price': float(current_price),
+        'change': round(float(change_rate), 2),
+        # 차트용 히스토리 데이터
+        'history': to_records(columns)
+    }
+
+
+def fetch_metals():
+    """금/은 -> {'gold': [...], 'silver': [...]}, 엑셀 파일이 없으면 None"""
+    # 엑셀이 바뀌었을 때만 컬럼 저장소로 변환하고, 응답은 메모리 매핑된 배열에서 최근 50개만 잘라 씀
+    result = build_store()
+    if 'missing' in result.values():
+        return None
+    store = get_metal_store()
+
+    # 새로 변환했으면 (또는 아직 없으면) 일봉 저장소에도 반영
+    stored = last_dates(METAL_SYMBOLS.values())
+    for metal, symbol in METAL_SYMBOLS.items():
+        if metal in store.columns and (result[metal] == 'built' or symbol not in stored):
+            save_series(symbol, *store.columns[metal])
+
+    return {'gold': store.history('gold') or [], 'silver': store.history('silver') or []}
+
+
+# 캐시/갱신 단위(자산 키) -> 종류. 코인/환율은 종목마다, 금/은은 엑셀 두 개를 한 번에 읽으므로 하나로 묶음
+METALS_KEY = 'metals'
+ASSET_KINDS = {**{item['code']: item['type'] for item in SYMBOLS}, METALS_KEY: 'metal'}
+_SYMBOLS_BY_CODE = {item['code']: item for item in SYMBOLS}
+
+
+def fetch_asset(key):
+    """자산 하나만 업스트림에서 새로 받음 (실패하거나 데이터가 없으면 None)"""
+    try:
+        if key == METALS_KEY:
+            return fetch_metals()
+        return fetch_symbol(_SYMBOLS_BY_CODE[key])
+    except Exception as e:
+        print(f"Error fetching {key}: {e}")
+        return None
+
+
+def split_assets(data):
+    """응답 형태 {'gold', 'silver', 'crypto', 'forex'} -> {자산 키: 값}"""
+    assets = {}
+    for section in ('crypto', 'forex'):
+        for asset in data.get(section) or []:
+            assets[asset['code']] = asset
+    if data.get('gold') or data.get('silver'):
+        assets[METALS_KEY] = {'gold': data.get('gold') or [], 'silver': data.get('silver') or []}
+    return assets
+
+
+def join_assets(assets):
+    """{자산 키: 값} -> 응답 형태 (SYMBOLS 순서 유지)"""
+    response_data = {
+        'gold': [], 'silver': [], 'crypto': [], 'forex': []
+    }
+    for item in SYMBOLS:
+        if assets.get(item['code']):
+            response_data[item['type']].append(assets[item['code']])
+    metals = assets.get(METALS_KEY)
+    if metals:
+        response_data['gold'] = metals['gold']
+        response_data['silver'] = metals['silver']
+    return response_data
+
+
+def columnar_indices(data):
+    """응답의 히스토리들을 {'dates': [...], 'closes': [...]} 컬럼 형식으로 바꿈"""
+    result = dict(data)
+    result['gold'] = to_columns(data['gold'])
+    result['silver'] = to_columns(data['silver'])
+    for section in ('crypto', 'forex'):
+        result[section] = [{**asset, 'history': to_columns(asset['history'])} for asset in data[section]]
+    return result
+
+
+# 차트 기간 (?range=) -> 일 수 (None: 저장된 전체)
+RANGES = {'1m': 30, '3m': 91, '6m': 182, '1y': 365, '3y': 365 * 3, '5y': 365 * 5, 'max': None}
+DEFAULT_POINTS = 200
+MAX_POINTS = 2000
+
+
+def ranged_history(symbol, days, points, scale=1):
+    """일봉 저장소에서 최근 days 일을 최대 points 개로 줄여서 응답 형식으로"""
+    store = get_price_store()
+    dates, closes, _ = store.last(symbol, days) if days else store.range(symbol)
+    dates, closes = downsample(dates, closes, points)
+    return to_records(history_columns(dates, closes, scale))
+
+
+@lru_cache(maxsize=64)
+def _ranged_histories(version, range_key, points):
+    # version(일봉 저장소 버전)은 캐시 키 용도 - 새 일봉이 저장되면 다시 계산
+    days = RANGES[range_key]
+    histories = {item['code']: ranged_history(item['symbol'], days, points, item.get('scale', 1)) for item in SYMBOLS}
+    for metal, symbol in METAL_SYMBOLS.items():
+        histories[metal] = ranged_history(symbol, days, points)
+    return histories
+
+
+def ranged_indices(data, range_key, points):
+    """응답의 히스토리들을 range 기간, 최대 points 개로 교체 (현재가/등락률은 그대로)"""
+    histories = _ranged_histories(get_price_store().version, range_key, points)
+    result = dict(data)
+    for section in ('crypto', 'forex'):
+        result[section] = [{**asset, 'history': histories[asset['code']]} for asset in data[section]]
+    result['gold'] = histories['gold']
+    result['silver'] = histories['silver']
+    result['range'] = range_key
+    result['points'] = points
+    return result
+
+
+def asset_analytics():
+    """자산 코드 -> 미리 계산된 지표 (수익률/변동성/최대 낙폭, % 단위). 계산 전이면 None"""
+    metrics = get_analytics().get('symbols', {})
+    symbols = {**{item['code']: item['symbol'] for item in SYMBOLS}, **METAL_SYMBOLS}
+    return {
+        # last_close 는 배율(엔화 x100) 적용 전 값이라 빼고, 현재가는 price 를 씀
+        code: {key: value for key, value in metrics[symbol].items() if key != 'last_close'} if symbol in metrics else None
+        for code, symbol in symbols.items()
+    }
+
+
+def build_market_indices():
+    assets = {key: fetch_asset(key) for key in ASSET_KINDS}
+    return join_assets(assets)
+
+
+def refresh_market_data():
+    """업스트림에서 새로 받아 스냅샷으로 저장 (스케줄러 워커에서 호출)"""
+    data = build_market_indices()
+    # 자산별로 언제 받은 값인지 (웹 프로세스의 메모리 캐시가 신선도 판단에 사용)
+    now = time.time()
+    data['fetched_at'] = {key: now for key in split_assets(data)}
+    MarketSnapshot.objects.update_or_create(key=MARKET_SNAPSHOT_KEY, defaults={'data': data})
+    return {key: len(data[key]) for key in ('gold', 'silver', 'crypto', 'forex')}
+
+
+def save_asset(key, value, fetched_at):
+    """
+    자산 하나만 스냅샷에 반영 (나머지 자산은 그대로)
+    자산별 갱신 스레드/프로세스가 동시에 부르므로, 읽기 전에 UPDATE 한 문장으로 쓰기 락부터 잡음
+    (SELECT 로 읽기 락을 먼저 잡으면 두 쓰기가 서로 쓰기 락으로 올리지 못해 바로 "database is locked")
+    """
+    with _save_lock, transaction.atomic():
+        MarketSnapshot.objects.filter(key=MARKET_SNAPSHOT_KEY).update(updated_at=timezone.now())
+        snapshot, _ = MarketSnapshot.objects.get_or_create(key=MARKET_SNAPSHOT_KEY)
+        assets = split_assets(snapshot.data or {})
+        assets[key] = value
+        times = dict((snapshot.data or {}).get('fetched_at') or {})
+        times[key] = fetched_at
+        snapshot.data = {**join_assets(assets), 'fetched_at': times}
+        snapshot.save()
+
+
+def load_market_indices():
+    """저장된 스냅샷만 읽는다. 아직 한 번도 수집되지 않았다면 None"""
+    snapshot = MarketSnapshot.objects.filter(key=MARKET_SNAPSHOT_KEY).first()
+    return snapshot
+
+
+def snapshot_assets(snapshot):
+    """스냅샷 -> {자산 키: (값, 받은 시각 epoch)} (예전 형식이면 updated_at 을 받은 시각으로 봄)"""
+    if snapshot is None:
+        return {}
+    times = (snapshot.data or {}).get('fetched_at') or {}
+    default = snapshot.updated_at.timestamp()
+    return {key: (value, times.get(key, default)) for key, value in split_assets(snapshot.data or {}).items()}
@@ -0,0 +1,111 @@
+# backend/services/market_cache.py
+# ------------------------------------------------------
+# 시장 지수(코인/환율/금/은) 메모리 캐시
+# - 자산마다 TTL 이 다름 (코인은 자주, 금/은 엑셀은 드물게)
+# - TTL 이 지나도 요청은 기다리지 않고 갖고 있는 값을 바로 응답하고,
+#   백그라운드 스레드가 그 자산만 새로 받아옴 (stale-while-revalidate)
+# - 새로 받을 때는 먼저 스냅샷(DB)을 보고, 워커가 이미 갱신해 뒀으면 업스트림을 부르지 않음
+# - 응답에 자산별 캐시 나이(초)를 같이 내려줌
+# ------------------------------------------------------
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .market import ASSET_KINDS, fetch_asset, join_assets, load_market_indices, save_asset, snapshot_assets
+
+# 자산 종류별 TTL (초)
+TTLS = {
+    'crypto': getattr(settings, 'MARKET_CRYPTO_TTL', 60),
+    'forex': getattr(settings, 'MARKET_FOREX_TTL', 300),
+    'metal': getattr(settings, 'MARKET_METAL_TTL', 3600),
+}
+# 갱신에 실패한 자산은 이 시간 동안 다시 시도하지 않음 (업스트림 장애 때 요청마다 스레드가 뜨지 않도록)
+RETRY_SECONDS = 30
+
+
+class MarketCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries = {}  # 자산 키 -> (값, 받은 시각 epoch)
+        self.refreshing = set()
+        self.failed_at = {}
+        self.loaded = False
+
+    def _seed(self):
+        # 프로세스가 뜬 뒤 첫 요청: 스냅샷을 그대로 메모리에 올림 (업스트림 호출 없음)
+        entries = snapshot_assets(load_market_indices())
+        with self._lock:
+            if not self.loaded:
+                self.entries.update(entries)
+                self.loaded = True
+
+    def is_stale(self, key, now):
+        entry = self.entries.get(key)
+        return entry is None or now - entry[1] > TTLS[ASSET_KINDS[key]]
+
+    def get(self):
+        """메모리에 있는 값으로 응답 데이터를 만들고, 오래된 자산은 백그라운드 갱신 시작"""
+        if not self.loaded:
+            self._seed()
+
+        now = time.time()
+        for key in ASSET_KINDS:
+            if self.is_stale(key, now):
+                self.refresh_async(key, now)
+
+        entries = dict(self.entries)
+        data = join_assets({key: value for key, (value, _) in entries.items()})
+        data['cache_age'] = {
+            key: round(now - entries[key][1]) if key in entries else None for key in ASSET_KINDS
+        }
+        return data
+
+    def refresh_async(self, key, now):
+        with self._lock:
+            if key in self.refreshing or now - self.failed_at.get(key, 0) < RETRY_SECONDS:
+                return
+            self.refreshing.add(key)
+        threading.Thread(target=self.refresh, args=(key,), daemon=True).start()
+
+    def refresh(self, key):
+        try:
+            now = time.time()
+            # 워커(또는 다른 웹 프로세스)가 이미 새로 받아 뒀으면 그 값을 씀
+            stored = snapshot_assets(load_market_indices()).get(key)
+            if stored and now - stored[1] <= TTLS[ASSET_KINDS[key]]:
+                entry = stored
+            else:
+                value = fetch_asset(key)
+                if value is None:
+                    self.failed_at[key] = now
+                    return
+                entry = (value, now)
+                save_asset(key, value, now)
+
+            with self._lock:
+                current = self.entries.get(key)
+                if current is None or current[1] < entry[1]:
+                    self.entries[key] = entry
+        except Exception as e:
+            print(f"Error refreshing market cache {key}: {e}")
+            self.failed_at[key] = time.time()
+        finally:
+            with self._lock:
+                self.refreshing.discard(key)
+            # 백그라운드 스레드가 연 DB 연결 정리
+            connection.close()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.failed_at.clear()
+            self.loaded = False
+
+
+_cache = MarketCache()
+
+
+def get_market_cache():
+    return _cache
@@ -0,0 +1,157 @@
+# backend/services/metal_store.py
+# ------------------------------------------------------
+# 금/은 시세 컬럼 저장소
+# - 엑셀(data/*_prices.xlsx)은 파일이 바뀌었을 때만 한 번 읽어서
+#   날짜/종가 컬럼을 .npy 파일로 저장 (data/cache/)
+# - 읽을 때는 np.load(mmap_mode='r') 로 메모리 매핑 -> 최근 N개는 복사 없이 슬라이스
+# - 요청 처리 중에는 openpyxl/pandas 를 쓰지 않음
+# ------------------------------------------------------
+import json
+import os
+import threading
+
+from django.conf import settings
+import numpy as np
+import pandas as pd
+
+from .timeseries import history_columns, to_records
+
+STORE_DIR = getattr(settings, 'MARKET_STORE_DIR', os.path.join(settings.BASE_DIR, 'data', 'cache'))
+MANIFEST = os.path.join(STORE_DIR, 'metals.json')
+
+# 금속 -> 원본 엑셀 파일
+SOURCES = {
+    'gold': os.path.join(settings.BASE_DIR, 'data', 'Gold_prices.xlsx'),
+    'silver': os.path.join(settings.BASE_DIR, 'data', 'Silver_prices.xlsx'),
+}
+PRICE_COLUMNS = ['Close/Last', 'Price', 'Close', 'USD (PM)']
+
+
+def parse_workbook(path):
+    """엑셀 -> (날짜 datetime64[D] 배열, 종가 float64 배열), 날짜 오름차순"""
+    df = pd.read_excel(path)
+    df.columns = df.columns.str.strip()
+    price_col = next((col for col in PRICE_COLUMNS if col in df.columns), None)
+    if not price_col:
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.float64)
+
+    prices = df[price_col]
+    # "1,967.10" / "$24.5" 같은 문자열 컬럼 (pandas 3 부터는 object 가 아니라 str dtype 이라 dtype 으로 판단하지 않음)
+    if not pd.api.types.is_numeric_dtype(prices):
+        prices = prices.astype(str).str.replace(',', '').str.replace('$', '')
+
+    frame = pd.DataFrame({
+        'date': pd.to_datetime(df['Date'], errors='coerce'),
+        'close': pd.to_numeric(prices, errors='coerce'),
+    }).dropna().sort_values('date', kind='stable')
+    return frame['date'].to_numpy(dtype='datetime64[D]'), frame['close'].to_numpy(dtype=np.float64)
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _column_path(metal, column):
+    return os.path.join(STORE_DIR, f'{metal}_{column}.npy')
+
+
+def _save_column(metal, column, values):
+    # 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 임시 파일에 쓰고 교체
+    path = _column_path(metal, column)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp, path)
+
+
+def read_manifest():
+    try:
+        with open(MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_store(force=False):
+    """
+    원본 엑셀이 바뀐 금속만 다시 변환. 반환값: {금속: 'built' | 'unchanged' | 'missing'}
+    (스케줄러 워커 / build_market_store 명령에서 호출)
+    """
+    os.makedirs(STORE_DIR, exist_ok=True)
+    manifest = read_manifest()
+    result = {}
+    for metal, path in SOURCES.items():
+        if not os.path.exists(path):
+            result[metal] = 'missing'
+            continue
+
+        signature = source_signature(path)
+        built = all(os.path.exists(_column_path(metal, column)) for column in ('dates', 'close'))
+        if not force and built and manifest.get(metal, {}).get('source') == signature:
+            result[metal] = 'unchanged'
+            continue
+
+        dates, close = parse_workbook(path)
+        _save_column(metal, 'dates', dates)
+        _save_column(metal, 'close', close)
+        manifest[metal] = {'source': signature, 'rows': len(close)}
+        result[metal] = 'built'
+
+    if 'built' in result.values():
+        tmp = f'{MANIFEST}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, MANIFEST)
+    return result
+
+
+class MetalStore:
+    """변환된 .npy 를 메모리 매핑해서 들고 있음 (manifest 가 바뀌면 다시 매핑)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.columns = {}
+        self.version = None
+
+    def ensure_current(self):
+        try:
+            version = os.stat(MANIFEST).st_mtime_ns
+        except OSError:
+            version = None
+        if version == self.version:
+            return
+
+        columns = {}
+        for metal in SOURCES:
+            try:
+                columns[metal] = (
+                    np.load(_column_path(metal, 'dates'), mmap_mode='r'),
+                    np.load(_column_path(metal, 'close'), mmap_mode='r'),
+                )
+            except (OSError, ValueError):
+                continue
+        with self._lock:
+            self.columns, self.version = columns, version
+
+    def tail(self, metal, n=50):
+        """최근 n개의 (날짜, 종가) 배열 뷰 (복사 없음). 저장소가 없으면 None"""
+        if metal not in self.columns:
+            return None
+        dates, close = self.columns[metal]
+        return dates[-n:], close[-n:]
+
+    def history(self, metal, n=50):
+        """응답용 [{'Date': 'YYYY-MM-DD', 'Close/Last': float}, ...]"""
+        columns = self.tail(metal, n)
+        if columns is None:
+            return None
+        return to_records(history_columns(*columns))
+
+
+_store = MetalStore()
+
+
+def get_metal_store():
+    _store.ensure_current()
+    return _store
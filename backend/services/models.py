@@ -1,3 +1,31 @@
 from django.db import models
 
-# Create your models here.
+# 스케줄러 워커가 미리 수집해 둔 시장 데이터 (API 는 이것만 읽음)
+class MarketSnapshot(models.Model):
+    key = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.updated_at})"
+
+
+# 종목별 일봉 (코인/환율/ETF/금은) - 새로 받을 때는 마지막 저장 날짜 이후만 추가
+class PriceBar(models.Model):
+    symbol = models.CharField(max_length=20)  # yfinance 티커 (금/은은 GOLD, SILVER)
+    date = models.DateField()
+    open = models.FloatField(null=True, blank=True)
+    high = models.FloatField(null=True, blank=True)
+    low = models.FloatField(null=True, blank=True)
+    close = models.FloatField()
+    volume = models.FloatField(null=True, blank=True)
+    dividend = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            # (종목, 날짜) 유니크 인덱스가 기간 조회 / 마지막 날짜 조회도 처리
+            models.UniqueConstraint(fields=['symbol', 'date'], name='uniq_price_bar_symbol_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} {self.date} {self.close}"
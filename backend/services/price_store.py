@@ -0,0 +1,209 @@
+# backend/services/price_store.py
+# ------------------------------------------------------
+# 종목별 일봉 로컬 저장소 (PriceBar 테이블)
+# - backfill: 처음 보는 종목만 긴 기간(HISTORY_PERIOD)을 받고,
+#   이미 있는 종목은 마지막 저장 날짜부터만 받음
+#   (마지막 날은 장중에 받은 미완성 봉일 수 있어서 다시 받아 덮어씀)
+# - 기간 조회는 프로세스 메모리의 NumPy 배열에서 searchsorted 로 잘라서 처리 (DB 왕복 없음)
+# - 저장할 때마다 버전을 올려서 다른 프로세스의 메모리 배열도 다시 읽게 하고, 지표(analytics)도 다시 계산
+# ------------------------------------------------------
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Max
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from .models import MarketSnapshot, PriceBar
+
+# 처음 보는 종목을 받을 기간 (yfinance period)
+HISTORY_PERIOD = getattr(settings, 'PRICE_HISTORY_PERIOD', '5y')
+BULK_BATCH_SIZE = 500
+OHLC_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'dividend']
+# 버전은 MarketSnapshot 의 한 행(updated_at)으로 관리
+VERSION_KEY = 'price-bars'
+# 다른 프로세스에서 저장했는지 DB 로 확인하는 간격 (초)
+VERSION_CHECK_SECONDS = 5
+
+
+def price_version():
+    return MarketSnapshot.objects.filter(key=VERSION_KEY).values_list('updated_at', flat=True).first()
+
+
+def bump_price_version(symbols):
+    previous = price_version()
+    snapshot, _ = MarketSnapshot.objects.update_or_create(key=VERSION_KEY, defaults={'data': {'symbols': sorted(symbols)}})
+    _store.invalidate(symbols, previous, snapshot.updated_at)
+    # 새 일봉이 들어온 종목의 수익률/변동성 등 지표만 바로 다시 계산 (analytics 가 이 모듈을 import 하므로 여기서 import)
+    from .analytics import refresh_analytics
+    refresh_analytics(symbols)
+
+
+def last_dates(symbols):
+    """{종목: 마지막 저장 날짜} (저장된 적 없는 종목은 빠짐)"""
+    rows = PriceBar.objects.filter(symbol__in=symbols).values('symbol').annotate(last=Max('date'))
+    return {row['symbol']: row['last'] for row in rows}
+
+
+def _column(frame, name):
+    # NaN -> None (DB 에 NULL 로)
+    if name not in frame:
+        return [None] * len(frame)
+    values = frame[name].astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+def save_frame(symbol, frame):
+    """
+    yfinance 일봉 DataFrame -> PriceBar upsert. 새로 생기거나 값이 바뀐 행 수 반환
+    (backfill 은 마지막 저장 날짜부터 다시 받으므로 저장된 값과 같은 봉은 쓰지 않음 -> 0 이면 버전도 그대로)
+    """
+    frame = frame.dropna(subset=['Close'])
+    if frame.empty:
+        return 0
+
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    dates = index.date
+    columns = [_column(frame, name) for name in ('Open', 'High', 'Low', 'Close', 'Volume')]
+    dividends = frame['Dividends'].fillna(0).tolist() if 'Dividends' in frame else [0] * len(frame)
+
+    bars = [
+        PriceBar(symbol=symbol, date=day, open=o, high=h, low=l, close=c, volume=v, dividend=d)
+        for day, o, h, l, c, v, d in zip(dates, *columns, dividends)
+    ]
+    stored = {
+        row[0]: row[1:]
+        for row in PriceBar.objects.filter(symbol=symbol, date__gte=min(dates), date__lte=max(dates))
+        .values_list('date', *OHLC_FIELDS)
+    }
+    bars = [bar for bar in bars if stored.get(bar.date) != tuple(getattr(bar, name) for name in OHLC_FIELDS)]
+    if not bars:
+        return 0
+    PriceBar.objects.bulk_create(
+        bars, batch_size=BULK_BATCH_SIZE,
+        update_conflicts=True, unique_fields=['symbol', 'date'], update_fields=OHLC_FIELDS,
+    )
+    return len(bars)
+
+
+def save_series(symbol, dates, closes):
+    """종가만 있는 시계열(금/은 엑셀 등) 저장"""
+    frame = pd.DataFrame({'Close': np.asarray(closes, dtype=np.float64)}, index=pd.DatetimeIndex(dates))
+    saved = save_frame(symbol, frame)
+    if saved:
+        bump_price_version([symbol])
+    return saved
+
+
+def _ticker_frame(data, symbol):
+    # group_by='ticker' 결과는 (티커, 컬럼) 2단 컬럼
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return None
+        return data[symbol]
+    return data
+
+
+def backfill(symbols):
+    """
+    종목들의 일봉을 마지막 저장 날짜 이후만 받아서 저장.
+    같은 시작 날짜끼리 묶어 yf.download 한 번으로 받음. 반환값: {종목: 저장한 행 수}
+    """
+    symbols = list(dict.fromkeys(symbols))
+    last = last_dates(symbols)
+
+    groups = {}
+    for symbol in symbols:
+        groups.setdefault(last.get(symbol), []).append(symbol)
+
+    saved = {}
+    for start, group in groups.items():
+        kwargs = {'period': HISTORY_PERIOD} if start is None else {'start': start.isoformat()}
+        try:
+            data = yf.download(
+                group, interval='1d', group_by='ticker',
+                actions=True, auto_adjust=False, threads=True, progress=False, **kwargs,
+            )
+        except Exception as e:
+            print(f"일봉 다운로드 실패 ({', '.join(group)}): {e}")
+            continue
+
+        for symbol in group:
+            frame = _ticker_frame(data, symbol)
+            saved[symbol] = save_frame(symbol, frame) if frame is not None else 0
+
+    if any(saved.values()):
+        bump_price_version([symbol for symbol, count in saved.items() if count])
+    return saved
+
+
+class PriceStore:
+    """종목별 (날짜 datetime64[D], 종가, 배당) 배열을 메모리에 들고 있고 기간 조회는 배열 슬라이스로"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.series = {}
+        self.version = None
+        self.checked_at = 0
+
+    def invalidate(self, symbols, previous, version):
+        """
+        이 프로세스에서 저장한 종목만 다시 읽게 함.
+        그 사이 다른 프로세스도 저장했으면(알고 있던 버전이 previous 가 아니면) 전부 다시 읽음
+        """
+        with self._lock:
+            if self.version == previous:
+                for symbol in symbols:
+                    self.series.pop(symbol, None)
+            else:
+                self.series = {}
+            self.version = version
+
+    def ensure_current(self):
+        now = time.monotonic()
+        if now - self.checked_at < VERSION_CHECK_SECONDS:
+            return
+        version = price_version()
+        with self._lock:
+            if version != self.version:
+                self.series = {}
+                self.version = version
+            self.checked_at = now
+
+    def load(self, symbol):
+        series = self.series.get(symbol)
+        if series is None:
+            rows = list(PriceBar.objects.filter(symbol=symbol).order_by('date').values_list('date', 'close', 'dividend'))
+            dates = np.array([row[0] for row in rows], dtype='datetime64[D]')
+            closes = np.array([row[1] for row in rows], dtype=np.float64)
+            dividends = np.array([row[2] for row in rows], dtype=np.float64)
+            series = (dates, closes, dividends)
+            with self._lock:
+                self.series[symbol] = series
+        return series
+
+    def range(self, symbol, start=None, end=None):
+        """start <= 날짜 <= end 인 (날짜, 종가, 배당) 배열 뷰 (None 이면 끝까지)"""
+        dates, closes, dividends = self.load(symbol)
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, 'D'), side='right')
+        return dates[lo:hi], closes[lo:hi], dividends[lo:hi]
+
+    def last(self, symbol, days):
+        """마지막 저장 날짜 기준 최근 days 일 (오늘 데이터가 없어도 같은 길이의 차트가 나오도록)"""
+        dates = self.load(symbol)[0]
+        if not len(dates):
+            return self.range(symbol)
+        return self.range(symbol, start=dates[-1] - np.timedelta64(days, 'D'))
+
+
+_store = PriceStore()
+
+
+def get_price_store():
+    _store.ensure_current()
+    return _store
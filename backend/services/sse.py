@@ -0,0 +1,156 @@
+# backend/services/sse.py
+# ------------------------------------------------------
+# AI 응답 스트리밍(Server-Sent Events) 공용 도구
+# - 모델이 토큰을 내보내는 대로 클라이언트에 바로 전달 (첫 바이트 대기시간 = 첫 토큰)
+# - JSON 응답은 지정한 키의 배열 원소가 하나 완성될 때마다 꺼내서 먼저 보여줄 수 있게 파싱
+# - WSGI 는 동기 제너레이터를 그대로 흘려보내고,
+#   ASGI 는 동기 제너레이터를 주면 끝까지 모아서(sync_to_async(list)) 한 번에 보내므로
+#   제너레이터를 별도 스레드에서 돌리면서 나오는 대로 넘겨주는 async 이터레이터로 감싼다
+# ------------------------------------------------------
+import asyncio
+import json
+import threading
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import StreamingHttpResponse
+
+
+def sse_event(event, data):
+    """SSE 한 건 (data 는 JSON 으로 직렬화)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+_END = object()
+
+
+async def stream_in_thread(events):
+    """동기 제너레이터 events 를 스레드 하나에서 돌리면서 만들어지는 대로 yield (ASGI 용)"""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # 응답이 끝나기 전에 루프가 닫힘 (서버 종료)
+            stop.set()
+
+    def run():
+        try:
+            for chunk in events:
+                if stop.is_set():
+                    break
+                put(chunk)
+        except Exception as e:
+            put(e)
+        finally:
+            events.close()
+            # 이 스레드에서 연 DB 커넥션 정리 (요청 종료 시그널이 닿지 않는 스레드)
+            connections.close_all()
+            put(_END)
+
+    threading.Thread(target=run, daemon=True).start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # 클라이언트가 연결을 끊으면 다음 조각에서 제너레이터를 멈춤
+        stop.set()
+
+
+def sse_response(request, events):
+    """
+    events: SSE 문자열을 내보내는 동기 제너레이터
+    request 가 ASGI 요청이면 스레드에서 돌리는 async 이터레이터로 바꿔서 ASGI 에서도 버퍼링 없이 흘려보냄
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        events = stream_in_thread(events)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx 등 프록시가 모아서 보내지 않도록
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class JsonItemParser:
+    """
+    {"recommendations": [ {...}, {...} ]} 처럼 스트리밍되는 JSON 에서
+    key 에 해당하는 배열의 원소(객체)가 완성될 때마다 하나씩 돌려준다.
+    (다른 키 아래의 배열은 건너뜀, 같은 키가 여러 번 나오면 첫 번째 배열만)
+    끝까지 받은 뒤에는 text() 를 json.loads 해서 빠진 원소가 없는지 확인할 것.
+    """
+
+    def __init__(self, key='recommendations'):
+        self.key = key
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_string = None  # 마지막으로 닫힌 문자열 (다음에 ':' 가 오면 키)
+        self.pending_key = None  # 지금 값을 기다리는 키
+        self.array_depth = None  # 원소를 꺼낼 배열의 깊이
+        self.item_start = None
+        self.element_open = False  # 배열 안에서 아직 끝나지 않은 원소가 있는지
+        self.count = 0  # 지금까지 지나간 배열 원소 수 (객체가 아닌 원소, 파싱 실패한 원소 포함)
+        self.buffer = []
+
+    def feed(self, text):
+        items = []
+        for ch in text:
+            self.buffer.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    self.last_string = ''.join(self.buffer[self.string_start + 1:-1])
+                continue
+
+            if self.array_depth is not None and self.depth == self.array_depth and not ch.isspace():
+                if ch in ',]':
+                    # 원소 하나가 끝남: 전체 파싱의 items[count:] 와 위치가 맞도록 종류와 관계없이 셈
+                    if self.element_open:
+                        self.count += 1
+                    self.element_open = False
+                else:
+                    self.element_open = True
+
+            if ch == '"':
+                self.in_string = True
+                self.string_start = len(self.buffer) - 1
+            elif ch == ':':
+                self.pending_key, self.last_string = self.last_string, None
+            elif ch == ',':
+                self.pending_key = None
+            elif ch in '[{':
+                if ch == '[' and self.array_depth is None and self.pending_key == self.key:
+                    self.array_depth = self.depth + 1
+                elif ch == '{' and self.array_depth is not None and self.depth == self.array_depth:
+                    self.item_start = len(self.buffer) - 1
+                self.pending_key = None
+                self.depth += 1
+            elif ch in ']}':
+                if ch == '}' and self.item_start is not None and self.depth == self.array_depth + 1:
+                    raw = ''.join(self.buffer[self.item_start:])
+                    self.item_start = None
+                    try:
+                        items.append(json.loads(raw))
+                    except ValueError:
+                        pass
+                elif ch == ']' and self.depth == self.array_depth:
+                    self.array_depth = -1  # 배열이 끝나면 더 이상 꺼내지 않음
+                self.pending_key = None
+                self.depth -= 1
+        return items
+
+    def text(self):
+        return ''.join(self.buffer)
@@ -1,3 +1,489 @@
-from django.test import TestCase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase
+import numpy as np
+from openai import InternalServerError, OpenAI
+import pandas as pd
+from rest_framework.test import APIClient
+
+from . import ai_client, metal_store
+from .analytics import clean_series, compute_correlation, compute_metrics, get_analytics
+from .llm_cache import LLMCache, query_key
+from .management.commands.build_market_store import legacy_history, per_call_ms
+from .market import fetch_metals
+from .models import MarketSnapshot, PriceBar
+from .price_store import backfill, bump_price_version
+from .timeseries import downsample, lttb
+from .upstream import get_json
+from .views import CONSULT_MODEL
+
+
+def daily_frame(start, closes):
+    """yfinance 일봉 형식의 DataFrame"""
+    closes = [float(c) for c in closes]
+    return pd.DataFrame(
+        {'Open': closes, 'High': closes, 'Low': closes, 'Close': closes,
+         'Volume': [1000.0] * len(closes), 'Dividends': [0.0] * len(closes)},
+        index=pd.date_range(start, periods=len(closes), freq='D'),
+    )
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """/chat/completions 만 흉내 내는 OpenAI 호환 스텁 (server.release 가 열릴 때까지 응답을 붙잡아 둘 수 있음)"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.calls += 1
+        self.server.release.wait(5)
+
+        if self.server.status == 200:
+            payload = {
+                'id': 'fake', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+                'choices': [{
+                    'index': 0, 'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': f"답변: {body['messages'][-1]['content']}"},
+                }],
+                'usage': {'prompt_tokens': 3, 'completion_tokens': 2, 'total_tokens': 5},
+            }
+        else:
+            payload = {'error': {'message': 'upstream down', 'type': 'server_error'}}
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeOpenAIMixin:
+    """테스트 클래스마다 로컬 스텁 서버를 띄우고 ai_client 가 그 서버를 쓰게 함"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOpenAIHandler)
+        cls.server.lock = threading.Lock()
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        client = OpenAI(api_key='test', base_url=f"http://127.0.0.1:{cls.server.server_port}", max_retries=0)
+        cls.client_patch = mock.patch.object(ai_client, '_client', client)
+        cls.client_patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client_patch.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.calls = 0
+        self.server.status = 200
+        self.server.release = threading.Event()
+        self.server.release.set()
+
+    def run_threads(self, count, target):
+        """target(i) 를 count 개 스레드에서 동시에 실행 -> (스레드들, [(결과, 에러), ...])"""
+        results = [None] * count
+
+        def run(i):
+            try:
+                results[i] = (target(i), None)
+            except Exception as e:
+                results[i] = (None, e)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('시간 안에 조건이 만족되지 않음')
+        time.sleep(0.01)
+
+
+class LLMCacheTests(FakeOpenAIMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = LLMCache(maxsize=8, ttl=60)
+
+    def ask(self, query):
+        key = query_key('gpt-test', 'system', query)
+        return self.cache.get_or_call(key, lambda: ai_client.chat('gpt-test', [{'role': 'user', 'content': query}]))
+
+    def test_miss_then_hit_for_equivalent_question(self):
+        self.assertEqual(self.ask('예금 vs 적금 차이?'), '답변: 예금 vs 적금 차이?')
+        # 공백/끝 문장부호만 다른 질문은 캐시에서 바로
+        self.assertEqual(self.ask('예금vs적금 차이'), '답변: 예금 vs 적금 차이?')
+        self.assertEqual(self.server.calls, 1)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+
+    def test_concurrent_callers_share_one_upstream_call(self):
+        self.server.release.clear()
+        threads, results = self.run_threads(8, lambda i: self.ask('ETF 가 뭐야?'))
+        # 첫 요청이 스텁에서 붙잡혀 있는 동안 나머지는 모두 그 호출을 기다림
+        wait_until(lambda: self.cache.shared == 7)
+        self.server.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.server.calls, 1)
+        self.assertEqual(results, [('답변: ETF 가 뭐야?', None)] * 8)
+
+    def test_error_reaches_every_waiting_caller(self):
+        self.server.status = 500
+        self.server.release.clear()
+        threads, results = self.run_threads(4, lambda i: self.ask('금리 전망'))
+        wait_until(lambda: self.cache.shared == 3)
+        self.server.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.server.calls, 1)
+        for value, error in results:
+            self.assertIsNone(value)
+            self.assertIsInstance(error, InternalServerError)
+        # 실패한 응답은 캐시하지 않음
+        self.server.status = 200
+        self.assertEqual(self.ask('금리 전망'), '답변: 금리 전망')
+        self.assertEqual(self.server.calls, 2)
+
+    def test_follower_stops_waiting_for_hung_leader(self):
+        self.cache.wait_timeout = 0.1
+        started = threading.Event()
+        hung = threading.Event()
+
+        def leader_call():
+            started.set()
+            hung.wait(5)
+            return 'late'
+
+        leader = threading.Thread(target=self.cache.get_or_call, args=('key', leader_call))
+        leader.start()
+        started.wait(5)
+        try:
+            self.assertEqual(self.cache.get_or_call('key', lambda: 'own call'), 'own call')
+            self.assertEqual(self.cache.wait_timeouts, 1)
+        finally:
+            hung.set()
+            leader.join()
+
+
+class LttbTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.x = np.arange(2000)
+        self.y = 100 + rng.normal(0, 1, 2000).cumsum()
+        # 하루짜리 급등/급락: 주변 평균으로는 절대 뽑히지 않을 점
+        self.y[613] = self.y.max() + 50
+        self.y[1402] = self.y.min() - 50
+
+    def test_keeps_endpoints_and_extremes(self):
+        for points in (4, 10, 100, 500):
+            with self.subTest(points=points):
+                picked = lttb(self.x, self.y, points)
+                self.assertEqual(len(picked), points)
+                # 시간 순서 그대로, 중복 없음
+                self.assertTrue(np.all(np.diff(picked) > 0))
+                self.assertEqual(picked[0], 0)
+                self.assertEqual(picked[-1], len(self.y) - 1)
+                self.assertIn(613, picked)
+                self.assertIn(1402, picked)
+
+    def test_extremes_in_same_bucket_keep_minimum(self):
+        # points=3 이면 가운데 구간이 하나뿐
+        picked = lttb(self.x, self.y, 3)
+        self.assertEqual(picked.tolist(), [0, 1402, len(self.y) - 1])
+
+    def test_short_series_is_unchanged(self):
+        self.assertEqual(lttb(self.x[:50], self.y[:50], 100).tolist(), list(range(50)))
+        self.assertEqual(lttb(self.x[:50], self.y[:50], 2).tolist(), list(range(50)))
+
+    def test_downsample_returns_matching_dates_and_values(self):
+        dates = np.datetime64('2020-01-01') + np.arange(len(self.y))
+        small_dates, small_values = downsample(dates, self.y, 50)
+        self.assertEqual(len(small_dates), 50)
+        self.assertEqual(small_dates[0], dates[0])
+        self.assertEqual(small_dates[-1], dates[-1])
+        np.testing.assert_array_equal(small_values, self.y[(small_dates - dates[0]).astype(np.int64)])
+
+
+@mock.patch('services.price_store.bump_price_version')
+class BackfillTests(TestCase):
+    symbol = 'BTC-KRW'
+
+    def backfill(self, frame):
+        with mock.patch('services.price_store.yf.download', return_value=frame) as download:
+            saved = backfill([self.symbol])
+        return saved, download.call_args.kwargs
+
+    def test_unchanged_last_bar_does_not_bump_version(self, bump):
+        saved, _ = self.backfill(daily_frame('2026-01-01', [100, 101, 102]))
+        self.assertEqual(saved, {self.symbol: 3})
+        bump.assert_called_once_with([self.symbol])
+        bump.reset_mock()
+
+        # 마지막 저장 날짜부터 다시 받지만 값이 같으면 저장/버전 갱신 없음
+        saved, kwargs = self.backfill(daily_frame('2026-01-03', [102]))
+        self.assertEqual(kwargs['start'], '2026-01-03')
+        self.assertEqual(saved, {self.symbol: 0})
+        bump.assert_not_called()
+
+    def test_changed_or_new_bars_bump_version(self, bump):
+        self.backfill(daily_frame('2026-01-01', [100, 101, 102]))
+        bump.reset_mock()
+
+        # 장중에 받았던 마지막 봉이 바뀌고 새 봉이 하나 추가됨
+        saved, _ = self.backfill(daily_frame('2026-01-03', [105, 106]))
+        self.assertEqual(saved, {self.symbol: 2})
+        bump.assert_called_once_with([self.symbol])
+        self.assertEqual(
+            list(PriceBar.objects.filter(symbol=self.symbol).order_by('date').values_list('close', flat=True)),
+            [100, 101, 105, 106],
+        )
+
+
+class AnalyticsTests(TestCase):
+    def series(self, closes, start='2025-01-01'):
+        closes = np.asarray(closes, dtype=np.float64)
+        dates = np.datetime64(start) + np.arange(len(closes))
+        return dates, closes, np.zeros(len(closes))
+
+    def walk(self, seed, days=400):
+        return 100 * np.exp(np.random.default_rng(seed).normal(0, 0.01, days).cumsum())
+
+    def test_zero_and_missing_closes_are_skipped(self):
+        closes = self.walk(1)
+        closes[-200] = 0
+        closes[-100] = np.nan
+        metrics = compute_metrics(*clean_series(*self.series(closes)))
+        # inf/NaN 없이 JSON 으로 저장 가능하고, 빠진 날 때문에 지표가 사라지지 않음
+        json.dumps(metrics, allow_nan=False)
+        for key in ('return_1w', 'return_1m', 'return_1y', 'volatility', 'max_drawdown'):
+            self.assertIsNotNone(metrics[key], key)
+        self.assertGreater(metrics['max_drawdown'], -100)
+
+    def test_correlation_with_constant_series(self):
+        a = self.walk(2)
+        series = {
+            'A': self.series(a)[:2],
+            'B': self.series(a * 2)[:2],
+            'FLAT': self.series(np.full(400, 50.0))[:2],
+        }
+        result = compute_correlation(series)
+        json.dumps(result, allow_nan=False)
+        self.assertEqual(result['symbols'], ['A', 'B', 'FLAT'])
+        self.assertEqual(result['matrix'][0][1], 1.0)
+        # 값이 한 번도 안 바뀐 종목은 상관계수를 정할 수 없음
+        self.assertIsNone(result['matrix'][0][2])
+
+    def save_bars(self, symbol, closes):
+        dates, closes, _ = self.series(closes, start='2026-01-01')
+        PriceBar.objects.bulk_create(
+            [PriceBar(symbol=symbol, date=day, close=close) for day, close in zip(dates.tolist(), closes.tolist())],
+            update_conflicts=True, unique_fields=['symbol', 'date'], update_fields=['close'],
+        )
+
+    def test_bar_update_recomputes_only_changed_symbol(self):
+        self.save_bars('AAA', self.walk(3, days=60))
+        self.save_bars('BBB', self.walk(4, days=60))
+        # 처음에는 저장된 지표가 없으므로 상관계수까지 전부 계산
+        bump_price_version(['AAA', 'BBB'])
+        before = get_analytics()
+        self.assertEqual(before['correlation']['symbols'], ['AAA', 'BBB'])
+
+        self.save_bars('AAA', self.walk(3, days=59).tolist() + [500])
+        with mock.patch('services.analytics.compute_correlation') as correlation:
+            bump_price_version(['AAA'])
+        correlation.assert_not_called()
+
+        after = get_analytics()
+        self.assertEqual(after['symbols']['AAA']['last_close'], 500)
+        self.assertEqual(after['symbols']['BBB'], before['symbols']['BBB'])
+        self.assertEqual(after['correlation'], before['correlation'])
+        json.dumps(MarketSnapshot.objects.get(key='analytics').data, allow_nan=False)
+
+
+class AIConcurrencyLimitTests(FakeOpenAIMixin, SimpleTestCase):
+    """동시 호출 2개 + 대기 1개가 차 있으면 다음 요청은 기다리지 않고 바로 503"""
+
+    def setUp(self):
+        super().setUp()
+        for patch in (
+            mock.patch.object(ai_client, '_slots', threading.BoundedSemaphore(2)),
+            mock.patch.object(ai_client, 'MAX_WAITING', 1),
+            mock.patch.object(ai_client, 'QUEUE_TIMEOUT', 5),
+            # 질문마다 새로 호출되도록 빈 캐시
+            mock.patch('services.views.get_llm_cache', return_value=LLMCache()),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def consult(self, query):
+        return APIClient().post('/services/ai-consult/', {'query': query}, format='json')
+
+    def rejected(self):
+        return ai_client.metrics()['models'].get(CONSULT_MODEL, {}).get('rejected', 0)
+
+    def test_full_queue_rejects_immediately_and_recovers(self):
+        rejected = self.rejected()
+        self.server.release.clear()
+        queries = ['첫째 질문', '둘째 질문', '셋째 질문']
+        threads, results = self.run_threads(3, lambda i: self.consult(queries[i]))
+        wait_until(lambda: self.server.calls == 2 and ai_client.metrics()['waiting'] == 1)
+        self.assertEqual(ai_client.metrics()['in_flight'], 2)
+
+        started = time.monotonic()
+        response = self.consult('넷째 질문')
+        self.assertEqual(response.status_code, 503)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.rejected(), rejected + 1)
+
+        self.server.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([response.status_code for response, _ in results], [200, 200, 200])
+        self.assertEqual(self.server.calls, 3)
+
+        # 자리/카운터가 모두 원래대로
+        state = ai_client.metrics()
+        self.assertEqual((state['in_flight'], state['waiting']), (0, 0))
+        self.assertTrue(ai_client._slots.acquire(blocking=False))
+        self.assertTrue(ai_client._slots.acquire(blocking=False))
+        self.assertFalse(ai_client._slots.acquire(blocking=False))
+        ai_client._slots.release()
+        ai_client._slots.release()
+        self.assertEqual(self.consult('다섯째 질문').status_code, 200)
+
+
+class MetalStoreTests(TestCase):
+    """엑셀 -> .npy 변환 결과를 메모리 매핑으로 읽은 응답이 예전 엑셀 파싱 응답과 같은지"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        store_dir = os.path.join(self.tmp.name, 'cache')
+        self.sources = {metal: os.path.join(self.tmp.name, f'{metal}.xlsx') for metal in ('gold', 'silver')}
+        for patch in (
+            mock.patch.object(metal_store, 'STORE_DIR', store_dir),
+            mock.patch.object(metal_store, 'MANIFEST', os.path.join(store_dir, 'metals.json')),
+            mock.patch.object(metal_store, 'SOURCES', self.sources),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.write_workbook('gold', 1900)
+        self.write_workbook('silver', 24)
+
+    def write_workbook(self, metal, base, days=80):
+        # 나스닥 내보내기처럼 최신 날짜가 위, 가격은 "$1,967.10" 같은 문자열
+        dates = pd.date_range('2025-01-01', periods=days, freq='D')[::-1]
+        prices = [f"${base + i * 1.25:,.2f}" for i in range(days)]
+        pd.DataFrame({'Date': dates.strftime('%m/%d/%Y'), 'Close/Last': prices}).to_excel(self.sources[metal], index=False)
+
+    def test_mapped_history_matches_excel_response(self):
+        self.assertEqual(metal_store.build_store(), {'gold': 'built', 'silver': 'built'})
+        store = metal_store.MetalStore()
+        store.ensure_current()
+
+        for metal, path in self.sources.items():
+            with self.subTest(metal=metal):
+                self.assertIsInstance(store.columns[metal][1], np.memmap)
+                history = store.history(metal)
+                self.assertEqual(len(history), 50)
+                self.assertEqual(json.loads(json.dumps(history)), legacy_history(path))
+                # 요청당 비용: 엑셀 파싱(ms) 대비 슬라이스(µs) - 여유 있게 10배 이상만 확인
+                self.assertLess(per_call_ms(lambda: store.history(metal), 200) * 10, per_call_ms(lambda: legacy_history(path), 3))
+
+    def test_only_changed_workbook_is_rebuilt(self):
+        metal_store.build_store()
+        self.assertEqual(metal_store.build_store(), {'gold': 'unchanged', 'silver': 'unchanged'})
+
+        self.write_workbook('silver', 30, days=90)
+        self.assertEqual(metal_store.build_store(), {'gold': 'unchanged', 'silver': 'built'})
+        store = metal_store.MetalStore()
+        store.ensure_current()
+        self.assertEqual(store.history('silver'), legacy_history(self.sources['silver']))
+
+    @mock.patch('services.market.save_series')
+    def test_fetch_metals(self, save_series):
+        result = fetch_metals()
+        self.assertEqual(result['gold'], legacy_history(self.sources['gold']))
+        self.assertEqual(result['silver'], legacy_history(self.sources['silver']))
+        # 새로 변환한 금/은은 일봉 저장소에도 저장
+        self.assertEqual(sorted(call.args[0] for call in save_series.call_args_list), ['GOLD', 'SILVER'])
+
+    @mock.patch('services.market.save_series')
+    def test_fetch_metals_needs_both_workbooks(self, save_series):
+        # 예전 응답처럼 금/은 중 하나라도 엑셀이 없으면 둘 다 없음 (None -> 캐시는 이전 값 유지)
+        os.remove(self.sources['silver'])
+        self.assertIsNone(fetch_metals())
+        save_series.assert_not_called()
+
+
+class CannedResponseHandler(BaseHTTPRequestHandler):
+    """server.responses[경로] = (상태 코드, Content-Type, 본문) 을 그대로 돌려주는 스텁"""
+
+    def do_GET(self):
+        status, content_type, body = self.server.responses[self.path.split('?')[0]]
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class UpstreamJsonTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), CannedResponseHandler)
+        cls.server.responses = {
+            '/ok': (200, 'application/json', '{"documents": []}'.encode()),
+            '/gateway': (502, 'text/html', b'<html><body>Bad Gateway</body></html>'),
+            '/empty': (200, 'application/json', b''),
+            '/search': (503, 'text/html', b'<html>Service Unavailable</html>'),
+        }
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_json_body(self):
+        self.assertEqual(async_to_sync(get_json)(f"{self.base_url}/ok"), (200, {'documents': []}))
+
+    def test_non_json_body_keeps_status_with_error_payload(self):
+        status, data = async_to_sync(get_json)(f"{self.base_url}/gateway")
+        self.assertEqual(status, 502)
+        self.assertIn('error', data)
+        # 성공 코드인데 본문을 읽을 수 없으면 502
+        status, data = async_to_sync(get_json)(f"{self.base_url}/empty")
+        self.assertEqual(status, 502)
+        self.assertIn('error', data)
+
+    def test_view_passes_upstream_error_through(self):
+        with self.settings(YOUTUBE_API_URL=self.base_url, YOUTUBE_API_KEY='test'):
+            response = self.client.get('/youtube/search/', {'q': '재테크'})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('error', response.json())
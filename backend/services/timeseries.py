@@ -0,0 +1,82 @@
+# backend/services/timeseries.py
+# ------------------------------------------------------
+# 시세 히스토리 직렬화 공용 도구
+# - iterrows 로 한 줄씩 dict 를 만들지 않고 날짜 포맷/배율 적용을 컬럼 단위로 처리
+# - 기본 응답 형식: [{'Date': 'YYYY-MM-DD', 'Close/Last': 가격}, ...]
+# - 컬럼 형식: {'dates': [...], 'closes': [...]} (?format=columnar, 키 반복이 없어 응답이 작음)
+# - 긴 기간은 LTTB 로 정해진 점 개수까지 줄임 (고점/저점 모양은 유지)
+# ------------------------------------------------------
+import numpy as np
+import pandas as pd
+
+
+def date_strings(dates):
+    """DatetimeIndex / Series / datetime64 배열 -> 'YYYY-MM-DD' 문자열 리스트"""
+    if isinstance(dates, (pd.DatetimeIndex, pd.Series)):
+        dates = pd.DatetimeIndex(dates)
+        # yfinance 는 거래소 시간대가 붙어 있음 -> 현지 날짜 그대로 사용
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        dates = dates.values
+    return np.datetime_as_string(np.asarray(dates).astype('datetime64[D]'), unit='D').tolist()
+
+
+def history_columns(dates, values, scale=1):
+    """날짜/가격 컬럼 -> {'dates': [...], 'closes': [...]} (scale 은 컬럼 전체에 한 번에 곱함)"""
+    closes = np.asarray(values, dtype=np.float64)
+    if scale != 1:
+        closes = closes * scale
+    return {'dates': date_strings(dates), 'closes': closes.tolist()}
+
+
+def to_records(columns):
+    return [{'Date': date, 'Close/Last': close} for date, close in zip(columns['dates'], columns['closes'])]
+
+
+def to_columns(records):
+    return {
+        'dates': [record['Date'] for record in records],
+        'closes': [record['Close/Last'] for record in records],
+    }
+
+
+def lttb(x, y, points):
+    """
+    Largest-Triangle-Three-Buckets: points 개의 인덱스만 골라서 모양(고점/저점)을 유지하며 줄임
+    x, y 는 같은 길이의 숫자 배열 (x 오름차순). 처음/마지막 점과 전체 최고/최저점을 포함
+    """
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # 처음/마지막을 뺀 나머지를 points - 2 개 구간으로 나눔
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    picked = np.empty(points, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+
+    a = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        # 다음 구간의 평균점과 직전에 고른 점 사이에서 삼각형 넓이가 가장 큰 점
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        picked[i + 1] = a
+
+    # 전체 기간의 최고/최저점은 그 점이 속한 구간의 대표로 넣음 (차트에서 실제 고점/저점이 사라지지 않게)
+    # (points 가 아주 작아서 둘이 같은 구간이면 최저점)
+    for extreme in (int(y.argmax()), int(y.argmin())):
+        if 0 < extreme < n - 1:
+            picked[np.searchsorted(edges, extreme, side='right')] = extreme
+    return picked
+
+
+def downsample(dates, values, points):
+    """(날짜, 값) 배열을 최대 points 개로 줄임 (날짜 간격을 x 로 사용)"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    picked = lttb(dates.astype(np.int64), values, points)
+    return dates[picked], np.asarray(values)[picked]
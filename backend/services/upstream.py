@@ -0,0 +1,99 @@
+# backend/services/upstream.py
+# ------------------------------------------------------
+# 외부 API(카카오, 유튜브) 중계용 공용 비동기 HTTP 클라이언트
+# - httpx.AsyncClient 를 이벤트 루프마다 공유 -> 커넥션 풀 재사용
+#   (ASGI 서버는 프로세스당 루프가 하나라 사실상 프로세스 공용)
+# - 업스트림 응답을 기다리는 동안 워커를 붙잡지 않으므로
+#   한 프로세스에서 수백 개의 업스트림 요청을 동시에 처리할 수 있음
+# - WSGI(runserver) 에서는 async 뷰가 요청마다 새 루프에서 돌기 때문에
+#   클라이언트는 필요할 때 하나씩만 만들고, 루프가 끝날 때 같이 닫음
+# ------------------------------------------------------
+import asyncio
+import ssl
+
+import certifi
+from django.conf import settings
+from django.http import HttpResponse
+import httpx
+import orjson
+
+TIMEOUT = getattr(settings, 'UPSTREAM_TIMEOUT', 10)
+MAX_CONNECTIONS = getattr(settings, 'UPSTREAM_MAX_CONNECTIONS', 200)
+# httpcore 커넥션 풀은 요청마다 풀 전체를 훑어서 동시 요청이 수백 개가 되면 CPU 가 병목이 됨
+# -> 동시 요청이 많아지면 클라이언트를 최대 CLIENT_SHARDS 개까지 늘려서(샤딩) 풀 하나의 크기를 작게 유지
+CLIENT_SHARDS = 16
+PER_CLIENT = max(1, MAX_CONNECTIONS // CLIENT_SHARDS)
+
+# 인증서 묶음을 읽는 SSL 컨텍스트는 클라이언트마다 만들면 느려서(수십 ms) 프로세스 공용으로 하나만
+SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+
+_pools = {}
+
+
+class ClientPool:
+    """이벤트 루프 하나가 쓰는 클라이언트들 (가장 한가한 클라이언트를 고르고, 전부 꽉 찼을 때만 하나 더 만듦)"""
+
+    def __init__(self):
+        self.in_flight = {}
+
+    def acquire(self):
+        client = min(self.in_flight, key=self.in_flight.get, default=None)
+        if client is None or (self.in_flight[client] >= PER_CLIENT and len(self.in_flight) < CLIENT_SHARDS):
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(TIMEOUT, connect=5),
+                limits=httpx.Limits(max_connections=PER_CLIENT, max_keepalive_connections=PER_CLIENT),
+                verify=SSL_CONTEXT,
+            )
+            self.in_flight[client] = 0
+        self.in_flight[client] += 1
+        return client
+
+    def release(self, client):
+        self.in_flight[client] -= 1
+
+    async def close(self):
+        for client in self.in_flight:
+            await client.aclose()
+
+
+async def _close_with_loop(loop, pool):
+    # asyncio.run(ASGI 서버, WSGI 의 async_to_sync 모두)은 끝나기 전에 남은 태스크를 취소하고 기다림
+    # -> 그때 이 루프의 클라이언트들을 닫음
+    try:
+        await loop.create_future()
+    finally:
+        _pools.pop(loop, None)
+        await pool.close()
+
+
+def get_client_pool():
+    loop = asyncio.get_running_loop()
+    entry = _pools.get(loop)
+    if entry is None:
+        pool = ClientPool()
+        # 루프는 태스크를 약한 참조로만 들고 있어서 여기서 참조를 유지
+        entry = _pools[loop] = (pool, loop.create_task(_close_with_loop(loop, pool)))
+    return entry[0]
+
+
+async def get_json(url, params=None, headers=None):
+    """
+    GET 후 (상태 코드, JSON 본문) 반환
+    게이트웨이 HTML 에러 페이지나 빈 본문처럼 JSON 이 아니면 {'error': ...} (성공 코드였으면 502 로)
+    """
+    pool = get_client_pool()
+    client = pool.acquire()
+    try:
+        res = await client.get(url, params=params, headers=headers)
+    finally:
+        pool.release(client)
+    try:
+        return res.status_code, res.json()
+    except ValueError:
+        status = res.status_code if res.status_code >= 400 else 502
+        return status, {'error': f'외부 API 응답을 읽을 수 없습니다 (HTTP {res.status_code})'}
+
+
+def json_response(data, status=200):
+    # async 뷰용 (DRF Response 대신) - orjson 으로 직렬화 (한글은 그대로 UTF-8)
+    return HttpResponse(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY), status=status, content_type='application/json')
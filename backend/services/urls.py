@@ -3,7 +3,10 @@ from . import views
 
 urlpatterns = [
     path('gold-silver/', views.get_market_indices), # 금/은/코인/환율 시세
+    path('market-analytics/', views.market_analytics), # 종목별 수익률/변동성/최대 낙폭 + 상관계수
     path('bank-search/', views.search_bank),       # 은행 지도 검색
     path('route/', views.route_guide),             # 길찾기
     path('ai-consult/', views.ai_financial_consult), # AI 상담
+    path('ai-consult/stream/', views.ai_financial_consult_stream), # AI 상담 (SSE 스트리밍)
+    path('ai-metrics/', views.ai_metrics), # AI 호출 지표 (관리자)
 ]
\ No newline at end of file
@@ -1,184 +1,111 @@
 # backend/services/views.py
 from django.conf import settings
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-import yfinance as yf
 
 # ------------------------------------------------------
-# 1. [F04] 금/은 시세 데이터 (엑셀 파일 읽기)
+# 1. [F04] 금/은/코인/환율 시세 데이터
 # ------------------------------------------------------
-import requests
-import os
-import pandas as pd
+# 외부 API 중계 뷰들은 async 뷰 (ASGI 로 띄우면 업스트림을 기다리는 동안 워커를 붙잡지 않음)
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_GET
+from .analytics import get_analytics
+from .market import DEFAULT_POINTS, MAX_POINTS, RANGES, asset_analytics, columnar_indices, ranged_indices
+from .market_cache import get_market_cache
+from .upstream import get_json, json_response
 
 # [통합] 시장 지수 데이터 가져오기
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def get_market_indices(request):
-    response_data = {
-        'gold': [], 'silver': [], 'crypto': [], 'forex': []
-    }
-
-    # 1. Crypto & Forex (yfinance 사용 - 차트 데이터 확보용)
-    symbols = [
-        {'type': 'crypto', 'symbol': 'BTC-KRW', 'name': '비트코인', 'code': 'BTC'},
-        {'type': 'crypto', 'symbol': 'ETH-KRW', 'name': '이더리움', 'code': 'ETH'},
-        {'type': 'forex', 'symbol': 'KRW=X', 'name': '미국 달러', 'code': 'USD/KRW'},
-        {'type': 'forex', 'symbol': 'JPYKRW=X', 'name': '일본 엔 (100)', 'code': 'JPY/KRW'},
-    ]
-
-    for item in symbols:
+# 메모리 캐시에서 바로 응답 (오래된 자산은 백그라운드에서 갱신, 업스트림을 기다리지 않음)
+# 응답의 cache_age: 자산별로 몇 초 전에 받은 값인지 (아직 없으면 None), analytics: 자산별 수익률/변동성/최대 낙폭
+# ?range=1m|3m|6m|1y|3y|5y|max&points=N 이면 일봉 저장소에서 그 기간을 최대 N개 점으로 줄여서 (LTTB)
+# ?format=columnar 면 히스토리를 {'dates': [...], 'closes': [...]} 형식으로
+@require_GET
+async def get_market_indices(request):
+    range_key = request.GET.get('range')
+    points = request.GET.get('points')
+    if range_key is None and points is not None:
+        range_key = '1m'
+    if range_key is not None:
+        if range_key not in RANGES:
+            return json_response({'error': f"range 는 {', '.join(RANGES)} 중 하나여야 합니다."}, status=400)
         try:
-            # 최근 1달 데이터 가져오기
-            ticker = yf.Ticker(item['symbol'])
-            hist = ticker.history(period="1mo")
-            
-            if hist.empty: continue
-
-            # 현재가 및 등락률 계산
-            current_price = hist['Close'].iloc[-1]
-            prev_price = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-            change_rate = ((current_price - prev_price) / prev_price) * 100
-
-            # 차트용 히스토리 데이터 가공
-            history_data = []
-            for date, row in hist.iterrows():
-                price = row['Close']
-                # 엔화는 100엔 기준으로 변환
-                if item['symbol'] == 'JPYKRW=X': price *= 100
-                
-                history_data.append({
-                    'Date': date.strftime('%Y-%m-%d'),
-                    'Close/Last': price
-                })
-
-            if item['symbol'] == 'JPYKRW=X': current_price *= 100
-
-            asset_data = {
-                'code': item['code'],
-                'name': item['name'],
-                'price': current_price,
-                'change': round(change_rate, 2),
-                'history': history_data
-            }
-
-            if item['type'] == 'crypto':
-                response_data['crypto'].append(asset_data)
-            else:
-                response_data['forex'].append(asset_data)
-
-        except Exception as e:
-            print(f"Error fetching {item['symbol']}: {e}")
-
-    # 2. Gold & Silver (로컬 엑셀 파일 사용 - 요청하신 방식)
-    try:
-        gold_file = os.path.join(settings.BASE_DIR, 'data', 'Gold_prices.xlsx')
-        silver_file = os.path.join(settings.BASE_DIR, 'data', 'Silver_prices.xlsx')
-
-        if os.path.exists(gold_file) and os.path.exists(silver_file):
-            df_gold = pd.read_excel(gold_file)
-            df_silver = pd.read_excel(silver_file)
-
-            def clean_data(df):
-                df.columns = df.columns.str.strip()
-                price_col = None
-                for col in ['Close/Last', 'Price', 'Close', 'USD (PM)']:
-                    if col in df.columns:
-                        price_col = col
-                        break
-                
-                if not price_col: return []
-
-                # 날짜 및 숫자 전처리
-                df['Date'] = pd.to_datetime(df['Date'])
-                df = df.sort_values(by='Date')
-
-                if df[price_col].dtype == 'object':
-                    df[price_col] = df[price_col].astype(str).str.replace(',', '').str.replace('$', '')
-                
-                df[price_col] = pd.to_numeric(df[price_col])
-
-                result = []
-                for _, row in df.iterrows():
-                    result.append({
-                        'Date': row['Date'].strftime('%Y-%m-%d'),
-                        'Close/Last': row[price_col]
-                    })
-                return result
-
-            # 최근 50개 데이터만 반환
-            response_data['gold'] = clean_data(df_gold)[-50:]
-            response_data['silver'] = clean_data(df_silver)[-50:]
-            
-    except Exception as e:
-        print(f"Error reading Excel files: {e}")
-
-    return Response(response_data)
+            points = min(max(int(points or DEFAULT_POINTS), 3), MAX_POINTS)
+        except ValueError:
+            return json_response({'error': 'points 는 숫자여야 합니다.'}, status=400)
+
+    data = await sync_to_async(get_market_cache().get)()
+    # 미리 계산된 자산별 지표 (요청 때 계산하지 않음)
+    data['analytics'] = await sync_to_async(asset_analytics)()
+    if range_key is not None:
+        data = await sync_to_async(ranged_indices)(data, range_key, points)
+    if request.GET.get('format') == 'columnar':
+        data = columnar_indices(data)
+    return json_response(data)
+
+# 전체 종목 지표 + 상관계수 행렬 (일봉이 저장될 때마다 미리 계산된 값)
+@require_GET
+async def market_analytics(request):
+    data = await sync_to_async(get_analytics)()
+    return json_response(data)
 # ------------------------------------------------------
 # 3. [F06] 카카오 은행 검색 & 경로 안내
 # ------------------------------------------------------
-@api_view(['GET'])
-def search_bank(request):
+@require_GET
+async def search_bank(request):
     keyword = request.GET.get('keyword', '은행')
     # 기본값: 역삼 멀티캠퍼스
     x = request.GET.get('x', '127.039585') 
     y = request.GET.get('y', '37.5012743')
     
-    api_key = settings.KAKAO_MAP_API_KEY
-    url = 'https://dapi.kakao.com/v2/local/search/keyword.json'
-    headers = {'Authorization': f'KakaoAK {api_key}'}
+    url = f'{settings.KAKAO_LOCAL_URL}/v2/local/search/keyword.json'
+    headers = {'Authorization': f'KakaoAK {settings.KAKAO_MAP_API_KEY}'}
     params = {'query': keyword, 'x': x, 'y': y, 'radius': 2000, 'sort': 'distance'}
 
-    # ---------------------------------------------------------
-    # [디버깅] 터미널로그 확인용
-    print("=========================================")
-    print(f"1. settings에서 가져온 키: [{api_key}]")
-    print(f"2. 완성된 헤더: {headers}")
-    print("=========================================")
-    # ---------------------------------------------------------
-
     try:
-        res = requests.get(url, headers=headers, params=params)
+        status_code, data = await get_json(url, params=params, headers=headers)
         # 만약 에러가 났다면 카카오가 보낸 진짜 에러 메시지를 봐야 함
-        if res.status_code != 200:
-            print(f"3. 카카오 응답 에러: {res.status_code} / {res.text}")
+        if status_code != 200:
+            print(f"카카오 응답 에러: {status_code} / {data}")
             
-        return Response(res.json())
+        return json_response(data)
     except Exception as e:
-        return Response({'error': str(e)}, status=500)
+        return json_response({'error': str(e)}, status=500)
 
-@api_view(['GET'])
-def route_guide(request):
+@require_GET
+async def route_guide(request):
     # 출발지(sp), 도착지(ep) 좌표
     sp = request.GET.get('sp', '127.039585,37.5012743')
     ep = request.GET.get('ep')
 
     if not ep:
-        return Response({'error': '목적지 좌표가 필요해!'}, status=400)
+        return json_response({'error': '목적지 좌표가 필요해!'}, status=400)
 
-    api_key = settings.KAKAO_MAP_API_KEY
-    url = 'https://apis-navi.kakaomobility.com/v1/directions'
-    headers = {'Authorization': f'KakaoAK {api_key}', 'Content-Type': 'application/json'}
+    url = f'{settings.KAKAO_NAVI_URL}/v1/directions'
+    headers = {'Authorization': f'KakaoAK {settings.KAKAO_MAP_API_KEY}', 'Content-Type': 'application/json'}
     params = {'origin': sp, 'destination': ep, 'priority': 'RECOMMEND'}
 
     try:
-        res = requests.get(url, headers=headers, params=params)
-        
-        # 🔥 [디버깅 추가] 터미널에서 이 로그를 확인하세요!
-        print("================ 카카오 응답 확인 ================")
-        print(f"상태 코드: {res.status_code}")
-        print(f"응답 본문: {res.json()}") 
-        print("================================================")
-
-        return Response(res.json())
+        status_code, data = await get_json(url, params=params, headers=headers)
+        if status_code != 200:
+            print(f"카카오 길찾기 응답 에러: {status_code} / {data}")
+
+        return json_response(data)
      
     except Exception as e:
-        return Response({'error': str(e)}, status=500)
+        return json_response({'error': str(e)}, status=500)
 
 # ------------------------------------------------------
 # 4. [심화] AI 금융 상담 (GMS / OpenAI)
 # ------------------------------------------------------
+from . import ai_client
+from .ai_client import AIBusyError
+from .llm_cache import get_llm_cache, query_key
+from .sse import sse_event, sse_response
+
+CONSULT_MODEL = "gpt-4o-mini" # 혹은 gpt-3.5-turbo 등 GMS 지원 모델
+CONSULT_SYSTEM_PROMPT = "너는 친절한 금융 전문가야. 한국어로 명확하게 답변해줘."
+
 @api_view(['POST'])
 def ai_financial_consult(request):
     user_query = request.data.get('query')
@@ -186,21 +113,63 @@ def ai_financial_consult(request):
     if not user_query:
         return Response({'error': '질문 내용을 입력해줘!'}, status=400)
 
-    # GMS 엔드포인트 사용
-    client = OpenAI(
-        api_key=settings.GMS_API_KEY,
-        base_url=settings.GMS_BASE_URL
-    )
+    def ask():
+        # GMS 엔드포인트 사용 (캐시에 없을 때만 호출)
+        return ai_client.chat(CONSULT_MODEL, [
+            {"role": "system", "content": CONSULT_SYSTEM_PROMPT},
+            {"role": "user", "content": user_query}
+        ])
 
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini", # 혹은 gpt-3.5-turbo 등 GMS 지원 모델
-            messages=[
-                {"role": "system", "content": "너는 친절한 금융 전문가야. 한국어로 명확하게 답변해줘."},
-                {"role": "user", "content": user_query}
-            ]
-        )
-        answer = completion.choices[0].message.content
+        # 비슷한 질문은 캐시된 답변 사용, 동시에 들어온 같은 질문은 호출 하나를 공유
+        key = query_key(CONSULT_MODEL, CONSULT_SYSTEM_PROMPT, user_query)
+        answer = get_llm_cache().get_or_call(key, ask)
         return Response({'answer': answer})
+    except AIBusyError as e:
+        return Response({'error': str(e)}, status=503)
     except Exception as e:
-        return Response({'error': str(e)}, status=500)
\ No newline at end of file
+        return Response({'error': str(e)}, status=500)
+
+# [스트리밍] AI 상담 - 토큰이 나오는 대로 SSE 로 전달
+# event: token {"text": 조각} ... event: done {"answer": 전체 답변}
+@api_view(['POST'])
+def ai_financial_consult_stream(request):
+    user_query = request.data.get('query')
+
+    if not user_query:
+        return Response({'error': '질문 내용을 입력해줘!'}, status=400)
+
+    cache = get_llm_cache()
+    key = query_key(CONSULT_MODEL, CONSULT_SYSTEM_PROMPT, user_query)
+
+    def events():
+        answer = cache.get(key)
+        if answer is not None:
+            # 캐시된 답변은 한 번에 전달
+            yield sse_event('token', {'text': answer})
+            yield sse_event('done', {'answer': answer})
+            return
+
+        try:
+            parts = []
+            for text in ai_client.stream_chat(CONSULT_MODEL, [
+                {"role": "system", "content": CONSULT_SYSTEM_PROMPT},
+                {"role": "user", "content": user_query}
+            ]):
+                parts.append(text)
+                yield sse_event('token', {'text': text})
+        except Exception as e:
+            yield sse_event('error', {'error': str(e)})
+            return
+
+        answer = ''.join(parts)
+        cache.put(key, answer)
+        yield sse_event('done', {'answer': answer})
+
+    return sse_response(request, events())
+
+# AI 호출 현황 (모델별 호출 수 / 지연시간 / 토큰, 동시 호출 수)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def ai_metrics(request):
+    return Response(ai_client.metrics())
@@ -1,24 +1,25 @@
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.conf import settings
+from django.views.decorators.http import require_GET
 from accounts.models import SavedVideo
-import requests
+from services.upstream import get_json, json_response
 
 # 1. 유튜브 영상 검색 (로그인 없이 가능) - [F05] 유튜브 영상 검색 (API 중계)
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def youtube_search(request):
-    query = request.query_params.get('q')
+# 영상 검색/상세는 외부 API 중계만 하므로 async 뷰 (공용 httpx AsyncClient 사용)
+@require_GET
+async def youtube_search(request):
+    query = request.GET.get('q')
     
     if not query:
-        return Response({'message': '검색어를 입력해주세요.'}, status=400)
+        return json_response({'message': '검색어를 입력해주세요.'}, status=400)
 
     api_key = settings.YOUTUBE_API_KEY
     if not api_key:
-        return Response({'message': '서버에 YouTube API 키가 설정되지 않았습니다.'}, status=500)
+        return json_response({'message': '서버에 YouTube API 키가 설정되지 않았습니다.'}, status=500)
 
-    url = 'https://www.googleapis.com/youtube/v3/search'
+    url = f'{settings.YOUTUBE_API_URL}/search'
     
     params = {
         'key': api_key,
@@ -31,31 +32,32 @@ def youtube_search(request):
     }
 
     try:
-        res = requests.get(url, params=params)
+        status_code, data = await get_json(url, params=params)
     
         # 유튜브 API 쿼터 초과 등의 에러 처리
-        if res.status_code != 200:
-            return Response(res.json(), status=res.status_code)
-        return Response(res.json())
+        if status_code != 200:
+            return json_response(data, status=status_code)
+        return json_response(data)
     except Exception as e:
-        return Response({'error': str(e)}, status=500)
+        return json_response({'error': str(e)}, status=500)
 # [신규] 영상 상세 정보 조회 (조회수, 설명 등)
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def video_detail(request):
+@require_GET
+async def video_detail(request):
     video_id = request.GET.get('id')
     if not video_id:
-        return Response({'error': 'ID required'}, status=400)
+        return json_response({'error': 'ID required'}, status=400)
         
-    api_key = settings.YOUTUBE_API_KEY
     # part에 'statistics'를 포함해야 조회수 확인 가능
-    url = f"https://www.googleapis.com/youtube/v3/videos?id={video_id}&key={api_key}&part=snippet,statistics"
+    url = f'{settings.YOUTUBE_API_URL}/videos'
+    params = {'id': video_id, 'key': settings.YOUTUBE_API_KEY, 'part': 'snippet,statistics'}
     
     try:
-        res = requests.get(url)
-        return Response(res.json())
+        status_code, data = await get_json(url, params=params)
+        if status_code != 200:
+            return json_response(data, status=status_code)
+        return json_response(data)
     except Exception as e:
-        return Response({'error': str(e)}, status=500)
+        return json_response({'error': str(e)}, status=500)
     
 # 2. 북마크 추가/해제 (로그인 필수)
 @api_view(['POST'])